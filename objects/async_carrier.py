@@ -0,0 +1,175 @@
+import asyncio
+import concurrent.futures
+import threading
+import pyRofex
+from carrier import Carrier
+from event_log import log
+
+
+class AsyncCarrier(Carrier):
+    """
+    Carrier that sends both legs of an arbitrage at the same time.
+
+    The legs are sent through the websocket with their own `wsClOrdId`, then the futures of
+    their tracked orders are awaited together with a deadline. If a leg isn't filled in time it's
+    cancelled with `cancel_order`. Every leg is saved with what was executed of it when its final
+    order report arrives, so a partial fill that ends cancelled is saved too.
+
+    Everything runs in an asyncio loop in its own thread: `send_orders_wb`, which is what
+    `StrategyArbitrationOfClearing.prepare_orders` calls, only schedules the coroutine and
+    returns, so the market data thread never waits for the market.
+
+    Args:
+    - broker: The broker object.
+    - strategy: Optional strategy object.
+    - sequencer: Optional EventSequencer.
+    - journal: Optional OrderJournal.
+    - report_timeout: Seconds to wait for the order reports of the legs.
+    """
+
+    def __init__(self, broker, strategy=None, sequencer=None, journal=None, report_timeout: float = 2.0) -> None:
+        super().__init__(broker, strategy, sequencer, journal)
+        self.report_timeout = report_timeout
+        self.loop = None
+        self._loop_thread = None
+        self._in_flight = set()
+
+    def start_loop(self) -> None:
+        if self._loop_thread is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, name="async-carrier", daemon=True)
+        self._loop_thread.start()
+
+    def stop_loop(self) -> None:
+        if self._loop_thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join()
+        self._loop_thread = None
+        self.loop.close()
+
+    def conect_wb(self) -> None:
+        """
+        Establish the WebSocket connection, subscribe to the order reports and start the loop of the carrier.
+        """
+        super().conect_wb()
+        self.start_loop()
+
+    def wb_disconnect(self) -> None:
+        """
+        Wait for the arbitrages in flight while the websocket still delivers their order reports, then
+        disconnect, save the fills and stop the loop.
+        """
+        self.settle()
+        super().wb_disconnect()
+        self.stop_loop()
+
+    def settle(self, timeout: float | None = None) -> int:
+        """
+        Wait for the `send_orders` in flight, the ones still running after `timeout` seconds are cancelled,
+        which saves the legs they had filled.
+
+        Args:
+        - timeout: Seconds to wait, by default twice `report_timeout`: the deadline of the legs plus their cancels.
+
+        Returns:
+        - int: The number of `send_orders` cancelled.
+        """
+        pending = list(self._in_flight)
+        if not pending:
+            return 0
+        _, not_done = concurrent.futures.wait(pending, timeout=2 * self.report_timeout if timeout is None else timeout)
+        if not_done:
+            log.warning("Se cancelaron %s envios de ordenes en curso al desconectar", len(not_done))
+            for future in not_done:
+                future.cancel()
+            concurrent.futures.wait(not_done, timeout=self.report_timeout)
+        return len(not_done)
+
+    def send_orders_wb(self, orders: list):
+        """
+        Schedule `send_orders` in the loop of the carrier and return its concurrent future right away.
+        """
+        self.start_loop()
+        future = asyncio.run_coroutine_threadsafe(self.send_orders(orders), self.loop)
+        self._in_flight.add(future)
+        future.add_done_callback(self._in_flight.discard)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future) -> None:
+        # Nobody reads the future of the strategy, so an exception of send_orders would be lost
+        if not future.cancelled() and future.exception() is not None:
+            log.error("Fallo el envio de un arbitraje: %s", future.exception())
+
+    async def send_orders(self, orders: list) -> list:
+        """
+        Send every leg at the same time and wait for their order reports.
+
+        Args:
+        - orders: The legs of the arbitrage, as built by the strategy `_format_order`.
+
+        Returns:
+        - list: The legs that were filled.
+        """
+        size = orders[0].get("Size")
+        symbol = orders[0].get("Symbol")
+        loop = asyncio.get_running_loop()
+
+        order_ids = [self.order_tracker.new_id() for _ in orders]
+        # The buy is reserved first, it limits the size of both legs
+        for order, order_id in sorted(zip(orders, order_ids), key=lambda leg: leg[0].get("Side") != "buy"):
+            size = self._reserve(order_id, order.get("Side"), size, order.get("Price_with_costs"))
+            if size == 0:
+                return []
+
+        legs = []
+        for order, order_id in zip(orders, order_ids):
+            if order.get("Side") == "buy":
+                order_side, price = pyRofex.Side.BUY, order.get("Offer")
+            else:
+                order_side, price = pyRofex.Side.SELL, order.get("Bid")
+            order["Size"] = size
+            ticker = self.instruments.order_ticker(symbol, order.get("Clearing"))
+            legs.append((ticker, order_side, price, order_id))
+
+        tracked_orders = await asyncio.gather(*(
+            loop.run_in_executor(None, self._send_leg, ticker, order_side, size, price, order_id)
+            for ticker, order_side, price, order_id in legs
+        ))
+        if None in tracked_orders:
+            # A leg that failed was released by _send_leg, the legs sent go on and are cancelled after the deadline unless they are filled
+            sent = [(order, tracked_order) for order, tracked_order in zip(orders, tracked_orders) if tracked_order is not None]
+            if not sent:
+                return []
+            orders, tracked_orders = zip(*sent)
+        # Saved by the thread of the final report, even if this coroutine is cancelled by a disconnect
+        for order, tracked_order in zip(orders, tracked_orders):
+            tracked_order.future.add_done_callback(lambda future, order=order: self._save_if_executed(order, future))
+        await asyncio.wait([asyncio.wrap_future(tracked_order.future) for tracked_order in tracked_orders], timeout=self.report_timeout)
+
+        filled = []
+        for order, tracked_order in zip(orders, tracked_orders):
+            if tracked_order.is_filled:
+                filled.append(order)
+            else:
+                await self._cancel_leg(tracked_order)
+        return filled
+
+    async def _cancel_leg(self, tracked_order) -> None:
+        # The cancel needs the clOrdId given by the market, which comes in the first order report
+        if tracked_order.client_order_id is None:
+            log.warning("No se pudo cancelar una orden sin reporte de la misma")
+            return
+        if tracked_order.is_final:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.cancel_order, tracked_order.client_order_id)
+        except Exception as e:
+            log.error("Mensaje de excepción: %s", e)
+
+    def _order_report_handler(self, message: dict) -> None:
+        # Unfilled legs are cancelled by send_orders after the deadline, not on their first report
+        self._track_report(message.get("orderReport", {}))
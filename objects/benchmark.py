@@ -0,0 +1,157 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import numpy as np
+from broker import Broker
+from recorder import ReplayCarrier
+from strategy_arbitration_clearing import StrategyArbitrationOfClearing
+
+
+# The clearings of the legs of the strategy, quotes of other clearings are never evaluated
+CLEARINGS = ("CI", "48hs")
+
+
+def generate_messages(tickers: int, ticks: int, seed: int = 0) -> list:
+    """
+    Generate synthetic pyRofex Md messages for `tickers` instruments in every clearing.
+
+    Prices move one tick at a time around a random level, so most messages change the price
+    and a few of them cross the TNA threshold.
+    """
+    rng = random.Random(seed)
+    symbols = [f"TK{number:03d}" for number in range(tickers)]
+    levels = {symbol: rng.uniform(100, 10000) for symbol in symbols}
+    timestamp = 1713216949167
+    messages = []
+
+    for _ in range(ticks):
+        symbol = rng.choice(symbols)
+        clearing = rng.choice(CLEARINGS)
+        price = round(levels[symbol] * (1 + rng.uniform(-0.01, 0.01)), 2)
+        level = [{"price": price, "size": rng.randint(1, 500)}]
+        timestamp += 1
+        messages.append({
+            "type": "Md",
+            "timestamp": timestamp,
+            "instrumentId": {"marketId": "ROFX", "symbol": f"MERV - XMEV - {symbol} - {clearing}"},
+            "marketData": {"BI": level if clearing != "CI" else [], "OF": level if clearing == "CI" else []},
+        })
+    return messages
+
+
+def new_strategy(tna_expected: float, fixed_point: bool = False) -> StrategyArbitrationOfClearing:
+    broker = Broker(credentials=None, budget=10**12)
+    carrier = ReplayCarrier(broker)
+    strategy = StrategyArbitrationOfClearing(carrier, tna_expected=tna_expected, fixed_point=fixed_point)
+    carrier.strategy = strategy
+    return strategy
+
+
+def measure(function, arguments: list) -> dict:
+    """
+    Call the function once per argument and summarize the latency of the calls.
+    """
+    latencies = np.empty(len(arguments), dtype=np.int64)
+    clock = time.perf_counter_ns
+    start = clock()
+    for number, argument in enumerate(arguments):
+        before = clock()
+        function(argument)
+        latencies[number] = clock() - before
+    elapsed = (clock() - start) / 1e9
+
+    p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9])
+    return {
+        "calls": len(arguments),
+        "ticks_per_second": len(arguments) / elapsed if elapsed else 0.0,
+        "mean_us": float(latencies.mean()) / 1e3,
+        "p50_us": float(p50) / 1e3,
+        "p99_us": float(p99) / 1e3,
+        "p999_us": float(p999) / 1e3,
+        "max_us": float(latencies.max()) / 1e3,
+    }
+
+
+def end_to_end(strategy: StrategyArbitrationOfClearing, result: dict) -> dict:
+    """
+    Add to the result how many TNA were evaluated and how many order legs were sent, so the latency
+    can be told apart from early exits.
+    """
+    result["tna_evaluations"] = strategy.carrier.metrics.value("pybot_tna_evaluations_total")
+    result["orders_sent"] = len(strategy.carrier.sent_orders)
+    return result
+
+
+def run_benchmarks(tickers: int, ticks: int, tna_expected: float, seed: int = 0, fixed_point: bool = False, batch: int = 16) -> dict:
+    messages = generate_messages(tickers, ticks, seed)
+
+    strategy = new_strategy(tna_expected, fixed_point)
+    results = {"manipulate_data": measure(strategy.manipulate_data, messages)}
+
+    # Book update: every message replaces an existing slot
+    data = [strategy.manipulate_data(message) for message in messages]
+    for row in data:
+        strategy.quote_book.add(row)
+    book = strategy.quote_book
+    results["book_update"] = measure(lambda row: book.update(book.slot(row["Symbol"], row["Clearing"]), row), data)
+
+    results["add_costs"] = measure(strategy.add_costs, [{"Buy": row["Offer"]} if row["Clearing"] == "CI" else {"Sell": row["Bid"]} for row in data])
+
+    quoted = [symbol for symbol in book.tickers if book.slot(symbol, "CI") is not None and book.slot(symbol, "48hs") is not None]
+    results["calculate_tna"] = measure(strategy.calculate_tna, [quoted[number % len(quoted)] for number in range(ticks)] if quoted else [])
+
+    # End to end, from the raw message to the orders sent to the stub carrier
+    strategy = new_strategy(tna_expected, fixed_point)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results["handle_incoming_messages"] = end_to_end(strategy, measure(strategy.handle_incoming_messages, messages))
+
+    # End to end in batches, the handler the strategy subscribes with: each call is a batch drained from the conflating inbox
+    strategy = new_strategy(tna_expected, fixed_point)
+    batches = [messages[start:start + batch] for start in range(0, len(messages), batch)]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = end_to_end(strategy, measure(strategy.handle_batch_of_messages, batches))
+    result["batch_size"] = batch
+    result["messages_per_second"] = result["ticks_per_second"] * len(messages) / len(batches) if batches else 0.0
+    results["handle_batch_of_messages"] = result
+
+    return results
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the tick to order path, it runs offline with a stub carrier")
+    parser.add_argument("--tickers", type=int, default=25, help="Number of synthetic tickers, each one quoted in CI and 48hs")
+    parser.add_argument("--ticks", type=int, default=50000, help="Number of messages generated")
+    parser.add_argument("--tna", type=float, default=110, help="Expected TNA of the strategy")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic messages")
+    parser.add_argument("--batch", type=int, default=16, help="Messages per call of the batch handler")
+    parser.add_argument("--fixed-point", action="store_true", help="Evaluate the prices in integer ticks and the TNA in basis points")
+    parser.add_argument("--output", help="File where the JSON results are written, by default they are printed")
+    args = parser.parse_args()
+
+    report = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "tickers": args.tickers,
+        "ticks": args.ticks,
+        "fixed_point": args.fixed_point,
+        "batch": args.batch,
+        "results": run_benchmarks(args.tickers, args.ticks, args.tna, args.seed, args.fixed_point, args.batch),
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -1,6 +1,7 @@
 from typing import Tuple, List, Dict
 import pyRofex
 import sys
+from ledger import BudgetLedger
 
 class Broker:
     """
@@ -14,7 +15,8 @@ class Broker:
     """
 
     def __init__(
-        self, credentials: Dict[str, str], budget: float = 100, comission: float = 0.15, market_right: float = 0.08, prod_env=False
+        self, credentials: Dict[str, str], budget: float = 100, comission: float = 0.15, market_right: float = 0.08, prod_env=False,
+        confirm_prod: bool = True, connect: bool = True
     ) -> None:
         """
         Initializes a new instance of the Broker class.
@@ -24,29 +26,37 @@ class Broker:
             budget (float, optional): The initial budget available for trading. Defaults to 100.
             comission (float, optional): The commission rate applied to each trade. Defaults to 0.5.
             market_right (float, optional): The market right percentage. Defaults to 0.08.
+            confirm_prod (bool, optional): Ask for confirmation before connecting to the production environment. Defaults to True.
+            connect (bool, optional): Log in right away. If False `connect` has to be called, so the login can overlap with the rest of the startup. Defaults to True.
         """
-        self._budget = budget
+        self.ledger = BudgetLedger(budget)
         self.comission = comission
         self.market_right = market_right
         self._costs = None
         self.credentials = credentials
-        environment = pyRofex.Environment.REMARKET
-        self.broker_name = credentials.get("broker_name").lower()
+        self.environment = pyRofex.Environment.REMARKET
+        self.broker_name = credentials.get("broker_name", "").lower() if credentials else None
 
         if prod_env:
-            self.security_measure()
+            if confirm_prod:
+                self.security_measure()
             pyRofex._set_environment_parameter("url", f"https://api.{self.broker_name}.xoms.com.ar/", pyRofex.Environment.LIVE)
             pyRofex._set_environment_parameter("ws", f"wss://api.{self.broker_name}.xoms.com.ar/", pyRofex.Environment.LIVE)
-            environment = pyRofex.Environment.LIVE
+            self.environment = pyRofex.Environment.LIVE
 
+        if connect:
+            self.connect()
 
-        # Log in in Matriz
-        if credentials != None:
+    def connect(self) -> None:
+        """
+        Log in in Matriz, it blocks until the REST authentication answers.
+        """
+        if self.credentials != None:
             pyRofex.initialize(
                 user=self.credentials.get("user"),
                 password=self.credentials.get("password"),
                 account=self.credentials.get("account"),
-                environment=environment,
+                environment=self.environment,
                 active_token=None
             )
 
@@ -64,18 +74,27 @@ class Broker:
     def costs(self, value):
         self._costs = value
 
+    @property
+    def account(self):
+        return self.credentials.get("account") if self.credentials else None
+
     @property
     def budget(self):
-        if self._budget <= 0:
+        """
+        Budget available to trade, the capital reserved by the orders in flight isn't included.
+        """
+        budget = self.ledger.available
+        if budget <= 0:
             raise ValueError("Budget has to be greater than zero")
         else:
-            return self._budget
+            return budget
 
     @budget.setter
     def budget(self, value):
-        self._budget = value
+        self.ledger.available = value
 
-    def security_measure(self):
+    @staticmethod
+    def security_measure():
         result = int(input("Are you sure to connect to the production environment? Press 1 if you are sure "))
         if result != 1:
             sys.exit()
@@ -1,38 +1,117 @@
 import pyRofex
-import math
-from orders_table import OrdersTable
-import time
-import threading
+from orders_table import OrdersTable, OrdersWriter
+from conflation import ConflatingInbox, InboxDrainer
+from sequencer import EventType
+from instruments import InstrumentRegistry
+from latency import LatencyTracker
+from order_tracker import OrderTracker, TrackedOrder
+from snapshots import SnapshotCache, SnapshotFetcher
+from metrics import Metrics
+from market_data_hub import MarketDataHub
+from startup import StartupTimer
+from event_log import log
 
 
 
 
 class Carrier():
-    def __init__(self, broker, strategy=None):
+    def __init__(self, broker, strategy=None, sequencer=None, journal=None):
         """
         Initialize the Carrier object.
 
         Args:
         - broker: The broker object.
-        - strategy: Optional strategy object.
+        - strategy: Optional strategy object, more strategies can be run by the carrier with `add_strategy`.
+        - sequencer: Optional EventSequencer. When it is set, websocket callbacks are published
+        as events and applied by the sequencer thread instead of running in the thread that received them.
+        - journal: Optional OrderJournal where the orders table persists every order saved.
 
         """
         self.broker = broker
-        self._strategy = strategy
-        self.orders_table = OrdersTable(strategy)
-        self._was_order_complete = False
+        self.strategies = [strategy] if strategy is not None else []
+        self.instruments = InstrumentRegistry()
+        self.hub = MarketDataHub(self.instruments)
+        self.orders_table = OrdersTable(strategy, self.instruments, journal)
+        self.orders_writer = OrdersWriter(self.orders_table)
+        self.order_tracker = OrderTracker()
+        self.snapshots = None
+        self.cache = SnapshotCache()
+        self.inbox = None
+        self._inbox_drainer = None
+        self.sequencer = sequencer
+        self.recorder = None
+        self.latency = LatencyTracker()
+        self.metrics = Metrics()
+        self._declare_metrics()
+        self._connections = 0
+        if sequencer is not None:
+            sequencer.register(EventType.ORDER_REPORT, self._order_report_handler)
 
     @property
     def strategy(self):
-        return self._strategy
+        """
+        The first strategy of the carrier.
+        """
+        return self.strategies[0] if self.strategies else None
 
     @strategy.setter
     def strategy(self, value):
-        self._strategy = value
+        if self.strategies:
+            self.strategies[0] = value
+        else:
+            self.strategies.append(value)
 
-    
-    def run_strategy(self):
-        self.strategy.run_strategy()
+    def add_strategy(self, strategy) -> None:
+        """
+        Run another strategy with the carrier, it shares the market data subscription with the rest.
+        """
+        self.strategies.append(strategy)
+
+    def run_strategy(self, timer: StartupTimer | None = None):
+        """
+        Run every strategy, they register their instruments in the market data hub, then connect
+        the websocket and subscribe once to the union of their instruments.
+
+        The REST snapshot that seeds the books is fetched while the websocket connects, and applied
+        before the subscription, so no message of the websocket is older than the snapshot.
+
+        Args:
+        - timer: Optional StartupTimer where the phases are recorded.
+        """
+        own_timer = timer is None
+        if own_timer:
+            timer = StartupTimer()
+        for strategy in self.strategies:
+            strategy.run_strategy()
+        timer.mark("strategies")
+        hub = self.hub
+        snapshot = None
+        if len(hub):
+            snapshot = timer.background("snapshot", self.get_market_data_snapshot, hub.symbols(), hub.entries, hub.depth)
+        self.conect_wb()
+        timer.mark("websocket")
+        if snapshot is not None:
+            hub.seed(snapshot.result())
+            timer.mark("seed")
+            handler = hub.handle_batch if hub.conflate else hub.handle
+            self.market_data_subscription(hub.symbols(), hub.entries, handler=handler, depth=hub.depth, conflate=hub.conflate)
+            timer.mark("subscription")
+        if own_timer:
+            timer.shutdown()
+
+    def subscribe_market_data(self, instruments: list, entries: list, handler, depth: int = 1, conflate: bool = False, seed=None) -> None:
+        """
+        Register the handler of a strategy in the market data hub, the subscription is done by `run_strategy`.
+
+        Args:
+        - instruments: pyRofex symbols watched by the strategy, only their messages reach the handler.
+        - entries: The types of market data the strategy reads (bids, offers).
+        - handler: Callable that processes the market data.
+        - depth: Depth of the book the strategy reads.
+        - conflate: If True the handler receives lists of messages, see `market_data_subscription`.
+        - seed: Optional callable that receives the REST snapshot of the instruments, keyed by symbol, before the subscription.
+        """
+        self.hub.register(instruments, entries, handler, depth, conflate, seed)
 
     def get_market_data(self, instruments, formated=False) -> list:
         """
@@ -46,10 +125,27 @@ class Carrier():
 
         """
         if not formated:
-            self.format_instruments(instruments)
+            instruments = self.format_instruments(instruments)
         entries = [pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST]
 
-        return [pyRofex.get_market_data(ticker=instrument, entries=entries, depth=2) for instrument in instruments]
+        snapshot = self.get_market_data_snapshot(instruments, entries, depth=2)
+        return [snapshot[instrument] for instrument in instruments]
+
+    def get_market_data_snapshot(self, instruments: list, entries: list, depth: int = 1) -> dict:
+        """
+        Get the market data of every instrument concurrently, over the keep-alive session of the carrier.
+
+        Args:
+        - instruments: pyRofex symbols of the instruments.
+        - entries: The types of market data to get (bids, offers, last price).
+        - depth: Depth of the book to get.
+
+        Returns:
+        - dict: The market data response of each instrument, keyed by its symbol.
+        """
+        if self.snapshots is None:
+            self.snapshots = SnapshotFetcher(cache=self.cache)
+        return self.snapshots.fetch_many(instruments, entries, depth)
     
 
     # TODO mejorar
@@ -62,34 +158,37 @@ class Carrier():
         for order in orders:
             clearing = order.get("Clearing")
             side = order.get("Side")
-            price_with_costs = order.get("Price_with_costs")[0]
+            price_with_costs = order.get("Price_with_costs")
+            order_id = self.order_tracker.new_id()
 
             if side == "buy":
                 price = order.get("Offer")
                 order_side = pyRofex.Side.BUY
 
-                available_to_afford = math.floor(self.broker.budget / price_with_costs)
-                size = min(size, available_to_afford)
-
-                cost_of_operation = price_with_costs * size
+                size = self._reserve(order_id, side, size, price_with_costs)
                 if size == 0:
-                    print(f"You need money to complete this operation, you have ${self.broker.budget} and it costs at least ${price_with_costs} ")
                     break
 
-                self.broker.budget -= cost_of_operation
-
             else:
                 price = order.get("Bid")
                 order_side = pyRofex.Side.SELL
+                self._reserve(order_id, side, size, price_with_costs)
 
             formatted_symbol = self.format_instruments(symbol, clearing)
-            response = pyRofex.send_order(
-                ticker=formatted_symbol,
-                side=order_side,
-                size=size,
-                price=price,
-                order_type=pyRofex.OrderType.LIMIT
-            )["order"]["clientId"]
+            try:
+                response = pyRofex.send_order(
+                    ticker=formatted_symbol,
+                    side=order_side,
+                    size=size,
+                    price=price,
+                    order_type=pyRofex.OrderType.LIMIT
+                )["order"]["clientId"]
+            except Exception as e:
+                # The order never reached the market, its reservation goes back to the budget
+                self.broker.ledger.release(order_id)
+                log.error("No se pudo enviar la orden de %s %s: %s", formatted_symbol, side, e)
+                break
+            self.metrics.inc("pybot_orders_sent_total", (side,))
 
 
             order["Size"] = size
@@ -103,11 +202,22 @@ class Carrier():
 
                     if was_operated == False:
                         self.cancel_order(response)
+                        self.broker.ledger.release(order_id)
+                        self.metrics.inc("pybot_orders_finished_total", ("cancelled",))
                         break
                     else:
-                        threading.Thread(target=self.orders_table.save_row, args=(order,)).start()
+                        self.broker.ledger.reconcile(order_id, size, final=True)
+                        self.metrics.inc("pybot_orders_finished_total", ("filled",))
+                        self._save_order(order)
                 except Exception as e:
-                    print(e)
+                    log.error("Mensaje de excepción: %s", e)
+                    # The state of the order is unknown, it's cancelled and its reservation released
+                    try:
+                        self.cancel_order(response)
+                    except Exception as cancel_error:
+                        log.error("Mensaje de excepción: %s", cancel_error)
+                    self.broker.ledger.release(order_id)
+                    break
 
 
             # order["Total_cost_of_operation"] = cost_of_operation
@@ -115,56 +225,148 @@ class Carrier():
 
 
 
-    def send_orders_wb(self, orders:dict):
+    def send_orders_wb(self, orders:dict) -> list:
+        """
+        Send the legs through the websocket, each leg is saved when its order report says it was filled.
+
+        Returns:
+        - list: The TrackedOrder of every leg sent, its future is resolved by the final order report.
+        """
         size = orders[0].get("Size")
         symbol = orders[0].get("Symbol")
+        sent = []
 
         for order in orders:
             clearing = order.get("Clearing")
             side = order.get("Side")
-            price_with_costs = order.get("Price_with_costs")[0]
+            price_with_costs = order.get("Price_with_costs")
+            order_id = self.order_tracker.new_id()
 
             if side == "buy":
                 price = order.get("Offer")
                 order_side = pyRofex.Side.BUY
 
-                available_to_afford = math.floor(self.broker.budget / price_with_costs)
-                size = min(size, available_to_afford)
-
-                cost_of_operation = price_with_costs * size
+                size = self._reserve(order_id, side, size, price_with_costs)
                 if size == 0:
-                    print(f"You need money to complete this operation, you have ${self.broker.budget} and it costs at least ${price_with_costs} ")
                     break
 
-                self.broker.budget -= cost_of_operation
-
             else:
                 price = order.get("Bid")
                 order_side = pyRofex.Side.SELL
+                self._reserve(order_id, side, size, price_with_costs)
 
-            formatted_symbol = self.format_instruments(symbol, clearing)
-            pyRofex.send_order_via_websocket(
-                ticker=formatted_symbol,
-                side=order_side,
-                size=size,
-                price=price,
-                order_type=pyRofex.OrderType.LIMIT,
-            )
-
+            formatted_symbol = self.instruments.order_ticker(symbol, clearing)
             order["Size"] = size
-            # is_complete = self.await_for_order_complete()
-            is_complete = True
-            if is_complete:
-                threading.Thread(target=self.orders_table.save_row, args=(order,)).start()
-                self._was_order_complete= False
-            else:
+            tracked_order = self._send_leg(formatted_symbol, order_side, size, price, order_id)
+            if tracked_order is None:
+                # The legs already sent are cancelled by the order report handler unless they are filled
                 break
+            tracked_order.future.add_done_callback(lambda future, order=order: self._save_if_executed(order, future))
+            sent.append(tracked_order)
 
-    def await_for_order_complete(self):
-        time.sleep(0.1)
-        if self._was_order_complete:
-            return True
-        else:
+        return sent
+
+    def _reserve(self, order_id: str, side: str, size: int, price_with_costs: float) -> int:
+        """
+        Reserve the leg in the budget ledger of the broker, a buy is limited to what the budget affords.
+
+        The order reports of the leg commit its fills and release what is left of the reservation.
+
+        Returns:
+        - int: The size of the leg, 0 if the budget doesn't afford a single unit of the buy.
+        """
+        size = self.broker.ledger.reserve(order_id, price_with_costs, size, side)
+        if size == 0:
+            log.warning("You need money to complete this operation, you have $%s and it costs at least $%s", self.broker.ledger.available, price_with_costs)
+        return size
+
+    def _send_tracked(self, ticker: str, side, size: int, price: float, ws_client_order_id: str = None) -> TrackedOrder:
+        """
+        Track an order with the given `wsClOrdId`, or a new one, and send it through the websocket.
+        """
+        if ws_client_order_id is None:
+            ws_client_order_id = self.order_tracker.new_id()
+        tracked_order = self.order_tracker.track(ws_client_order_id, ticker, side, size, price)
+        self.metrics.inc("pybot_orders_sent_total", ("buy" if side == pyRofex.Side.BUY else "sell",))
+        self._send_order_via_websocket(ticker, side, size, price, tracked_order.ws_client_order_id)
+        return tracked_order
+
+    def _send_leg(self, ticker: str, side, size: int, price: float, order_id: str) -> TrackedOrder | None:
+        """
+        Send a leg already reserved in the budget ledger. If the send fails the leg stops being
+        tracked and its reservation is released, so the budget isn't blocked by an order that
+        never reached the market.
+
+        Returns:
+        - TrackedOrder: The leg sent, None if the send failed.
+        """
+        try:
+            return self._send_tracked(ticker, side, size, price, order_id)
+        except Exception as e:
+            self.order_tracker.discard(order_id)
+            self.broker.ledger.release(order_id)
+            log.error("No se pudo enviar la orden %s de %s: %s", order_id, ticker, e)
+            return None
+
+    def _send_order_via_websocket(self, ticker: str, side, size: int, price: float, ws_client_order_id: str = None) -> None:
+        """
+        Send a limit order through the websocket, it's the only point where the websocket orders reach the market.
+        """
+        stage_start = self.latency.now()
+        pyRofex.send_order_via_websocket(
+            ticker=ticker,
+            side=side,
+            size=size,
+            price=price,
+            order_type=pyRofex.OrderType.LIMIT,
+            ws_client_order_id=ws_client_order_id,
+        )
+        sent_at = self.latency.record("send", stage_start)
+        tracked_order = self.order_tracker.get(ws_client_order_id)
+        # The order report may arrive before the send returns, then it's already recorded
+        if tracked_order is not None and tracked_order.status is None:
+            tracked_order.sent_at = sent_at
+
+    def _save_order(self, order: dict) -> None:
+        """
+        Hand the order to the orders writer, which saves it in the orders table in its own thread.
+        """
+        self.orders_writer.put(order)
+
+    def _save_if_executed(self, order: dict, future) -> bool:
+        """
+        Save the leg of a final order report if any of it was executed, a partial fill that was cancelled included.
+
+        The leg is saved with the size filled and, when the report has the average price, with it as
+        the price of the leg and its price with costs scaled to it.
+
+        Returns:
+        - bool: True if the leg was saved.
+        """
+        tracked_order = future.result()
+        if tracked_order.filled_size <= 0:
+            return False
+        executed = dict(order)
+        executed["Size"] = tracked_order.filled_size
+        price_key = "Offer" if order.get("Side") == "buy" else "Bid"
+        limit_price = order.get(price_key)
+        average_price = tracked_order.average_price
+        if average_price and limit_price:
+            executed[price_key] = average_price
+            executed["Price_with_costs"] = round(order.get("Price_with_costs") * average_price / limit_price, 2)
+        self._save_order(executed)
+        return True
+
+    def await_for_order_complete(self, tracked_order: TrackedOrder, timeout: float | None = None) -> bool:
+        """
+        Wait for the final order report of the order.
+
+        Returns:
+        - bool: True if the order was filled, False if it wasn't or the timeout expired first.
+        """
+        try:
+            return tracked_order.future.result(timeout).is_filled
+        except TimeoutError:
             return False
 
 
@@ -173,9 +375,10 @@ class Carrier():
         """Retrieves the account report.
         Returns
         =============================================================
-        - report: The account report obtained from the pyRofex library.
+        - report: The account report obtained from the pyRofex library, cached until an order report of the account arrives.
         """
-        return pyRofex.get_account_report(account=self.broker.account)
+        account = self.broker.account
+        return self.cache.get("account_report", account, lambda: pyRofex.get_account_report(account=account))
 
     
     def cancel_order(self, client_id : str) -> dict:
@@ -239,59 +442,109 @@ class Carrier():
 
     def _order_report_handler(self, message:dict)-> None:
         # print(f"\nMensaje de OrderRouting: {message}")
-        origin = message.get('orderReport').get('originatingUsername')
+        report = message.get('orderReport')
+        self._track_report(report)
+        origin = report.get('originatingUsername')
         # print(origin)
         if origin == "PBCP":
-            text = message['orderReport']['text'].strip()
-            if text != "Operada":
+            text = report['text'].strip()
+            if text != "Operada" and report.get('status') not in TrackedOrder.final_statuses:
                 # print("no esta operado")
-                client_order_id = message['orderReport']['clOrdId']
+                client_order_id = report['clOrdId']
                 pyRofex.cancel_order_via_websocket(client_order_id=client_order_id)
-                self._was_order_complete = False
-            self._was_order_complete = True
+
+    def _track_report(self, report: dict) -> TrackedOrder | None:
+        """
+        Resolve the tracked order of the report, reconcile its reservation in the budget ledger and
+        record how long the first report took since the order was sent.
+        """
+        # The positions and the balance of the account change with its orders
+        account = report.get("accountId", {}).get("id")
+        self.cache.invalidate("account_report", account)
+        self.cache.invalidate("detailed_position", account)
+        tracked_order = self.order_tracker.on_report(report)
+        if tracked_order is None:
+            return None
+        self.broker.ledger.reconcile(tracked_order.ws_client_order_id, tracked_order.filled_size, tracked_order.is_final)
+        if tracked_order.is_final:
+            # Only live orders are returned by the tracker, so every order finishes once
+            self.metrics.inc("pybot_orders_finished_total", ("filled" if tracked_order.is_filled else tracked_order.status.lower(),))
+        if tracked_order.sent_at is not None:
+            self.latency.record("order_report", tracked_order.sent_at)
+            tracked_order.sent_at = None
+        return tracked_order
                 
     def get_detailed_position(self):
-        return pyRofex.get_detailed_position(self.broker.account)
+        account = self.broker.account
+        return self.cache.get("detailed_position", account, lambda: pyRofex.get_detailed_position(account))
 
     def _error_handler(self, message) -> None:
         """
-        Handle errors by printing an error message.
+        Handle errors by logging an error message.
 
         Args:
-        - message: The error message to be printed.
+        - message: The error message to be logged.
 
         """
-        print(f"Mensaje de error: {message}")
+        self.metrics.inc("pybot_websocket_errors_total")
+        log.error("Mensaje de error: %s", message)
 
     def _exception_error(self, message) -> None:
         """
-        Handle exceptions by printing an exception message.
+        Handle exceptions by logging an exception message.
 
         Args:
-        - message: The exception message to be printed.
+        - message: The exception message to be logged.
 
         """
 
-        print(f"Mensaje de excepción: {message}")
+        log.error("Mensaje de excepción: %s", message)
 
     def conect_wb(self) -> None:
         """
-        Establish a WebSocket connection.
+        Establish a WebSocket connection and subscribe to the order reports, which save the legs filled and settle their reservations.
     
         """
+        if self._connections:
+            self.metrics.inc("pybot_websocket_reconnects_total")
+        self._connections += 1
         pyRofex.init_websocket_connection(error_handler=self._error_handler)
+        self.order_report_subscription()
     
 
-    def market_data_subscription(self, instruments_to_subscription, entries, handler, depth=1)-> None:
+    def market_data_subscription(self, instruments_to_subscription, entries, handler, depth=1, conflate=False)-> None:
         """
         Subscribe to market data for specified instruments.
 
         Args:
         - instruments_to_subscription: List of instruments to subscribe to.
+        - entries: The types of market data to subscribe to (bids, offers).
+        - handler: Callable that processes the market data.
+        - depth: Depth of the book to subscribe to.
+        - conflate: If True the websocket thread only stores each message in a conflating inbox, keeping the latest one
+        per instrument, and a drainer thread calls the handler with the list of messages waiting.
 
         """
-        # Define the types of market data to subscribe to (bids, offers)
-
+        if conflate:
+            self.inbox = ConflatingInbox()
+            if self.sequencer is not None:
+                self.sequencer.register(EventType.MARKET_DATA_READY, lambda _: self._drain_inbox())
+                self.sequencer.register(EventType.MARKET_DATA, handler)
+                handler = self._enqueue_market_data
+            else:
+                self._inbox_drainer = InboxDrainer(self.inbox, handler)
+                self._inbox_drainer.start()
+                handler = self.inbox.put
+        elif self.sequencer is not None:
+            self.sequencer.register(EventType.MARKET_DATA, handler)
+            handler = lambda message: self.sequencer.publish(EventType.MARKET_DATA, message)
+
+        handler = self.latency.wrap_receive(handler)
+        handler = self._invalidating_market_data(handler)
+        handler = self._counting_market_data(handler)
+        # The raw message is recorded before anything else touches it
+        if self.recorder is not None:
+            handler = self.recorder.wrap("md", handler)
 
         # Subscribe to market data
         pyRofex.market_data_subscription(
@@ -301,17 +554,103 @@ class Carrier():
             handler=handler
         )
 
+    def _invalidating_market_data(self, handler):
+        """
+        Returns a websocket handler that drops the cached snapshot of the instrument of every message before handing it to the given handler.
+        """
+        def invalidating_handler(message):
+            self.cache.invalidate("market_data", message["instrumentId"]["symbol"])
+            handler(message)
+        return invalidating_handler
+
+    def _counting_market_data(self, handler):
+        """
+        Returns a websocket handler that counts the messages of every instrument before handing them to the given handler.
+        """
+        counters = self.metrics
+        def counting_handler(message):
+            counters.inc("pybot_market_data_messages_total", (message["instrumentId"]["symbol"],))
+            handler(message)
+        return counting_handler
+
+    def _enqueue_market_data(self, message: dict) -> None:
+        # Only the first message of an empty inbox wakes up the sequencer, the rest are conflated
+        if self.inbox.put(message):
+            self.sequencer.publish(EventType.MARKET_DATA_READY)
+
+    def _drain_inbox(self) -> None:
+        messages = self.inbox.drain()
+        if messages:
+            self.sequencer.apply(EventType.MARKET_DATA, messages)
+
+    def replace_handler(self, handler, replacement) -> None:
+        """
+        Route the messages handed to `handler` by the sequencer or the inbox drainer to `replacement`, for example a profiled version of it.
+        """
+        if self.sequencer is not None:
+            self.sequencer.replace(handler, replacement)
+        if self._inbox_drainer is not None and self._inbox_drainer.handler == handler:
+            self._inbox_drainer.handler = replacement
+        self.hub.replace(handler, replacement)
+
+    def inbox_stats(self) -> dict:
+        """
+        Returns the counters of the market data inbox, or an empty dict if the subscription isn't conflated.
+        """
+        if self.inbox is None:
+            return {}
+        return self.inbox.stats()
+
+
+    def _declare_metrics(self) -> None:
+        """
+        Declare the counters incremented by the carrier and the strategy, and the gauges read from the bot when the metrics are scraped.
+        """
+        metrics = self.metrics
+        metrics.counter("pybot_market_data_messages_total", "Market data messages received.", ("instrument",))
+        metrics.counter("pybot_tna_evaluations_total", "TNA computed by the strategy.")
+        metrics.counter("pybot_opportunities_total", "TNA that reached tna_expected.")
+        metrics.counter("pybot_orders_sent_total", "Orders sent to the market.", ("side",))
+        metrics.counter("pybot_orders_finished_total", "Orders that reached a final status.", ("status",))
+        metrics.counter("pybot_websocket_reconnects_total", "Websocket connections opened after the first one.")
+        metrics.counter("pybot_websocket_errors_total", "Errors received through the websocket.")
+        metrics.gauge("pybot_budget_available", "Budget available to trade.", lambda: self.broker.ledger.available)
+        metrics.gauge("pybot_budget_reserved", "Budget reserved by the orders in flight.", lambda: self.broker.ledger.reserved)
+        metrics.gauge("pybot_live_orders", "Orders sent waiting for a final order report.", lambda: len(self.order_tracker))
+        metrics.gauge("pybot_inbox_depth", "Instruments waiting in the market data inbox.", lambda: len(self.inbox) if self.inbox is not None else 0)
+        metrics.gauge("pybot_inbox_conflated_messages", "Market data messages replaced by a newer one of the same instrument.",
+                      lambda: self.inbox.conflated if self.inbox is not None else 0)
+        metrics.gauge("pybot_sequencer_queue_depth", "Events waiting in the sequencer.", lambda: self.sequencer.pending() if self.sequencer is not None else 0)
+        metrics.gauge("pybot_orders_writer_queue_depth", "Orders filled waiting to be saved.", lambda: self.orders_writer.stats()["waiting"])
+        metrics.summary("pybot_stage_latency_seconds", "Latency of every stage of the tick to trade path.", self._latency_quantiles, ("stage",))
+
+    def _latency_quantiles(self) -> dict:
+        quantiles = {}
+        for stage, histogram in self.latency.histograms.items():
+            histogram = histogram.snapshot()
+            quantiles[(stage,)] = (
+                {quantile: histogram.percentile(quantile * 100) / 1e9 for quantile in (0.5, 0.99, 0.999)},
+                histogram.count,
+                histogram.total / 1e9,
+            )
+        return quantiles
 
     def order_report_subscription(self)-> None:
         """
         Subscribe to order reports.
 
         """
+        handler = self._order_report_handler
+        if self.sequencer is not None:
+            handler = lambda message: self.sequencer.publish(EventType.ORDER_REPORT, message)
+        if self.recorder is not None:
+            handler = self.recorder.wrap("or", handler)
+
         # Subscribe to order reports
         pyRofex.order_report_subscription(
             self.broker.credentials.get("account"),
             snapshot=True,
-            handler=self._order_report_handler
+            handler=handler
         )
 
 
@@ -323,6 +662,21 @@ class Carrier():
         # Close the WebSocket connection
         pyRofex.close_websocket_connection()
 
+        if self._inbox_drainer is not None:
+            self._inbox_drainer.stop()
+            self._inbox_drainer = None
+
+        if self.recorder is not None:
+            self.recorder.close()
+
+        if self.snapshots is not None:
+            self.snapshots.close()
+            self.snapshots = None
+        self.cache = SnapshotCache()
+
+        # Every fill received before disconnecting is saved
+        self.orders_writer.close()
+
 
 
 
@@ -0,0 +1,115 @@
+import threading
+from event_log import log
+
+
+class ConflatingInbox:
+    """
+    Inbox that keeps only the latest market data message of every instrument.
+
+    The websocket thread puts messages and returns right away, the strategy drains
+    the inbox whenever it is free and always works with the freshest state. A message
+    that arrives for an instrument that is still waiting in the inbox replaces it.
+
+    Attributes:
+    - received (int): Messages put in the inbox.
+    - conflated (int): Messages replaced by a newer one before being drained.
+    - max_depth (int): Maximum number of instruments waiting in the inbox at the same time.
+    """
+
+    def __init__(self) -> None:
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._has_messages = threading.Event()
+        self.received = 0
+        self.conflated = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def put(self, message: dict) -> bool:
+        """
+        Store the message, replacing the one waiting for the same symbol and clearing.
+
+        Args:
+        - message: Market data message as received from pyRofex.
+
+        Returns:
+        - bool: True if the inbox was empty before the message, meaning the consumer has to be woken up.
+        """
+        key = message["instrumentId"]["symbol"]
+        with self._lock:
+            was_empty = not self._latest
+            self.received += 1
+            if key in self._latest:
+                self.conflated += 1
+            self._latest[key] = message
+            depth = len(self._latest)
+            if depth > self.max_depth:
+                self.max_depth = depth
+        self._has_messages.set()
+        return was_empty
+
+    def drain(self) -> list:
+        """
+        Take every message waiting in the inbox, in the order their instruments arrived.
+        """
+        with self._lock:
+            latest = self._latest
+            self._latest = {}
+            self._has_messages.clear()
+        return list(latest.values())
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Block until there is at least one message in the inbox or the timeout expires.
+        """
+        return self._has_messages.wait(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "conflated": self.conflated,
+            "max_depth": self.max_depth,
+            "depth": len(self._latest),
+        }
+
+
+class InboxDrainer:
+    """
+    Thread that drains a ConflatingInbox and hands every batch to a handler.
+
+    Args:
+    - inbox: The inbox to drain.
+    - handler: Callable that receives the list of messages drained, for example `StrategyArbitrationOfClearing.handle_batch_of_messages`.
+    - poll_interval: Seconds to wait for messages before checking if the drainer was stopped.
+    """
+
+    def __init__(self, inbox: ConflatingInbox, handler, poll_interval: float = 0.5) -> None:
+        self.inbox = inbox
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self._running = False
+        self._thread = None
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._drain_loop, name="inbox-drainer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _drain_loop(self) -> None:
+        while self._running:
+            if not self.inbox.wait(self.poll_interval):
+                continue
+            messages = self.inbox.drain()
+            if messages:
+                try:
+                    self.handler(messages)
+                except Exception as e:
+                    log.error("Mensaje de excepción: %s", e)
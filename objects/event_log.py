@@ -0,0 +1,140 @@
+import itertools
+import threading
+from datetime import datetime
+import time
+
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+class EventLog:
+    """
+    Level gated log of the bot, kept in a ring buffer in memory and written to a file by a background thread.
+
+    Logging a message below `level` is a single comparison. Above it, the message and its
+    arguments are stored as they are in the next slot of the ring, the formatting with `%`
+    only happens when the flusher writes them or someone asks for the last events, so the
+    websocket and sequencer threads never wait for the terminal or the disk.
+
+    Slots are claimed with an `itertools.count`, which is atomic, and written with a single
+    assignment, so logging takes no lock. When the flusher falls more than `capacity` events
+    behind, the oldest ones are overwritten and counted as dropped.
+
+    Args:
+    - capacity: Number of events kept in memory.
+    - level: Minimum level of the events kept.
+    """
+
+    def __init__(self, capacity: int = 4096, level: int = INFO) -> None:
+        self.capacity = capacity
+        self.level = level
+        self._ring = [None] * capacity
+        self._sequence = itertools.count()
+        self._flushed = 0
+        self.dropped = 0
+        self._file = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._flush_lock = threading.Lock()
+
+    def enabled_for(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, message: str, *args) -> None:
+        if level < self.level:
+            return
+        sequence = next(self._sequence)
+        self._ring[sequence % self.capacity] = (sequence, time.time(), level, message, args)
+        if level >= ERROR and self._thread is not None:
+            self._wake.set()
+
+    def debug(self, message: str, *args) -> None:
+        self.log(DEBUG, message, *args)
+
+    def info(self, message: str, *args) -> None:
+        self.log(INFO, message, *args)
+
+    def warning(self, message: str, *args) -> None:
+        self.log(WARNING, message, *args)
+
+    def error(self, message: str, *args) -> None:
+        self.log(ERROR, message, *args)
+
+    def tail(self, count: int) -> list:
+        """
+        Returns the last `count` events kept in memory, formatted and oldest first.
+        """
+        records = sorted(record for record in list(self._ring) if record is not None)
+        return [self.format(record) for record in records[-count:]] if count > 0 else []
+
+    @staticmethod
+    def format(record: tuple) -> str:
+        _, created, level, message, args = record
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message} {args!r}"
+        return f"{datetime.fromtimestamp(created):%H:%M:%S.%f} {LEVEL_NAMES.get(level, level)} {message}"
+
+    def open(self, path: str, flush_interval: float = 0.5) -> None:
+        """
+        Start writing the events to the end of the file every `flush_interval` seconds, errors are written right away.
+        """
+        self.close()
+        self._file = open(path, "a", encoding="utf-8")
+        self._stopping = False
+        self._thread = threading.Thread(target=self._flush_loop, args=(flush_interval,), name="event-log", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Write the events left and close the file.
+        """
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        self._file = None
+
+    def flush(self) -> int:
+        """
+        Write the events logged since the last flush, returns how many were written.
+        """
+        with self._flush_lock:
+            lines = []
+            while True:
+                record = self._ring[self._flushed % self.capacity]
+                # The slot is empty or still keeps an event of the previous lap
+                if record is None or record[0] < self._flushed:
+                    break
+                if record[0] > self._flushed:
+                    # Overwritten before it was written, skip to the oldest event kept
+                    self.dropped += record[0] - self.capacity + 1 - self._flushed
+                    self._flushed = record[0] - self.capacity + 1
+                    continue
+                lines.append(self.format(record))
+                self._flushed += 1
+            if lines and self._file is not None:
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+            return len(lines)
+
+    def stats(self) -> dict:
+        return {"level": LEVEL_NAMES.get(self.level, self.level), "flushed": self._flushed, "dropped": self.dropped}
+
+    def _flush_loop(self, flush_interval: float) -> None:
+        while not self._stopping:
+            self._wake.wait(flush_interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+
+# Log shared by the modules of the bot, run.py opens its file
+log = EventLog()
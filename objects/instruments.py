@@ -0,0 +1,154 @@
+import sys
+
+
+class Instrument:
+    """
+    Instrument of the market, as identified by pyRofex.
+
+    Attributes:
+    - id (int): Small integer that identifies the instrument in the registry.
+    - symbol (str): Full pyRofex symbol, for example 'MERV - XMEV - ALUA - CI'. It's also the ticker sent in the orders.
+    - ticker (str): Interned simple ticker, for example 'ALUA'.
+    - clearing (str): Interned settlement term, for example 'CI' or '48hs'.
+    - entry (str): Market data entry read by the decoder, 'OF' (offers) or 'BI' (bids), None if no entry is read.
+    """
+
+    __slots__ = ("id", "symbol", "ticker", "clearing", "entry")
+
+    def __init__(self, id: int, symbol: str, ticker: str, clearing: str, entry: str | None) -> None:
+        self.id = id
+        self.symbol = symbol
+        self.ticker = ticker
+        self.clearing = clearing
+        self.entry = entry
+
+    def __repr__(self) -> str:
+        return f"Instrument({self.id}, {self.symbol!r})"
+
+
+class InstrumentRegistry:
+    """
+    Registry of the instruments traded, built once at subscription time.
+
+    Formatting the pyRofex symbols and splitting them back into ticker and clearing is
+    done only when an instrument is registered, after that the strategy, the carrier
+    and the orders table work with dictionary lookups.
+
+    Args:
+    - prefix: Market and exchange that precede the ticker in the pyRofex symbol.
+    - entries_by_clearing: Market data entry the decoder reads for each clearing.
+    """
+
+    def __init__(self, prefix: str = "MERV - XMEV", entries_by_clearing: dict = None) -> None:
+        self.prefix = prefix
+        self.entries_by_clearing = entries_by_clearing or {"CI": "OF", "48hs": "BI"}
+        self.instruments = []
+        self._by_symbol = {}
+        self._by_ticker = {}
+
+    def __len__(self) -> int:
+        return len(self.instruments)
+
+    def register(self, ticker: str, clearing: str) -> Instrument:
+        """
+        Register the instrument of the ticker in the given clearing, returns the existing one if it was registered before.
+        """
+        instrument = self._by_ticker.get((ticker, clearing))
+        if instrument is None:
+            symbol = sys.intern(f"{self.prefix} - {ticker} - {clearing}")
+            instrument = self._add(symbol, sys.intern(ticker), sys.intern(clearing))
+        return instrument
+
+    def register_tickers(self, tickers: list, clearings: list) -> list:
+        """
+        Register every ticker in every clearing.
+
+        Returns:
+        - list: The pyRofex symbols, grouped by clearing in the order of `clearings`.
+        """
+        return [self.register(ticker, clearing).symbol for clearing in clearings for ticker in tickers]
+
+    def get(self, symbol: str) -> Instrument:
+        """
+        Returns the instrument of the pyRofex symbol, registering it if it wasn't registered before.
+        """
+        instrument = self._by_symbol.get(symbol)
+        if instrument is None:
+            ticker, clearing = symbol.split(' - ')[-2:]
+            instrument = self._add(sys.intern(symbol), sys.intern(ticker), sys.intern(clearing))
+        return instrument
+
+    def order_ticker(self, ticker: str, clearing: str) -> str:
+        """
+        Returns the pyRofex symbol used to send orders of the ticker in the given clearing.
+        """
+        return self.register(ticker, clearing).symbol
+
+    def decode(self, message: dict) -> tuple:
+        """
+        Extract the top of the book read by the strategy from a market data message.
+
+        Returns:
+        - tuple: The instrument, the price and the size of the first level of its entry.
+        The price is None and the size is 0 when the level is missing.
+        """
+        decoded = message.get("_decoded")
+        if decoded is not None:
+            return decoded[0]
+        instrument = self._by_symbol.get(message["instrumentId"]["symbol"])
+        if instrument is None:
+            instrument = self.get(message["instrumentId"]["symbol"])
+
+        entry = instrument.entry
+        if entry is not None:
+            market_data = message.get("marketData")
+            if market_data:
+                levels = market_data.get(entry)
+                if levels:
+                    level = levels[0]
+                    return instrument, level.get("price"), level.get("size") or 0
+        return instrument, None, 0
+
+    def decode_levels(self, message: dict) -> tuple:
+        """
+        Extract every level of the entry read by the strategy from a market data message.
+
+        Returns:
+        - tuple: The instrument and a list with the (price, size) of its levels, best first.
+        Levels without price or size are skipped.
+        """
+        decoded = message.get("_decoded")
+        if decoded is not None:
+            return decoded[1]
+        instrument = self._by_symbol.get(message["instrumentId"]["symbol"])
+        if instrument is None:
+            instrument = self.get(message["instrumentId"]["symbol"])
+
+        levels = []
+        market_data = message.get("marketData")
+        if instrument.entry is not None and market_data:
+            for level in market_data.get(instrument.entry) or ():
+                price, size = level.get("price"), level.get("size")
+                if price is not None and size:
+                    levels.append((price, size))
+        return instrument, levels
+
+    def decode_once(self, message: dict) -> Instrument:
+        """
+        Decode the top of the book and the levels of the message and keep them in it, so `decode`
+        and `decode_levels` return them without reading the message again.
+
+        Returns:
+        - Instrument: The instrument of the message.
+        """
+        decoded = message.get("_decoded")
+        if decoded is None:
+            decoded = message["_decoded"] = (self.decode(message), self.decode_levels(message))
+        return decoded[0][0]
+
+    def _add(self, symbol: str, ticker: str, clearing: str) -> Instrument:
+        instrument = Instrument(len(self.instruments), symbol, ticker, clearing, self.entries_by_clearing.get(clearing))
+        self.instruments.append(instrument)
+        self._by_symbol[symbol] = instrument
+        self._by_ticker[(ticker, clearing)] = instrument
+        return instrument
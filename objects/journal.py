@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import numpy as np
+
+
+def _to_json(value):
+    # NumPy scalars come from the vectorized paths of the strategy
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrderJournal:
+    """
+    Write-ahead journal of the orders saved, one JSON object per line.
+
+    Appending only adds the line to a pending list. A committer thread takes the pending lines,
+    writes and fsyncs them every `commit_interval` seconds when something was appended, so the
+    orders saved in the same interval share one fsync. The file has its own lock, the caller
+    never waits for the disk, not even while a commit is running.
+
+    Args:
+    - path: File of the journal, the orders already in it are kept.
+    - commit_interval: Seconds between group commits.
+    """
+
+    def __init__(self, path: str, commit_interval: float = 0.05) -> None:
+        self.path = path
+        self.commit_interval = commit_interval
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            # The last line was cut by a crash, the next order must start in its own line
+            self._file.write("\n")
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._pending = []
+        self._closed = threading.Event()
+        self.commits = 0
+        self._committer = threading.Thread(target=self._commit_loop, name="journal-committer", daemon=True)
+        self._committer.start()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def append(self, row: dict) -> None:
+        line = json.dumps(row, separators=(",", ":"), default=_to_json)
+        with self._lock:
+            self._pending.append(line)
+
+    def commit(self) -> None:
+        """
+        Write the appended orders and fsync the file.
+        """
+        # The file lock is taken first, so the batches of two commits are written in the order they were appended
+        with self._file_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending or self._file.closed:
+                return
+            self._file.write("\n".join(pending))
+            self._file.write("\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.commits += 1
+
+    def rows(self):
+        """
+        Yields the orders of the journal, in the order they were saved.
+
+        A last line cut by a crash is skipped.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def close(self) -> None:
+        self._closed.set()
+        self._committer.join()
+        self.commit()
+        with self._file_lock:
+            self._file.close()
+
+    def _commit_loop(self) -> None:
+        while not self._closed.wait(self.commit_interval):
+            self.commit()
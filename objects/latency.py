@@ -0,0 +1,176 @@
+import copy
+import math
+import threading
+import time
+
+
+class LatencyHistogram:
+    """
+    HDR style histogram of latencies in nanoseconds.
+
+    Values are stored in log-linear buckets: every power of two is split in `2 ** precision_bits`
+    sub buckets, so recording is a couple of integer operations and the relative error of the
+    percentiles is below 2 ** -(precision_bits - 1).
+
+    Some stages are recorded by several threads at once (the sends of the AsyncCarrier executor
+    and of the websocket thread), so recording and reading take the lock of the histogram.
+
+    Args:
+    - precision_bits: Bits of precision kept of each value.
+    - max_bits: Values up to 2 ** max_bits nanoseconds are recorded, bigger values are clamped.
+    """
+
+    def __init__(self, precision_bits: int = 6, max_bits: int = 40) -> None:
+        self.precision_bits = precision_bits
+        self.max_value = (1 << max_bits) - 1
+        self.counts = [0] * ((max_bits + 1) << precision_bits)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def _index(self, value: int) -> int:
+        exponent = value.bit_length() - self.precision_bits
+        if exponent <= 0:
+            return value
+        return (exponent << self.precision_bits) | (value >> exponent)
+
+    def _value_at(self, index: int) -> int:
+        exponent = index >> self.precision_bits
+        if exponent == 0:
+            return index
+        mantissa = index & ((1 << self.precision_bits) - 1)
+        return ((mantissa << exponent) + ((mantissa + 1) << exponent) - 1) // 2
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        elif value > self.max_value:
+            value = self.max_value
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> "LatencyHistogram":
+        """
+        Returns a consistent copy of the histogram, its counts agree with its total and percentiles.
+        """
+        with self._lock:
+            histogram = copy.copy(self)
+            histogram.counts = list(self.counts)
+        histogram._lock = threading.Lock()
+        return histogram
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Returns the value below which the given percentage of the recorded values fall.
+        """
+        with self._lock:
+            counts, total_count, maximum = list(self.counts), self.count, self.max
+        if total_count == 0:
+            return 0
+        target = max(math.ceil(percentile / 100 * total_count), 1)
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self._value_at(index), maximum)
+        return maximum
+
+    def summary(self) -> dict:
+        """
+        Returns the count and the main percentiles in microseconds.
+        """
+        histogram = self.snapshot()
+        return {
+            "count": histogram.count,
+            "mean_us": histogram.total / histogram.count / 1e3 if histogram.count else 0.0,
+            "min_us": (histogram.min or 0) / 1e3,
+            "p50_us": histogram.percentile(50) / 1e3,
+            "p99_us": histogram.percentile(99) / 1e3,
+            "p999_us": histogram.percentile(99.9) / 1e3,
+            "max_us": histogram.max / 1e3,
+        }
+
+
+class LatencyTracker:
+    """
+    Per stage latency histograms of the tick to trade path.
+
+    Stages are timed with the monotonic clock: each call to `record` adds the time elapsed since
+    the given start to the histogram of the stage and returns the current time, so consecutive
+    stages can be chained.
+
+    Stages recorded by the bot:
+    - exchange: From the exchange `timestamp` of the Md message to its receive (wall clock, includes clock skew).
+    - queue: From the websocket receive to the start of the strategy handler.
+    - decode: manipulate_data.
+    - book_update: Update of the quote book.
+    - tna: TNA computed.
+    - order_legs: Order legs built by `_format_order`.
+    - send: `send_order_via_websocket` returned.
+    - order_report: From an order sent to its first order report.
+    """
+
+    stages = ("exchange", "queue", "decode", "book_update", "tna", "order_legs", "send", "order_report")
+
+    def __init__(self) -> None:
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages}
+
+    @staticmethod
+    def now() -> int:
+        return time.perf_counter_ns()
+
+    def record(self, stage: str, start: int) -> int:
+        now = time.perf_counter_ns()
+        self.histograms[stage].record(now - start)
+        return now
+
+    def stamp(self, message: dict) -> None:
+        """
+        Stamp a market data message with its receive time and record how long it took since the exchange sent it.
+        """
+        message["_received_ns"] = time.perf_counter_ns()
+        exchange_timestamp = message.get("timestamp")
+        if exchange_timestamp:
+            self.histograms["exchange"].record(time.time_ns() - exchange_timestamp * 1_000_000)
+
+    def wrap_receive(self, handler):
+        """
+        Returns a websocket handler that stamps every message before handing it to the given handler.
+        """
+        def stamping_handler(message):
+            self.stamp(message)
+            handler(message)
+        return stamping_handler
+
+    def start(self, message: dict) -> int:
+        """
+        Record the time the message waited since it was received and return the current time.
+        """
+        received = message.get("_received_ns")
+        if received is None:
+            return time.perf_counter_ns()
+        return self.record("queue", received)
+
+    def summary(self) -> dict:
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def report(self) -> str:
+        """
+        Returns a table with the percentiles of every stage, in microseconds.
+        """
+        lines = [f"{'stage':<14}{'count':>10}{'p50':>12}{'p99':>12}{'p99.9':>12}{'max':>12}"]
+        for stage, summary in self.summary().items():
+            lines.append(
+                f"{stage:<14}{summary['count']:>10}{summary['p50_us']:>12.1f}{summary['p99_us']:>12.1f}"
+                f"{summary['p999_us']:>12.1f}{summary['max_us']:>12.1f}"
+            )
+        return "\n".join(lines)
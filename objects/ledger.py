@@ -0,0 +1,199 @@
+import copy
+import multiprocessing
+import threading
+
+
+AVAILABLE, RESERVED, SPENT, CREDITED = range(4)
+
+
+class Reservation:
+    """
+    Capital tied to an order of the ledger.
+
+    Attributes:
+    - side (str): 'buy' reserves capital, 'sell' credits its fills.
+    - unit_cents (int): Price with costs of each unit, in cents.
+    - size (int): Units of the order.
+    - settled (int): Units already filled and settled.
+    """
+
+    __slots__ = ("side", "unit_cents", "size", "settled")
+
+    def __init__(self, side: str, unit_cents: int, size: int) -> None:
+        self.side = side
+        self.unit_cents = unit_cents
+        self.size = size
+        self.settled = 0
+
+
+class BudgetLedger:
+    """
+    Budget of the broker with reservations tied to client order ids.
+
+    A buy reserves its cost before it is sent, so orders of several symbols sent at the same
+    time never commit more capital than there is. The fills reported commit the reservation,
+    what is left of it is released back when the order ends, and the fills of a sell credit
+    the budget.
+
+    Amounts are kept in integer cents. The lock only guards the check and update of those
+    integers, it's never held while an order is sent or a report awaited, so reservations
+    of different symbols don't serialize on each other.
+
+    Args:
+    - budget: Capital available to trade.
+    - counters: Optional sequence of four integers where the available, reserved, spent and credited cents are kept.
+    - lock: Optional lock that guards the counters.
+    """
+
+    def __init__(self, budget: float, counters=None, lock=None) -> None:
+        self._counters = counters if counters is not None else [0, 0, 0, 0]
+        self._counters[AVAILABLE] = self._to_cents(budget)
+        self._reservations = {}
+        self._lock = lock if lock is not None else threading.Lock()
+
+    @staticmethod
+    def _to_cents(amount: float) -> int:
+        return round(amount * 100)
+
+    @property
+    def available(self) -> float:
+        return self._counters[AVAILABLE] / 100
+
+    @available.setter
+    def available(self, value: float) -> None:
+        with self._lock:
+            self._counters[AVAILABLE] = self._to_cents(value)
+
+    @property
+    def reserved(self) -> float:
+        return self._counters[RESERVED] / 100
+
+    def reserve(self, order_id: str, unit_price: float, size: int, side: str = "buy") -> int:
+        """
+        Reserve the cost of up to `size` units of a buy, as many as the available budget affords.
+
+        A sell reserves nothing, it's only registered so its fills are credited.
+
+        Returns:
+        - int: The units reserved, 0 if the budget doesn't afford a single unit.
+        """
+        unit_cents = self._to_cents(unit_price)
+        if side == "buy":
+            counters = self._counters
+            with self._lock:
+                size = min(size, counters[AVAILABLE] // unit_cents) if unit_cents > 0 else size
+                if size <= 0:
+                    return 0
+                counters[AVAILABLE] -= unit_cents * size
+                self._add_reserved(unit_cents * size)
+        self._reservations[order_id] = Reservation(side, unit_cents, size)
+        return size
+
+    def commit(self, order_id: str, filled_size: int) -> None:
+        """
+        Settle the fills of the order, `filled_size` is the cumulative size filled.
+
+        The cost of the units of a buy moves from reserved to spent, the proceeds of the units of a sell are credited.
+        """
+        with self._lock:
+            reservation = self._reservations.get(order_id)
+            if reservation is None:
+                return
+            units = min(filled_size, reservation.size) - reservation.settled
+            if units <= 0:
+                return
+            reservation.settled += units
+            amount = units * reservation.unit_cents
+            if reservation.side == "buy":
+                self._add_reserved(-amount)
+                self._counters[SPENT] += amount
+            else:
+                self._counters[AVAILABLE] += amount
+                self._counters[CREDITED] += amount
+
+    def release(self, order_id: str) -> float:
+        """
+        End the order, crediting back what is left of its reservation.
+
+        Returns:
+        - float: The amount released.
+        """
+        with self._lock:
+            reservation = self._reservations.pop(order_id, None)
+            if reservation is None or reservation.side != "buy":
+                return 0.0
+            amount = (reservation.size - reservation.settled) * reservation.unit_cents
+            self._add_reserved(-amount)
+            self._counters[AVAILABLE] += amount
+        return amount / 100
+
+    def reconcile(self, order_id: str, filled_size: int, final: bool) -> None:
+        """
+        Apply the state of an order report: commit its fills and, if its status is final, release the rest.
+        """
+        self.commit(order_id, filled_size)
+        if final:
+            self.release(order_id)
+
+    def _add_reserved(self, cents: int) -> None:
+        # Called with the lock held
+        self._counters[RESERVED] += cents
+
+    def stats(self) -> dict:
+        return {
+            "available": self._counters[AVAILABLE] / 100,
+            "reserved": self._counters[RESERVED] / 100,
+            "spent": self._counters[SPENT] / 100,
+            "credited": self._counters[CREDITED] / 100,
+            "open_orders": len(self._reservations),
+        }
+
+
+class SharedBudgetLedger(BudgetLedger):
+    """
+    Budget ledger whose counters live in shared memory, so worker processes trade from the same capital.
+
+    It has to be passed to the worker processes when they are started, each one gets its view with
+    `for_shard`. Each process keeps the reservations of its own orders, only the counters and their
+    lock are shared. The cents reserved by each shard are counted apart too, so the reservations of
+    a shard that dies can be released with `release_shard`.
+
+    Args:
+    - budget: Capital available to trade.
+    - context: multiprocessing context the workers are started with.
+    - shards: Number of shards that trade from the ledger.
+    """
+
+    def __init__(self, budget: float, context=multiprocessing, shards: int = 1) -> None:
+        super().__init__(budget, context.RawArray("q", 4), context.Lock())
+        self._shard_reserved = context.RawArray("q", shards)
+        self.shard = 0
+
+    def for_shard(self, shard: int) -> "SharedBudgetLedger":
+        """
+        Returns the view of the ledger used by the shard, it shares the counters and keeps its own reservations.
+        """
+        ledger = copy.copy(self)
+        ledger.shard = shard
+        ledger._reservations = {}
+        return ledger
+
+    def release_shard(self, shard: int) -> float:
+        """
+        Credit back what the shard still has reserved, meant for a shard that died: nobody else settles its orders.
+
+        Fills of the shard that were never reported are released too, their capital has to be checked with the broker.
+
+        Returns:
+        - float: The amount released.
+        """
+        with self._lock:
+            amount = self._shard_reserved[shard]
+            self._shard_reserved[shard] = 0
+            self._counters[RESERVED] -= amount
+            self._counters[AVAILABLE] += amount
+        return amount / 100
+
+    def _add_reserved(self, cents: int) -> None:
+        self._counters[RESERVED] += cents
+        self._shard_reserved[self.shard] += cents
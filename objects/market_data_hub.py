@@ -0,0 +1,116 @@
+class Subscriber:
+    """
+    Strategy handler registered in the MarketDataHub.
+
+    Attributes:
+    - handler: Callable that receives the messages of the instruments of the subscriber.
+    - batch (bool): If True the handler receives a list of messages, otherwise one message per call.
+    - symbols (list): pyRofex symbols the subscriber watches, they are its filter.
+    - seed: Optional callable that fills the book of the subscriber from a REST snapshot of its symbols.
+    """
+
+    __slots__ = ("handler", "batch", "symbols", "seed")
+
+    def __init__(self, handler, batch: bool, symbols: list, seed=None) -> None:
+        self.handler = handler
+        self.batch = batch
+        self.symbols = symbols
+        self.seed = seed
+
+
+class MarketDataHub:
+    """
+    Shares one market data subscription between every strategy of the carrier.
+
+    Strategies register the instruments they watch and their handler, the carrier subscribes
+    once to the union of them. Every message is decoded once by the instrument registry, the
+    strategies read the decoded top of the book and levels from it, and is only handed to the
+    subscribers that watch its instrument: the routes are indexed by instrument id, so a
+    message costs the same no matter how many strategies watch other instruments.
+
+    Args:
+    - instruments: InstrumentRegistry of the carrier.
+    """
+
+    def __init__(self, instruments) -> None:
+        self.instruments = instruments
+        self.subscribers = []
+        self.entries = []
+        self.depth = 1
+        self.conflate = True
+        self._routes = {}
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    def register(self, symbols: list, entries: list, handler, depth: int = 1, conflate: bool = False, seed=None) -> Subscriber:
+        """
+        Register a handler for the messages of the given instruments.
+
+        Args:
+        - symbols: pyRofex symbols watched.
+        - entries: Market data entries the handler reads.
+        - handler: Callable that processes the messages.
+        - depth: Depth of the book the handler reads.
+        - conflate: If True the handler receives the list of messages of a batch, keeping only the latest one per instrument.
+        The subscription is only conflated if every subscriber asks for it.
+        - seed: Optional callable that receives the REST snapshot of the symbols, keyed by symbol, before the subscription.
+        """
+        subscriber = Subscriber(handler, conflate, list(symbols), seed)
+        self.subscribers.append(subscriber)
+        self.entries.extend(entry for entry in entries if entry not in self.entries)
+        self.depth = max(self.depth, depth)
+        self.conflate = self.conflate and conflate
+        for symbol in subscriber.symbols:
+            instrument = self.instruments.get(symbol)
+            self._routes[instrument.id] = self._routes.get(instrument.id, ()) + (subscriber,)
+        return subscriber
+
+    def symbols(self) -> list:
+        """
+        Returns the union of the symbols of the subscribers, in the order they were registered.
+        """
+        return list(dict.fromkeys(symbol for subscriber in self.subscribers for symbol in subscriber.symbols))
+
+    def seed(self, snapshot: dict) -> None:
+        """
+        Hand every subscriber with a seed the responses of its symbols in the snapshot.
+        """
+        for subscriber in self.subscribers:
+            if subscriber.seed is not None:
+                subscriber.seed({symbol: snapshot[symbol] for symbol in subscriber.symbols if symbol in snapshot})
+
+    def replace(self, handler, replacement) -> None:
+        """
+        Hand the messages of the subscribers with `handler` to `replacement`.
+        """
+        for subscriber in self.subscribers:
+            if subscriber.handler == handler:
+                subscriber.handler = replacement
+
+    def handle(self, message: dict) -> None:
+        """
+        Decode a message and hand it to the subscribers of its instrument.
+        """
+        instrument = self.instruments.decode_once(message)
+        for subscriber in self._routes.get(instrument.id, ()):
+            subscriber.handler([message] if subscriber.batch else message)
+
+    def handle_batch(self, messages: list) -> None:
+        """
+        Decode a batch of messages and hand every subscriber the ones of its instruments, in a single call if it takes batches.
+        """
+        routes = self._routes
+        batches = {}
+        for message in messages:
+            instrument = self.instruments.decode_once(message)
+            for subscriber in routes.get(instrument.id, ()):
+                if subscriber.batch:
+                    batch = batches.get(subscriber)
+                    if batch is None:
+                        batch = batches[subscriber] = []
+                    batch.append(message)
+                else:
+                    subscriber.handler(message)
+        for subscriber, batch in batches.items():
+            subscriber.handler(batch)
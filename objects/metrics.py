@@ -0,0 +1,169 @@
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+
+class Metrics:
+    """
+    Counters and gauges of the bot, exposed in the Prometheus text format.
+
+    Counters are incremented by the handlers under a lock, since some of them have several
+    writer threads (the orders sent by the executor threads of the AsyncCarrier), and a scrape
+    only reads them. Gauges
+    are callables evaluated when the metrics are rendered, so they read the state of the
+    bot (budget, inbox depth, latency histograms) without the handlers doing anything.
+
+    Names follow the Prometheus conventions, labels are given as a tuple of values in the
+    order of the label names declared with `counter`.
+    """
+
+    def __init__(self) -> None:
+        self._counters = defaultdict(int)
+        self._counter_labels = {}
+        self._gauges = {}
+        self._summaries = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> None:
+        """
+        Declare a counter, so it is exposed with its help even before it is incremented.
+        """
+        self._counter_labels[name] = labels
+        self._help[name] = help
+
+    def inc(self, name: str, labels: tuple = (), value: int = 1) -> None:
+        with self._lock:
+            self._counters[(name, labels)] += value
+
+    def value(self, name: str, labels: tuple = ()) -> int:
+        return self._counters.get((name, labels), 0)
+
+    def gauge(self, name: str, help: str, function, labels: tuple = ()) -> None:
+        """
+        Declare a gauge whose value is `function()` when it is scraped.
+
+        With labels the function has to return a dict from the tuple of label values to the value.
+        """
+        self._gauges[name] = (function, labels)
+        self._help[name] = help
+
+    def summary(self, name: str, help: str, function, labels: tuple = ()) -> None:
+        """
+        Declare a summary, `function()` returns a dict from the tuple of label values to a
+        (quantiles, count, sum) tuple, where quantiles maps each quantile to its value.
+        """
+        self._summaries[name] = (function, labels)
+        self._help[name] = help
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        counters = defaultdict(list)
+        # Copied first, a handler may add a new label while the scrape iterates
+        with self._lock:
+            values = list(self._counters.items())
+        for (name, labels), value in values:
+            counters[name].append((labels, value))
+        for name in sorted(set(counters) | set(self._counter_labels)):
+            self._header(lines, name, "counter")
+            label_names = self._counter_labels.get(name, ())
+            for labels, value in sorted(counters.get(name, [])):
+                lines.append(f"{name}{self._labels(label_names, labels)} {value}")
+
+        for name, (function, label_names) in self._gauges.items():
+            self._header(lines, name, "gauge")
+            values = self._evaluate(function)
+            if not label_names:
+                values = {(): values} if values is not None else {}
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{self._labels(label_names, labels)} {value}")
+
+        for name, (function, label_names) in self._summaries.items():
+            self._header(lines, name, "summary")
+            for labels, (quantiles, count, total) in sorted((self._evaluate(function) or {}).items()):
+                for quantile, value in quantiles.items():
+                    lines.append(f"{name}{self._labels(label_names + ('quantile',), labels + (quantile,))} {value}")
+                lines.append(f"{name}_count{self._labels(label_names, labels)} {count}")
+                lines.append(f"{name}_sum{self._labels(label_names, labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: list, name: str, kind: str) -> None:
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    @staticmethod
+    def _evaluate(function):
+        # A gauge that fails is left out, the scrape goes on
+        try:
+            return function()
+        except Exception:
+            return None
+
+    @staticmethod
+    def _labels(names: tuple, values: tuple) -> str:
+        if not names:
+            return ""
+        pairs = ",".join(f'{name}="{Metrics._escape(value)}"' for name, value in zip(names, values))
+        return "{" + pairs + "}"
+
+    @staticmethod
+    def _escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """
+    HTTP server of the metrics, it answers `GET /metrics` from its own thread.
+
+    A scrape only reads the counters and evaluates the gauges, it never goes through the
+    sequencer, so it can't block the strategy. It's bound to localhost by default.
+
+    Args:
+    - metrics: Metrics served.
+    - host: Address the server is bound to.
+    - port: Port of the server, 0 picks a free one.
+    """
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = 9108) -> None:
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self) -> None:
+        metrics = self.metrics
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+import itertools
+import threading
+import time
+
+
+class TrackedOrder:
+    """
+    Order sent by the carrier and the state reported by the market.
+
+    Attributes:
+    - ws_client_order_id (str): Id given by the carrier when the order was sent through the websocket.
+    - client_order_id (str): `clOrdId` given by the market, known after the first order report.
+    - ticker, side, size, price: The order sent.
+    - status (str): Last status reported, for example NEW, PARTIALLY_FILLED or FILLED.
+    - filled_size (int): Size filled so far (`cumQty`).
+    - average_price (float): Average price of the fills (`avgPx`).
+    - future (Future): Resolved with the order itself when a final report arrives.
+    - sent_at (int): Monotonic time in nanoseconds when the order was sent.
+    """
+
+    __slots__ = ("ws_client_order_id", "client_order_id", "ticker", "side", "size", "price", "status",
+                 "text", "filled_size", "average_price", "future", "sent_at")
+
+    filled_statuses = ("FILLED",)
+    final_statuses = ("FILLED", "REJECTED", "CANCELLED", "EXPIRED")
+
+    def __init__(self, ws_client_order_id: str, ticker: str = None, side=None, size: int = 0, price: float = None) -> None:
+        self.ws_client_order_id = ws_client_order_id
+        self.client_order_id = None
+        self.ticker = ticker
+        self.side = side
+        self.size = size
+        self.price = price
+        self.status = None
+        self.text = ""
+        self.filled_size = 0
+        self.average_price = None
+        self.future = Future()
+        self.sent_at = None
+
+    @property
+    def is_filled(self) -> bool:
+        return self.status in self.filled_statuses or self.text == "Operada"
+
+    @property
+    def is_final(self) -> bool:
+        return self.is_filled or self.status in self.final_statuses
+
+    def __repr__(self) -> str:
+        return f"TrackedOrder({self.ws_client_order_id!r}, {self.ticker!r}, status={self.status!r}, filled_size={self.filled_size})"
+
+
+class OrderTracker:
+    """
+    Table of the orders sent, keyed by their client order ids.
+
+    Orders are keyed by their `wsClOrdId`, and a second index maps the `clOrdId` given by the
+    market to it, so an order is found by either id with a dictionary lookup and counted once.
+    Resolving an order report costs the same with a handful or with thousands of orders. Orders
+    that reach a final status move to a bounded history, the oldest ones are forgotten first.
+
+    Args:
+    - history_size: Number of finished orders kept.
+    """
+
+    def __init__(self, history_size: int = 10000) -> None:
+        self.history_size = history_size
+        self._live = {}
+        self._history = OrderedDict()
+        # clOrdId of the orders live or in the history, to their wsClOrdId
+        self._client_ids = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._prefix = f"pb{int(time.time())}"
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def new_id(self) -> str:
+        """
+        Returns a new id to send an order through the websocket with.
+        """
+        return f"{self._prefix}-{next(self._ids)}"
+
+    def track(self, ws_client_order_id: str, ticker: str = None, side=None, size: int = 0, price: float = None) -> TrackedOrder:
+        """
+        Start tracking an order, it has to be called before the order is sent.
+        """
+        order = TrackedOrder(ws_client_order_id, ticker, side, size, price)
+        with self._lock:
+            self._live[ws_client_order_id] = order
+        return order
+
+    def discard(self, ws_client_order_id: str) -> None:
+        """
+        Stop tracking an order that couldn't be sent.
+        """
+        with self._lock:
+            order = self._live.pop(ws_client_order_id, None)
+            if order is not None and order.client_order_id is not None:
+                self._client_ids.pop(order.client_order_id, None)
+
+    def get(self, order_id: str) -> TrackedOrder | None:
+        """
+        Returns the order with the given `wsClOrdId` or `clOrdId`, live or from the history.
+        """
+        order_id = self._client_ids.get(order_id, order_id)
+        order = self._live.get(order_id)
+        if order is None:
+            order = self._history.get(order_id)
+        return order
+
+    def on_report(self, report: dict) -> TrackedOrder | None:
+        """
+        Update the order of the report, resolving its future if the status is final.
+
+        Args:
+        - report: The `orderReport` of an order report message.
+
+        Returns:
+        - TrackedOrder: The order updated, None if the report is of an order that isn't tracked.
+        """
+        with self._lock:
+            client_order_id = report.get("clOrdId")
+            order = self._live.get(report.get("wsClOrdId")) or self._live.get(self._client_ids.get(client_order_id))
+            if order is None:
+                return None
+
+            if client_order_id is not None and order.client_order_id is None:
+                order.client_order_id = client_order_id
+                self._client_ids[client_order_id] = order.ws_client_order_id
+
+            order.status = report.get("status", order.status)
+            order.text = (report.get("text") or "").strip()
+            order.filled_size = report.get("cumQty", order.filled_size)
+            if "cumQty" not in report and order.is_filled:
+                # Reports that only say "Operada" filled the whole order
+                order.filled_size = order.size
+            order.average_price = report.get("avgPx", order.average_price)
+
+            if order.is_final:
+                self._finish(order)
+
+        if order.is_final and not order.future.done():
+            order.future.set_result(order)
+        return order
+
+    def _finish(self, order: TrackedOrder) -> None:
+        self._live.pop(order.ws_client_order_id, None)
+        self._history[order.ws_client_order_id] = order
+        while len(self._history) > self.history_size:
+            _, forgotten = self._history.popitem(last=False)
+            self._client_ids.pop(forgotten.client_order_id, None)
@@ -1,26 +1,152 @@
-import pandas as pd
+import numpy as np
 import os
+import queue
+import threading
+from event_log import log
+
+
+class ColumnarBuffer:
+    """
+    Append only table stored column by column.
+
+    Numeric columns live in NumPy arrays that double their capacity when they are full,
+    the rest of the columns in Python lists, so appending a row is O(1) amortized.
+    A column that receives a value that doesn't fit its type becomes an object column.
+
+    Args:
+    - capacity: Number of rows preallocated in the numeric columns.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.capacity = capacity
+        self.columns = {}
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    @staticmethod
+    def _dtype_of(value):
+        if isinstance(value, (bool, np.bool_)):
+            return None
+        if isinstance(value, (int, np.integer)):
+            return np.int64
+        if isinstance(value, (float, np.floating)):
+            return np.float64
+        return None
+
+    def _new_column(self, value):
+        dtype = self._dtype_of(value)
+        if dtype is None:
+            return [None] * self.length
+        if dtype is np.int64 and self.length:
+            # Previous rows don't have this column, NaN needs floats
+            dtype = np.float64
+        column = np.empty(self.capacity, dtype=dtype)
+        if self.length:
+            column[:self.length] = np.nan
+        return column
+
+    def _fits(self, column, value) -> bool:
+        if isinstance(column, list):
+            return True
+        dtype = self._dtype_of(value)
+        return dtype is not None and (column.dtype == np.float64 or dtype is np.int64)
+
+    def _widen(self, name: str, value) -> None:
+        column = self.columns[name]
+        if column.dtype == np.int64 and self._dtype_of(value) is np.float64:
+            self.columns[name] = column.astype(np.float64)
+        else:
+            self.columns[name] = column[:self.length].tolist()
+
+    def _grow(self) -> None:
+        self.capacity *= 2
+        for name, column in self.columns.items():
+            if not isinstance(column, list):
+                grown = np.empty(self.capacity, dtype=column.dtype)
+                grown[:self.length] = column[:self.length]
+                self.columns[name] = grown
+
+    def append(self, row: dict) -> None:
+        if self.length == self.capacity:
+            self._grow()
+        index = self.length
+
+        for name, value in row.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = self._new_column(value)
+            elif not self._fits(column, value):
+                self._widen(name, value)
+                column = self.columns[name]
+
+            if isinstance(column, list):
+                column.append(value)
+            else:
+                column[index] = value
+
+        # Columns missing in the row
+        for name, column in self.columns.items():
+            if name not in row:
+                if isinstance(column, list):
+                    column.append(None)
+                elif column.dtype == np.float64:
+                    column[index] = np.nan
+                else:
+                    self.columns[name] = column.astype(np.float64)
+                    self.columns[name][index] = np.nan
+
+        self.length += 1
+
+    def to_df(self) -> "pd.DataFrame":
+        # pandas is only imported when a DataFrame is asked for, so the startup doesn't pay for it
+        import pandas as pd
+        return pd.DataFrame({
+            name: column if isinstance(column, list) else column[:self.length].copy()
+            for name, column in self.columns.items()
+        })
 
 
 class OrdersTable:
-    def __init__(self, strategy=None):
+    def __init__(self, strategy=None, instruments=None, journal=None):
         """
         Initialize the OrdersTable object.
 
         Args:
         - strategy: Optional strategy object used for formatting data.
+        - instruments: Optional InstrumentRegistry shared with the carrier, used to record the instrument of each order.
+        - journal: Optional OrderJournal. Every order saved is appended to it, and the orders already
+        in it are loaded, so the table survives a restart.
 
         """
-        # Initialize DataFrame to store orders
-        self.orders_df = pd.DataFrame()
+        # Orders are appended to a columnar buffer, the DataFrame is built when it's requested
+        self._buffer = ColumnarBuffer()
+        self._orders_df = None
+        self._lock = threading.Lock()
 
         # Set the strategy for data formatting
         self.strategy = strategy
-        
+        self.instruments = instruments
+
+        self.journal = journal
+        if journal is not None:
+            for row in journal.rows():
+                self._buffer.append(row)
+
+    @property
+    def orders_df(self) -> "pd.DataFrame":
+        """
+        DataFrame with the orders saved, it is cached until the next order is saved.
+        """
+        with self._lock:
+            if self._orders_df is None:
+                self._orders_df = self._buffer.to_df()
+            return self._orders_df
 
     def save_row(self, row):
         """
-        Save a row of data to the orders DataFrame.
+        Save a row of data to the orders table.
 
         Args:
         - row: Dictionary representing the order data.
@@ -31,9 +157,22 @@ class OrdersTable:
         if self.strategy:
             row = self.strategy.format_df_of_orders(row)
 
-        # Convert row to DataFrame and append to orders DataFrame
-        row_df = pd.DataFrame([row])
-        self.orders_df = pd.concat([self.orders_df, row_df], ignore_index=True)
+        # The registry already holds the pyRofex symbol, so it's looked up instead of formatted
+        if self.instruments is not None and "Symbol" in row and "Clearing" in row:
+            row["Instrument"] = self.instruments.order_ticker(row["Symbol"], row["Clearing"])
+
+        if self.journal is not None:
+            self.journal.append(row)
+        with self._lock:
+            self._buffer.append(row)
+            self._orders_df = None
+
+    def close(self):
+        """
+        Commit and close the journal, if there is one.
+        """
+        if self.journal is not None:
+            self.journal.close()
 
     
     def create_excel(self):
@@ -48,10 +187,116 @@ class OrdersTable:
         if os.path.exists(excel_name):
             os.remove(excel_name)
 
+        # The journal is the record of the orders, so the Excel is generated from it when there is one
+        if self.journal is not None:
+            self.journal.commit()
+            import pandas as pd
+            orders_df = pd.DataFrame(list(self.journal.rows()))
+        else:
+            orders_df = self.orders_df
+
         # Write orders DataFrame to Excel file
-        self.orders_df.to_excel(excel_name, index=False)
+        orders_df.to_excel(excel_name, index=False)
 
         # Print success message
         print(f"Excel '{excel_name}' creado exitosamente :)")
 
 
+class OrdersWriter:
+    """
+    Single long lived worker that saves the fills in the orders table, in the order they were handed.
+
+    The queue is bounded: when it's full the caller waits for room (backpressure) and the
+    wait is counted in `overflows`. If `put_timeout` is set and the wait expires the fill
+    is counted in `dropped`, by default the caller waits as long as needed so no fill is lost.
+
+    Args:
+    - orders_table: The OrdersTable where the fills are saved.
+    - maxsize: Maximum number of fills waiting to be saved.
+    - put_timeout: Seconds a caller waits for room in a full queue, None to wait forever.
+    """
+
+    _stop = object()
+
+    def __init__(self, orders_table: OrdersTable, maxsize: int = 1024, put_timeout: float | None = None) -> None:
+        self.orders_table = orders_table
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self.saved = 0
+        self.overflows = 0
+        self.dropped = 0
+
+    def put(self, row: dict) -> bool:
+        """
+        Hand a fill to the writer.
+
+        Returns:
+        - bool: False if the fill was dropped because the queue stayed full for `put_timeout` seconds, or the writer was closed.
+        """
+        if self._closed:
+            self.dropped += 1
+            log.error("Se descarto una orden recibida con la escritura ya cerrada: %s", row)
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.overflows += 1
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            log.warning("Se descarto una orden por tener la cola de escritura llena: %s", row)
+            return False
+
+    def flush(self) -> None:
+        """
+        Wait until every fill handed so far is saved.
+        """
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """
+        Save the fills waiting and stop the worker, fills handed after it are dropped.
+        """
+        with self._start_lock:
+            self._closed = True
+            if self._thread is None:
+                return
+            self._queue.put(self._stop)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "saved": self.saved,
+            "waiting": self._queue.qsize(),
+            "overflows": self.overflows,
+            "dropped": self.dropped,
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._write_loop, name="orders-writer", daemon=True)
+                    self._thread.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            row = self._queue.get()
+            try:
+                if row is self._stop:
+                    return
+                self.orders_table.save_row(row)
+                self.saved += 1
+            except Exception as e:
+                log.error("Mensaje de excepción: %s", e)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,231 @@
+import cProfile
+import collections
+from datetime import datetime
+import functools
+import io
+import pstats
+import sys
+import threading
+
+
+def default_path(mode: str, prefix: str = "profile") -> str:
+    """
+    Returns a file name for the output of the mode, stamped with the current time.
+    """
+    extension = "prof" if mode == "cprofile" else "collapsed"
+    return f"{prefix}_{datetime.now():%Y%m%d_%H%M%S}.{extension}"
+
+
+class Profiler:
+    """
+    Profiles the methods of the tick to trade path on demand, while the bot is running.
+
+    Two modes are available:
+    - cprofile: Deterministic profiling. While it is enabled the target methods are replaced on their
+    instances by wrappers that run them under a single cProfile.Profile, including everything they
+    call. Only one profiler can be active at a time in the interpreter (Python 3.12 and later raise
+    if a second one is enabled), so the profile is owned by one thread at a time: a target called
+    by another thread meanwhile, or while another profiling tool is active, runs unprofiled. The
+    output is a pstats file.
+    - sampling: A background thread reads the stacks of every thread every `interval` seconds and
+    counts the ones that pass through a target method, from the outermost target to the leaf. The
+    target threads run untouched. The output is in the collapsed stack format of flame graphs.
+
+    Nothing is installed while the profiler is disabled, so it costs nothing until it is enabled.
+
+    Args:
+    - targets: (object, method names) pairs of the methods profiled.
+    - rebind: Optional callable (method, replacement) used to route the handlers already registered
+    with a method (for example in the sequencer) to its wrapper, and back.
+    """
+
+    def __init__(self, targets: list, rebind=None) -> None:
+        self.targets = targets
+        self.rebind = rebind
+        self.mode = None
+        self._originals = []
+        self._profile = None
+        self._profiled_calls = 0
+        self._owner = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._samples = collections.Counter()
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+
+    @classmethod
+    def for_carrier(cls, carrier) -> "Profiler":
+        """
+        Profiler of the strategy handlers, the TNA, the orders sent and the orders saved of the carrier.
+        """
+        return cls([
+            (carrier.strategy, ("handle_incoming_messages", "handle_batch_of_messages", "calculate_tna", "calculate_tna_batch")),
+            (carrier, ("send_orders_wb",)),
+            (carrier.orders_table, ("save_row",)),
+        ], rebind=carrier.replace_handler)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    def enable(self, mode: str = "cprofile", interval: float = 0.005) -> None:
+        if self.enabled:
+            raise RuntimeError(f"The profiler is already enabled in {self.mode} mode")
+        if mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profiled_calls = 0
+            self._install()
+        elif mode == "sampling":
+            self._samples = collections.Counter()
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, args=(interval,), name="profiler-sampler", daemon=True)
+            self._sampler.start()
+        else:
+            raise ValueError(f"Unknown profiling mode {mode}, it has to be cprofile or sampling")
+        self.mode = mode
+
+    def disable(self, path: str | None = None) -> str | None:
+        """
+        Stop profiling and write what was collected, pstats in cprofile mode and collapsed stacks in sampling mode.
+
+        Returns:
+        - str: The path written, None if there was nothing to write or no path was given.
+        """
+        if not self.enabled:
+            return None
+        mode, self.mode = self.mode, None
+        if mode == "cprofile":
+            self._uninstall()
+        else:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+        if path is None:
+            return None
+        if mode == "cprofile":
+            stats = self.stats()
+            if stats is None:
+                return None
+            stats.dump_stats(path)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(self.collapsed())
+        return path
+
+    def toggle(self, path: str, mode: str = "cprofile") -> str | None:
+        """
+        Enable the profiler, or disable it writing to `path` if it was enabled. Meant for a signal handler.
+        """
+        if self.enabled:
+            return self.disable(path)
+        self.enable(mode)
+        return None
+
+    def profile_for(self, seconds: float, path: str, mode: str = "cprofile") -> threading.Timer:
+        """
+        Profile a window of `seconds` in the background, the output is written to `path` when it ends.
+        """
+        self.enable(mode)
+        timer = threading.Timer(seconds, self.disable, args=(path,))
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def stats(self) -> pstats.Stats | None:
+        """
+        Returns the stats of the cprofile mode, None if nothing was profiled.
+        """
+        if not self._profiled_calls:
+            return None
+        return pstats.Stats(self._profile, stream=io.StringIO())
+
+    def collapsed(self) -> str:
+        """
+        Returns the stacks sampled, one `frame;frame;frame count` line per stack.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self._samples.most_common())
+
+    def _install(self) -> None:
+        for target, names in self.targets:
+            for name in names:
+                method = getattr(target, name)
+                wrapper = self._wrap(method)
+                setattr(target, name, wrapper)
+                self._originals.append((target, name, method, wrapper))
+                if self.rebind is not None:
+                    self.rebind(method, wrapper)
+
+    def _uninstall(self) -> None:
+        while self._originals:
+            target, name, method, wrapper = self._originals.pop()
+            # The attribute was set on the instance, removing it exposes the method of the class again
+            delattr(target, name)
+            if self.rebind is not None:
+                self.rebind(wrapper, method)
+
+    def _wrap(self, method):
+        local = self._local
+
+        @functools.wraps(method)
+        def profiled(*args, **kwargs):
+            # Nested targets run in the profile already enabled by the outer one
+            if getattr(local, "active", False):
+                return method(*args, **kwargs)
+            if not self._acquire():
+                return method(*args, **kwargs)
+            local.active = True
+            try:
+                return method(*args, **kwargs)
+            finally:
+                local.active = False
+                self._release()
+        return profiled
+
+    def _acquire(self) -> bool:
+        """
+        Enable the profile for the calling thread, returns False if another thread owns it or another profiling tool is active.
+        """
+        with self._lock:
+            if self._owner is not None or self._profile is None:
+                return False
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Another profiling tool is already active, the call runs unprofiled
+                return False
+            self._owner = threading.get_ident()
+            self._profiled_calls += 1
+            return True
+
+    def _release(self) -> None:
+        with self._lock:
+            self._profile.disable()
+            self._owner = None
+
+    def _target_codes(self) -> set:
+        codes = set()
+        for target, names in self.targets:
+            for name in names:
+                function = getattr(type(target), name, None)
+                if function is not None:
+                    codes.add(function.__code__)
+        return codes
+
+    def _sample_loop(self, interval: float) -> None:
+        codes = self._target_codes()
+        own_thread = threading.get_ident()
+        while not self._stop_sampling.wait(interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                outermost_target = None
+                while frame is not None:
+                    stack.append(frame)
+                    if frame.f_code in codes:
+                        outermost_target = len(stack)
+                    frame = frame.f_back
+                if outermost_target is None:
+                    continue
+                frames = reversed(stack[:outermost_target])
+                self._samples[";".join(f"{frame.f_code.co_filename.rsplit('/', 1)[-1]}:{frame.f_code.co_name}" for frame in frames)] += 1
@@ -0,0 +1,247 @@
+import numpy as np
+from fixed_point import to_ticks, from_ticks, apply_costs
+
+
+class QuoteBook:
+    """
+    Keeps the last quote received for every (symbol, clearing) pair.
+
+    Each pair owns a slot in preallocated column lists, so updating or looking up
+    a quote is a dictionary hit plus an index assignment, no matter how many
+    instruments are being watched. The pandas representation is only built when
+    someone asks for it through `to_df`.
+
+    Every slot caches the price read with its costs applied (the CI offer as a buy, the
+    bid of the other clearings as a sell), recomputed only when that price changes.
+
+    Besides the slots, the book keeps one row per ticker in NumPy arrays with the
+    CI offer and the 48hs bid (their sizes and their prices with costs), so the whole
+    universe can be evaluated in a single vectorized pass.
+
+    In fixed point mode the prices read are kept in ticks, so comparing them is exact, and the
+    prices with costs are integer ticks computed with the multipliers of `fixed_point`, in
+    int64 arrays for the tickers. Rows still carry the prices with costs in pesos.
+
+    Args:
+    - capacity: Number of slots preallocated. The book doubles its size when it runs out of slots.
+    - not_value: Value used for the bid or offer that a clearing doesn't quote.
+    - buy_multiplier: Factor that applies the costs to a buy price.
+    - sell_multiplier: Factor that applies the costs to a sell price.
+    - fixed_point: Keep the prices in integer ticks, the multipliers have to be the ones of `fixed_point.cost_multipliers`.
+    """
+
+    columns = ("Symbol", "Clearing", "Bid", "Offer", "Size", "Price_with_costs")
+
+    def __init__(self, capacity: int = 64, not_value: float = 0.0, buy_multiplier: float = 1.0, sell_multiplier: float = 1.0,
+                 fixed_point: bool = False) -> None:
+        self.not_value = not_value
+        self.fixed_point = fixed_point
+        self._price_dtype = np.int64 if fixed_point else np.float64
+        self.buy_multiplier = buy_multiplier
+        self.sell_multiplier = sell_multiplier
+        self._slots = {}
+        self._symbol_slots = {}
+        self._count = 0
+        self._capacity = 0
+        self.symbol, self.clearing, self.bid, self.offer, self.size, self.price_with_costs = [], [], [], [], [], []
+        self.price_ticks = []
+        self._ticker_ids = {}
+        self.tickers = []
+        self.slot_ticker = []
+        self.ci_offer = np.zeros(0)
+        self.ci_size = np.zeros(0, dtype=np.int64)
+        self.ci_offer_with_costs = np.zeros(0, dtype=self._price_dtype)
+        self.bid_48 = np.zeros(0)
+        self.size_48 = np.zeros(0, dtype=np.int64)
+        self.bid_48_with_costs = np.zeros(0, dtype=self._price_dtype)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        missing = capacity - self._capacity
+        self.symbol.extend([None] * missing)
+        self.clearing.extend([None] * missing)
+        self.bid.extend([self.not_value] * missing)
+        self.offer.extend([self.not_value] * missing)
+        self.size.extend([0] * missing)
+        self.price_with_costs.extend([0 if self.fixed_point else 0.0] * missing)
+        self.price_ticks.extend([0] * missing)
+        self.slot_ticker.extend([None] * missing)
+        self._capacity = capacity
+
+    def _allocate_tickers(self, capacity: int) -> None:
+        missing = capacity - len(self.ci_offer)
+        self.ci_offer = np.concatenate([self.ci_offer, np.zeros(missing)])
+        self.ci_size = np.concatenate([self.ci_size, np.zeros(missing, dtype=np.int64)])
+        self.ci_offer_with_costs = np.concatenate([self.ci_offer_with_costs, np.zeros(missing, dtype=self._price_dtype)])
+        self.bid_48 = np.concatenate([self.bid_48, np.zeros(missing)])
+        self.size_48 = np.concatenate([self.size_48, np.zeros(missing, dtype=np.int64)])
+        self.bid_48_with_costs = np.concatenate([self.bid_48_with_costs, np.zeros(missing, dtype=self._price_dtype)])
+
+    @property
+    def ticker_count(self) -> int:
+        return len(self.tickers)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._slots
+
+    def slot(self, symbol: str, clearing: str) -> int | None:
+        """
+        Returns the slot of the (symbol, clearing) pair, or None if it was never quoted.
+        """
+        return self._slots.get((symbol, clearing))
+
+    def ticker_id(self, symbol: str) -> int | None:
+        """
+        Returns the row of the symbol in the ticker arrays, or None if it was never quoted.
+        """
+        return self._ticker_ids.get(symbol)
+
+    def slots_of(self, symbol: str) -> list:
+        """
+        Returns the slots of every clearing quoted for the symbol, in arrival order.
+        """
+        return self._symbol_slots.get(symbol, [])
+
+    def add(self, data: dict) -> int:
+        """
+        Registers a new (symbol, clearing) pair and stores its quote.
+
+        Args:
+        - data: Dictionary with the same keys as `columns`, as returned by the strategy `manipulate_data`.
+
+        Returns:
+        - The slot assigned to the pair.
+        """
+        key = (data["Symbol"], data["Clearing"])
+        index = self._slots.get(key)
+        if index is not None:
+            self._write(index, data)
+            return index
+
+        if self._count == self._capacity:
+            self._allocate(max(self._capacity * 2, 1))
+
+        index = self._count
+        self._count += 1
+        self._slots[key] = index
+        self._symbol_slots.setdefault(key[0], []).append(index)
+        self.symbol[index] = key[0]
+        self.clearing[index] = key[1]
+        self.slot_ticker[index] = self._register_ticker(key[0])
+        self._write(index, data)
+        return index
+
+    def update(self, index: int, data: dict) -> bool:
+        """
+        Replaces the quote stored in the slot if the price read from it changed.
+
+        Only the CI offer and the bid of the other clearings are read, so when that price is
+        the same only the size could have changed, and the quote is left as it was.
+
+        Returns:
+        - bool: True if the quote was replaced.
+        """
+        if self.clearing[index] == "CI":
+            price, previous = data["Offer"], self.offer[index]
+        else:
+            price, previous = data["Bid"], self.bid[index]
+        if self.fixed_point:
+            if to_ticks(price) == self.price_ticks[index]:
+                return False
+        elif price == previous:
+            return False
+        self._write(index, data)
+        return True
+
+    def _write(self, index: int, data: dict) -> None:
+        self.bid[index] = data["Bid"]
+        self.offer[index] = data["Offer"]
+        self.size[index] = data["Size"]
+
+        ticker = self.slot_ticker[index]
+        clearing = self.clearing[index]
+        if clearing == "CI":
+            offer = data["Offer"] or 0
+            price_with_costs = self.price_with_costs[index] = self._with_costs(index, offer, self.buy_multiplier)
+            self.ci_offer[ticker] = offer
+            self.ci_size[ticker] = data["Size"] or 0
+            self.ci_offer_with_costs[ticker] = price_with_costs
+        else:
+            bid = data["Bid"] or 0
+            price_with_costs = self.price_with_costs[index] = self._with_costs(index, bid, self.sell_multiplier)
+            if clearing == "48hs":
+                self.bid_48[ticker] = bid
+                self.size_48[ticker] = data["Size"] or 0
+                self.bid_48_with_costs[ticker] = price_with_costs
+
+    def _with_costs(self, index: int, price: float, multiplier) -> float | int:
+        if self.fixed_point:
+            ticks = self.price_ticks[index] = to_ticks(price)
+            return apply_costs(ticks, multiplier)
+        return round(price * multiplier, 2)
+
+    def _register_ticker(self, symbol: str) -> int:
+        ticker = self._ticker_ids.get(symbol)
+        if ticker is None:
+            ticker = len(self.tickers)
+            if ticker == len(self.ci_offer):
+                self._allocate_tickers(max(ticker * 2, 1))
+            self._ticker_ids[symbol] = ticker
+            self.tickers.append(symbol)
+        return ticker
+
+    def row(self, index: int) -> dict:
+        """
+        Returns the slot as a dictionary with the keys of `columns`.
+        """
+        return {
+            "Symbol": self.symbol[index],
+            "Clearing": self.clearing[index],
+            "Bid": self.bid[index],
+            "Offer": self.offer[index],
+            "Size": self.size[index],
+            "Price_with_costs": from_ticks(self.price_with_costs[index]) if self.fixed_point else self.price_with_costs[index],
+        }
+
+    def symbol_rows(self, symbol: str) -> list:
+        """
+        Returns a copy of every row quoted for the symbol.
+        """
+        return [self.row(index) for index in self.slots_of(symbol)]
+
+    def to_df(self) -> "pd.DataFrame":
+        """
+        Builds a DataFrame with the content of the book.
+
+        Rows of the same symbol are placed together, in the order in which their clearings arrived.
+        """
+        # pandas is only imported when a DataFrame is asked for, so the startup doesn't pay for it
+        import pandas as pd
+        rows = [self.row(index) for slots in self._symbol_slots.values() for index in slots]
+        return pd.DataFrame(rows, columns=list(self.columns))
+
+
+class DepthBook:
+    """
+    Keeps the levels of the side of the book read for each (symbol, clearing) pair.
+
+    Market data messages carry the whole top of the book of an instrument up to the depth
+    subscribed, so an update replaces the levels of the pair in a single assignment.
+
+    Levels are (price, size) tuples, best first.
+    """
+
+    def __init__(self) -> None:
+        self._levels = {}
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def update(self, symbol: str, clearing: str, levels: list) -> None:
+        self._levels[(symbol, clearing)] = levels
+
+    def levels(self, symbol: str, clearing: str) -> list:
+        return self._levels.get((symbol, clearing), [])
@@ -0,0 +1,147 @@
+import argparse
+import json
+import threading
+import time
+from carrier import Carrier
+
+
+MARKET_DATA = "md"
+ORDER_REPORT = "or"
+
+
+class SessionRecorder:
+    """
+    Appends every raw websocket message, with its receive timestamp, to a JSONL log.
+
+    Each line is `{"t": <receive time in ns>, "k": "md" | "or", "m": <message>}`.
+    Set it as `Carrier.recorder` before subscribing and the carrier wraps its handlers with it.
+
+    Args:
+    - path: File where the session is appended.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, kind: str, message: dict) -> None:
+        line = json.dumps({"t": time.time_ns(), "k": kind, "m": message}, separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._file.write("\n")
+            self.recorded += 1
+
+    def wrap(self, kind: str, handler):
+        """
+        Returns a handler that records the message before handing it to the given handler.
+        """
+        def recording_handler(message):
+            self.record(kind, message)
+            handler(message)
+        return recording_handler
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ReplayCarrier(Carrier):
+    """
+    Carrier that never reaches the market, the orders sent are stored in `sent_orders`.
+    """
+
+    def __init__(self, broker, strategy=None, sequencer=None, journal=None) -> None:
+        super().__init__(broker, strategy, sequencer, journal)
+        self.sent_orders = []
+
+    def _send_order_via_websocket(self, ticker: str, side, size: int, price: float, ws_client_order_id: str = None) -> None:
+        self.sent_orders.append({"ticker": ticker, "side": side, "size": size, "price": price, "ws_client_order_id": ws_client_order_id})
+
+
+class SessionReplayer:
+    """
+    Feeds a session recorded by SessionRecorder back into a strategy.
+
+    Args:
+    - path: Log written by SessionRecorder.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def entries(self):
+        """
+        Yields the (receive time in ns, kind, message) of every recorded message.
+        """
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    entry = json.loads(line)
+                    yield entry["t"], entry["k"], entry["m"]
+
+    def replay(self, strategy, paced: bool = False, speed: float = 1.0) -> dict:
+        """
+        Replay the session into the strategy.
+
+        Market data goes to `strategy.handle_incoming_messages` and order reports to the
+        `_order_report_handler` of the strategy carrier, which should be a ReplayCarrier.
+
+        Args:
+        - strategy: The strategy to feed.
+        - paced: If True the original time between messages is respected, otherwise the messages are fed as fast as possible.
+        - speed: Factor applied to the original pacing, 2 replays twice as fast.
+
+        Returns:
+        - dict: Number of messages replayed, seconds elapsed and messages per second.
+        """
+        messages = 0
+        first_recorded = None
+        start = time.perf_counter()
+
+        for recorded_at, kind, message in self.entries():
+            if paced:
+                if first_recorded is None:
+                    first_recorded = recorded_at
+                delay = (recorded_at - first_recorded) / 1e9 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            if kind == MARKET_DATA:
+                strategy.handle_incoming_messages(message)
+            elif kind == ORDER_REPORT:
+                strategy.carrier._order_report_handler(message)
+            messages += 1
+
+        elapsed = time.perf_counter() - start
+        return {
+            "messages": messages,
+            "elapsed": elapsed,
+            "messages_per_second": messages / elapsed if elapsed else 0.0,
+        }
+
+
+if __name__ == '__main__':
+    from broker import Broker
+    from strategy_arbitration_clearing import StrategyArbitrationOfClearing
+
+    parser = argparse.ArgumentParser(description="Replay a recorded session into the arbitrage strategy")
+    parser.add_argument("path", help="Session log written by SessionRecorder")
+    parser.add_argument("--paced", action="store_true", help="Respect the original time between messages")
+    parser.add_argument("--speed", type=float, default=1.0, help="Speed factor applied to the original pacing")
+    parser.add_argument("--tna", type=float, default=110, help="Expected TNA")
+    parser.add_argument("--budget", type=float, default=200000000, help="Budget of the broker")
+    args = parser.parse_args()
+
+    broker = Broker(credentials=None, budget=args.budget)
+    carrier = ReplayCarrier(broker)
+    strategy = StrategyArbitrationOfClearing(carrier, tna_expected=args.tna)
+    carrier.strategy = strategy
+
+    print(SessionReplayer(args.path).replay(strategy, paced=args.paced, speed=args.speed))
+    print(f"Ordenes enviadas: {len(carrier.sent_orders)}")
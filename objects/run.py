@@ -1,12 +1,39 @@
 
+# Created first, so the startup report includes the time spent importing the bot
+from startup import StartupTimer
+timer = StartupTimer()
 import os
+import signal
+from datetime import date
 from broker import Broker
 from carrier import Carrier
+from async_carrier import AsyncCarrier
 from strategy_arbitration_clearing import StrategyArbitrationOfClearing
+from sequencer import EventSequencer
+from recorder import SessionRecorder
+from journal import OrderJournal
+from orders_table import OrdersTable
+from instruments import InstrumentRegistry
+from shards import ShardSupervisor
+from event_log import log, INFO
+from metrics import MetricsServer
+from profiler import Profiler, default_path
 from dotenv import load_dotenv
 load_dotenv()
 
 prod_env=False
+# Send both legs of each arbitrage at the same time, awaiting their order reports in the carrier loop
+async_orders=True
+# Split the tickers across this many worker processes trading from one budget, 0 runs every ticker in this process
+shards=0
+tna_expected=90
+# Evaluate the prices in integer ticks and the TNA in integer basis points
+fixed_point=False
+# Events of the session are written to this file, DEBUG also logs every market data message
+log_path=f"pybot_{date.today():%Y%m%d}.log"
+log_level=INFO
+# Metrics served at http://127.0.0.1:<metrics_port>/metrics, each shard serves them in the next ports. None disables them
+metrics_port=9108
 
 if prod_env:
     credentials = {"account" : os.environ.get('ACCOUNT'), "user" : os.environ.get('USER'), "password": os.environ.get('PASSWORD'), "broker_name": "veta"}
@@ -47,36 +74,135 @@ else:
     ]
     budget=200000000
 
-broker = Broker(credentials=credentials, budget=budget, prod_env=prod_env)
-carrier = Carrier(broker)
+def run_sharded():
+    if prod_env:
+        Broker.security_measure()
+    # Orders of the day are journaled, so restarting the bot after a crash recovers them
+    orders_table = OrdersTable(instruments=InstrumentRegistry(), journal=OrderJournal(f"orders_{date.today():%Y%m%d}.jsonl"))
+    config = {"credentials": credentials, "prod_env": prod_env, "tna_expected": tna_expected, "async_orders": async_orders, "fixed_point": fixed_point,
+              "log_path": log_path, "log_level": log_level, "metrics_port": metrics_port}
+    supervisor = ShardSupervisor(tickers_list, shards, config, orders_table, budget)
+    supervisor.start()
 
+    while True:
+        try:
+            choice = int(input("Choose a command:\n1)See shards \n2)See dataframe with orders sended \n3)See current budget \n4)Stop shards "))
+            if choice == 1:
+                for shard in supervisor.status():
+                    print(shard)
+            elif choice == 2:
+                print(orders_table.orders_df.copy())
+            elif choice == 3:
+                print(supervisor.ledger.stats())
+            elif choice == 4:
+                supervisor.stop()
+                print(supervisor.ledger.stats())
+                orders_table.create_excel()
+                orders_table.close()
+                log.close()
+                break
+            else:
+                print("Invalid input, try again")
+        except Exception as e:
+            print(e)
 
 
-strategy = StrategyArbitrationOfClearing(carrier, ticket_to_subscription=tickers_list, tna_expected=90)
 
-carrier.strategy = strategy
+# The worker processes import this module too, only the process started from the command line runs the bot
+if __name__ == '__main__':
+    log.level = log_level
+    log.open(log_path)
 
+if __name__ == '__main__' and shards:
+    run_sharded()
 
+elif __name__ == '__main__':
+    timer.mark("imports")
+    broker = Broker(credentials=credentials, budget=budget, prod_env=prod_env, connect=False)
+    # The login waits for the REST authentication, the carrier, the journal and the strategy are built meanwhile
+    login = timer.background("login", broker.connect)
+    sequencer = EventSequencer()
+    # Orders of the day are journaled, so restarting the bot after a crash recovers them
+    journal = OrderJournal(f"orders_{date.today():%Y%m%d}.jsonl")
+    if async_orders:
+        carrier = AsyncCarrier(broker, sequencer=sequencer, journal=journal)
+    else:
+        carrier = Carrier(broker, sequencer=sequencer, journal=journal)
 
+    # Set SESSION_LOG to record the websocket messages of the session, they can be replayed with recorder.py
+    if os.environ.get("SESSION_LOG"):
+        carrier.recorder = SessionRecorder(os.environ.get("SESSION_LOG"))
+    timer.mark("carrier and journal")
 
 
-if __name__ == '__main__':
-    carrier.run_strategy()
+
+    strategy = StrategyArbitrationOfClearing(carrier, ticket_to_subscription=tickers_list, tna_expected=tna_expected, fixed_point=fixed_point)
+
+    carrier.strategy = strategy
+    # Registers the instruments before the login is done, so run_strategy only looks them up
+    strategy.format_tickets()
+    timer.mark("strategy")
+
+    metrics_server = None
+    if metrics_port:
+        metrics_server = MetricsServer(carrier.metrics, port=metrics_port)
+        metrics_server.start()
+
+    sequencer.start()
+    login.result()
+    timer.mark("login")
+    carrier.run_strategy(timer)
+    timer.shutdown()
+    log.info("Startup:\n%s", timer.report())
+    print(timer.report())
+
+    # Built once the handlers are subscribed, so the profiled versions replace them. kill -USR1 <pid> starts and stops it too
+    profiler = Profiler.for_carrier(carrier)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: print("Profile:", profiler.toggle(default_path("cprofile"))))
 
     while True:
         try:
-            choice = int(input("Choose a command:\n1)See dataframe with market data \n2)See dataframe with orders sended \n3)See current budget \n4)Disconnect web socket "))
+            choice = int(input("Choose a command:\n1)See dataframe with market data \n2)See dataframe with orders sended \n3)See current budget \n4)Disconnect web socket \n5)See market data inbox and orders writer counters \n6)See latency histograms \n7)See last events logged \n8)Profile the strategy "))
             if choice == 1:
-                print(carrier.strategy.main_df)
+                print(sequencer.call(lambda: carrier.strategy.main_df))
             elif choice == 2:
-                print(carrier.orders_table.orders_df)
+                print(sequencer.call(lambda: carrier.orders_table.orders_df.copy()))
             elif choice == 3:
-                print("Te sobran: $",broker.budget)
+                print("Te sobran: $",sequencer.call(lambda: broker.budget))
+                print(broker.ledger.stats())
             elif choice == 4:
                 carrier.wb_disconnect()
+                sequencer.stop()
                 print("Te sobran: $",broker.budget)
                 carrier.orders_table.create_excel()
+                carrier.orders_table.close()
+                print(carrier.latency.report())
+                if metrics_server is not None:
+                    metrics_server.stop()
+                log.close()
                 break
+            elif choice == 5:
+                print(sequencer.call(carrier.inbox_stats))
+                print(carrier.orders_writer.stats())
+            elif choice == 6:
+                print(carrier.latency.report())
+            elif choice == 7:
+                count = int(input("How many events? "))
+                print("\n".join(log.tail(count)))
+                print(log.stats())
+            elif choice == 8:
+                if profiler.enabled:
+                    print("Profile:", profiler.disable(default_path(profiler.mode)))
+                else:
+                    mode = "sampling" if int(input("1)cProfile 2)Sampling ")) == 2 else "cprofile"
+                    seconds = float(input("Seconds to profile, 0 profiles until this option is chosen again: "))
+                    path = default_path(mode)
+                    if seconds > 0:
+                        profiler.profile_for(seconds, path, mode)
+                        print(f"Profiling for {seconds} seconds into {path}")
+                    else:
+                        profiler.enable(mode)
             else:
                 print("Invalid input, try again")
         except Exception as e:
@@ -0,0 +1,131 @@
+from concurrent.futures import Future
+from enum import Enum
+import queue
+import threading
+from event_log import log
+
+
+class EventType(Enum):
+    """
+    Types of the events applied by the EventSequencer.
+    """
+    MARKET_DATA = "market_data"
+    MARKET_DATA_READY = "market_data_ready"
+    ORDER_REPORT = "order_report"
+    CALL = "call"
+    STOP = "stop"
+
+
+class EventSequencer:
+    """
+    Applies every state mutation of the bot in a single thread, in the order it was published.
+
+    Websocket callbacks and the CLI never touch the strategy or the carrier directly: they publish typed events and the sequencer thread calls the handler
+    registered for each type. As only one thread mutates the state, the hot path doesn't
+    need locks, and the recorded history can be replayed to get the same result.
+
+    Args:
+    - record: If True every applied event (except CALL and MARKET_DATA_READY) is appended to `history`
+    as a (sequence, event_type, payload) tuple.
+    """
+
+    _not_recorded = (EventType.CALL, EventType.MARKET_DATA_READY)
+
+    def __init__(self, record: bool = False) -> None:
+        self._queue = queue.SimpleQueue()
+        self._handlers = {EventType.CALL: self._run_call}
+        self._thread = None
+        self.sequence = 0
+        self.history = [] if record else None
+
+    def pending(self) -> int:
+        """
+        Returns the number of events waiting to be applied.
+        """
+        return self._queue.qsize()
+
+    def register(self, event_type: EventType, handler) -> None:
+        """
+        Set the callable that applies the events of the given type, it receives the event payload.
+        """
+        self._handlers[event_type] = handler
+
+    def replace(self, handler, replacement) -> None:
+        """
+        Register `replacement` for every event type applied by `handler`.
+        """
+        for event_type, registered in list(self._handlers.items()):
+            if registered == handler:
+                self._handlers[event_type] = replacement
+
+    def publish(self, event_type: EventType, payload=None) -> None:
+        """
+        Enqueue an event, it can be called from any thread and never blocks.
+        """
+        self._queue.put((event_type, payload))
+
+    def call(self, function, timeout: float | None = None):
+        """
+        Run the function in the sequencer thread and return its result.
+
+        Useful to read the state of the bot (for example from the CLI) without racing the handlers.
+        If the sequencer isn't running, or it is called from the sequencer thread, the function runs right away.
+        """
+        if not self.is_running() or threading.current_thread() is self._thread:
+            return function()
+        future = Future()
+        self.publish(EventType.CALL, (function, future))
+        return future.result(timeout)
+
+    def apply(self, event_type: EventType, payload=None) -> None:
+        """
+        Apply an event in the current thread.
+        """
+        self.sequence += 1
+        if self.history is not None and event_type not in self._not_recorded:
+            self.history.append((self.sequence, event_type, payload))
+        handler = self._handlers.get(event_type)
+        if handler is not None:
+            handler(payload)
+
+    def replay(self, history: list) -> None:
+        """
+        Apply a recorded history, in order, in the current thread.
+        """
+        for _, event_type, payload in history:
+            self.apply(event_type, payload)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="event-sequencer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        Apply the events already published and stop the sequencer thread.
+        """
+        if self._thread is None:
+            return
+        self.publish(EventType.STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            event_type, payload = self._queue.get()
+            if event_type is EventType.STOP:
+                break
+            try:
+                self.apply(event_type, payload)
+            except Exception as e:
+                log.error("Mensaje de excepción: %s", e)
+
+    @staticmethod
+    def _run_call(payload) -> None:
+        function, future = payload
+        try:
+            future.set_result(function())
+        except Exception as e:
+            future.set_exception(e)
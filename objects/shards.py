@@ -0,0 +1,233 @@
+import multiprocessing
+import queue
+import threading
+from ledger import SharedBudgetLedger
+from event_log import log
+
+
+class FillsForwarder:
+    """
+    Orders writer of a shard, it sends the orders filled to the supervisor instead of saving them.
+
+    It has the interface of OrdersWriter, so it replaces `carrier.orders_writer` in the worker process.
+
+    Args:
+    - fills: multiprocessing queue read by the supervisor.
+    - shard_id: Number of the shard the orders come from.
+    """
+
+    def __init__(self, fills, shard_id: int) -> None:
+        self.fills = fills
+        self.shard_id = shard_id
+        self.forwarded = 0
+
+    def put(self, order: dict) -> None:
+        self.fills.put((self.shard_id, order))
+        self.forwarded += 1
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"forwarded": self.forwarded}
+
+
+def run_shard(shard_id: int, tickers: list, config: dict, ledger, fills, stop) -> None:
+    """
+    Entry point of a worker process: run the strategy over its tickers until the supervisor stops it.
+
+    Args:
+    - shard_id: Number of the shard.
+    - tickers: Tickers watched by the shard.
+    - config: credentials, prod_env, tna_expected, async_orders, fixed_point, log_path, log_level and metrics_port of the bot.
+    - ledger: View of the SharedBudgetLedger of the supervisor for the shard, see `SharedBudgetLedger.for_shard`.
+    - fills: Queue where the orders filled are sent.
+    - stop: Event set by the supervisor to stop the shard.
+    """
+    # Imported here so the supervisor doesn't pay for them
+    from broker import Broker
+    from carrier import Carrier
+    from async_carrier import AsyncCarrier
+    from sequencer import EventSequencer
+    from strategy_arbitration_clearing import StrategyArbitrationOfClearing
+    from metrics import MetricsServer
+    from profiler import Profiler, default_path
+    from startup import StartupTimer
+    import signal
+
+    # Every shard writes its own file, so the processes never interleave their lines
+    if config.get("log_path"):
+        log.level = config.get("log_level", log.level)
+        log.open(f"{config['log_path']}.shard{shard_id}")
+
+    timer = StartupTimer()
+    # The supervisor already asked for the confirmation of the production environment
+    broker = Broker(credentials=config["credentials"], budget=0, prod_env=config["prod_env"], confirm_prod=False, connect=False)
+    # The login waits for the REST authentication, the carrier and the strategy are built meanwhile
+    login = timer.background("login", broker.connect)
+    broker.ledger = ledger
+    sequencer = EventSequencer()
+    carrier_class = AsyncCarrier if config["async_orders"] else Carrier
+    carrier = carrier_class(broker, sequencer=sequencer)
+    carrier.orders_writer = FillsForwarder(fills, shard_id)
+    carrier.strategy = StrategyArbitrationOfClearing(carrier, ticket_to_subscription=tickers, tna_expected=config["tna_expected"],
+                                                     fixed_point=config.get("fixed_point", False))
+    carrier.strategy.format_tickets()
+    timer.mark("carrier and strategy")
+    metrics_server = None
+    if config.get("metrics_port"):
+        metrics_server = MetricsServer(carrier.metrics, port=config["metrics_port"] + 1 + shard_id)
+        metrics_server.start()
+
+    sequencer.start()
+    login.result()
+    timer.mark("login")
+    carrier.run_strategy(timer)
+    timer.shutdown()
+    log.info("Startup of shard %s:\n%s", shard_id, timer.report())
+    # kill -USR1 <pid of the shard> starts and stops profiling it
+    profiler = Profiler.for_carrier(carrier)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.toggle(default_path("cprofile", f"profile_shard{shard_id}")))
+    stop.wait()
+    carrier.wb_disconnect()
+    sequencer.stop()
+    if metrics_server is not None:
+        metrics_server.stop()
+    log.close()
+
+
+class ShardSupervisor:
+    """
+    Runs the strategy in several worker processes, each one watching a share of the tickers.
+
+    Every shard has its own carrier, subscription and quote book, so the tickers are no longer
+    bound by the GIL of a single process. The shards trade from one SharedBudgetLedger and send
+    the orders filled back to the supervisor, which saves them in its single OrdersTable.
+    Shards that die are started again, up to `max_restarts` times each.
+
+    Args:
+    - tickers: Tickers to watch, they are split round robin across the shards.
+    - shards: Number of worker processes.
+    - config: credentials, prod_env, tna_expected, async_orders, fixed_point, log_path, log_level and metrics_port passed to every shard.
+    - orders_table: OrdersTable where the orders filled are saved.
+    - budget: Capital shared by the shards.
+    - target: Function run by each worker process, with the arguments of `run_shard`.
+    - monitor_interval: Seconds between the checks of the shards.
+    - max_restarts: Times a shard is started again after dying.
+    """
+
+    def __init__(self, tickers: list, shards: int, config: dict, orders_table, budget: float, target=run_shard,
+                 monitor_interval: float = 1.0, max_restarts: int = 3) -> None:
+        self.context = multiprocessing.get_context("spawn")
+        self.tickers = [tickers[shard::shards] for shard in range(shards)]
+        self.config = config
+        self.orders_table = orders_table
+        self.ledger = SharedBudgetLedger(budget, self.context, shards)
+        self.target = target
+        self.monitor_interval = monitor_interval
+        self.max_restarts = max_restarts
+        self.fills = self.context.Queue()
+        self._stop = self.context.Event()
+        self._stopping = threading.Event()
+        self.processes = [None] * shards
+        self.restarts = [0] * shards
+        self._collector = None
+        self._monitor = None
+        self.saved = 0
+
+    def start(self) -> None:
+        for shard in range(len(self.processes)):
+            self._start_shard(shard)
+        self._collector = threading.Thread(target=self._collect, name="shard-fills", daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._watch, name="shard-monitor", daemon=True)
+        self._monitor.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop every shard, terminating the ones that don't stop in time, and save the orders they sent.
+        """
+        self._stopping.set()
+        if self._monitor is not None:
+            self._monitor.join()
+        self._stop.set()
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        if self._collector is not None:
+            self.fills.put(None)
+            self._collector.join()
+            self._collector = None
+
+    def status(self) -> list:
+        """
+        Returns the pid, tickers, state and restarts of every shard.
+        """
+        return [
+            {
+                "shard": shard,
+                "pid": process.pid if process else None,
+                "tickers": self.tickers[shard],
+                "alive": process.is_alive() if process else False,
+                "exitcode": process.exitcode if process else None,
+                "restarts": self.restarts[shard],
+            }
+            for shard, process in enumerate(self.processes)
+        ]
+
+    def check(self) -> list:
+        """
+        Release what the shards that died had reserved and start them again, returns their numbers.
+        """
+        restarted = []
+        for shard, process in enumerate(self.processes):
+            if process is None or process.is_alive() or self._stopping.is_set():
+                continue
+            # The new process doesn't know the orders of the dead one, nobody would settle their reservations
+            released = self.ledger.release_shard(shard)
+            if released:
+                log.warning("Se liberaron $%s reservados por el shard %s", released, shard)
+            if self.restarts[shard] >= self.max_restarts:
+                continue
+            log.warning("El shard %s termino con codigo %s, se vuelve a iniciar", shard, process.exitcode)
+            self.restarts[shard] += 1
+            self._start_shard(shard)
+            restarted.append(shard)
+        return restarted
+
+    def _start_shard(self, shard: int) -> None:
+        process = self.context.Process(
+            target=self.target,
+            args=(shard, self.tickers[shard], self.config, self.ledger.for_shard(shard), self.fills, self._stop),
+            name=f"shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[shard] = process
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.monitor_interval):
+            self.check()
+
+    def _collect(self) -> None:
+        while True:
+            try:
+                fill = self.fills.get(timeout=self.monitor_interval)
+            except queue.Empty:
+                continue
+            if fill is None:
+                break
+            _, order = fill
+            try:
+                self.orders_table.save_row(order)
+                self.saved += 1
+            except Exception as e:
+                log.error("Mensaje de excepción: %s", e)
@@ -0,0 +1,211 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+import pyRofex
+from pyRofex.components import globals as rofex_globals
+from pyRofex.components import urls
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class SnapshotCache:
+    """
+    Cache of REST responses with a time to live per endpoint.
+
+    Entries are kept per endpoint and owner (the instrument of the market data, the account
+    of the reports), so the websocket events of an owner invalidate all its entries with a
+    single lookup. Concurrent callers of a missing entry share one request: the first one
+    fetches it and the rest wait for its result.
+
+    Args:
+    - ttls: Seconds each endpoint's entries live, endpoints missing here aren't cached.
+    - clock: Callable returning the current time in seconds.
+    """
+
+    default_ttls = {"market_data": 1.0, "account_report": 5.0, "detailed_position": 5.0}
+
+    def __init__(self, ttls: dict = None, clock=time.monotonic) -> None:
+        self.ttls = dict(self.default_ttls if ttls is None else ttls)
+        self.clock = clock
+        self._entries = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.invalidations = 0
+
+    def get(self, endpoint: str, owner, fetch, variant=None):
+        """
+        Returns the cached response, or the one of `fetch` if it's missing or expired.
+
+        Args:
+        - endpoint: Name of the endpoint, it selects the time to live.
+        - owner: Instrument or account the response belongs to.
+        - fetch: Callable that makes the request, its exceptions are raised to every caller waiting and nothing is cached.
+        - variant: Parameters of the request that give different responses for the same owner.
+        """
+        ttl = self.ttls.get(endpoint)
+        if ttl is None:
+            return fetch()
+
+        key = (endpoint, owner)
+        with self._lock:
+            entry = self._entries.get(key, {}).get(variant)
+            if entry is not None and entry[1] > self.clock():
+                self.hits += 1
+                return entry[0]
+            in_flight = self._in_flight.setdefault(key, {})
+            future = in_flight.get(variant)
+            if future is None:
+                self.misses += 1
+                future = in_flight[variant] = Future()
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fetch()
+        except Exception as e:
+            with self._lock:
+                self._forget(key, variant, future)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # An invalidation during the request drops the in flight marker, then the response is already stale
+            if self._forget(key, variant, future):
+                self._entries.setdefault(key, {})[variant] = (value, self.clock() + ttl)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, endpoint: str, owner) -> None:
+        """
+        Drop every entry of the owner in the endpoint.
+        """
+        key = (endpoint, owner)
+        with self._lock:
+            variants = self._entries.pop(key, None)
+            if variants is not None:
+                self.invalidations += 1
+            self._in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._in_flight.clear()
+
+    def _forget(self, key: tuple, variant, future: Future) -> bool:
+        # Returns False if the request was invalidated while it was in flight
+        in_flight = self._in_flight.get(key)
+        if in_flight is None or in_flight.get(variant) is not future:
+            return False
+        del in_flight[variant]
+        if not in_flight:
+            del self._in_flight[key]
+        return True
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "shared": self.shared, "invalidations": self.invalidations}
+
+
+class SnapshotFetcher:
+    """
+    Fetch the REST market data of many instruments at the same time.
+
+    The requests run in a bounded pool of worker threads and share a `requests.Session`,
+    so the TLS connections to the broker are kept alive and reused instead of opening one
+    per instrument as `pyRofex.get_market_data` does. The url, token and ssl settings are
+    the ones of the pyRofex environment, initialized by the Broker.
+
+    Args:
+    - environment: pyRofex environment, None uses the default environment.
+    - max_workers: Number of requests in flight at the same time.
+    - timeout: Seconds to wait for each response.
+    - session: Optional session, a new one is created if it isn't given.
+    - cache: Optional SnapshotCache, the responses are kept there by instrument under the "market_data" endpoint.
+    """
+
+    def __init__(self, environment=None, max_workers: int = 8, timeout: float = 2.0, session: requests.Session = None,
+                 cache: SnapshotCache = None) -> None:
+        self.environment = environment
+        self.cache = cache
+        self.max_workers = max_workers
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def config(self) -> dict:
+        environment = self.environment or rofex_globals.default_environment
+        return rofex_globals.environment_config[environment]
+
+    def fetch(self, ticker: str, entries: list, depth: int = 1, market=pyRofex.Market.ROFEX) -> dict:
+        """
+        Get the market data of one instrument, renewing the token once if it expired.
+
+        Returns:
+        - dict: The response of the API, or a response with status ERROR if the request failed.
+        """
+        path = urls.market_data.format(m=market.value, s=ticker, e=",".join(entry.value for entry in entries), d=depth)
+        try:
+            if self.cache is None:
+                return self._request(path)
+            return self.cache.get("market_data", ticker, lambda: self._request(path), variant=path)
+        except Exception as e:
+            return {"status": "ERROR", "description": str(e)}
+
+    def fetch_many(self, tickers: list, entries: list, depth: int = 1, market=pyRofex.Market.ROFEX) -> dict:
+        """
+        Get the market data of every instrument concurrently.
+
+        Returns:
+        - dict: The response of each instrument, keyed by its ticker.
+        """
+        executor = self._get_executor()
+        futures = {ticker: executor.submit(self.fetch, ticker, entries, depth, market) for ticker in tickers}
+        return {ticker: future.result() for ticker, future in futures.items()}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        self.session.close()
+
+    def _request(self, path: str) -> dict:
+        response = self._get(path)
+        if response.status_code == 401:
+            self.config["rest_client"].update_token()
+            response = self._get(path)
+        content = response.json()
+        # Errors are raised so they never end in the cache
+        if content.get("status") == "ERROR":
+            raise ValueError(content.get("description") or content.get("message"))
+        return content
+
+    def _get(self, path: str) -> requests.Response:
+        config = self.config
+        return self.session.get(
+            config["url"] + path,
+            headers={"X-Auth-Token": config["token"]},
+            verify=config["ssl"],
+            proxies=config["proxies"],
+            timeout=self.timeout,
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="snapshot")
+            return self._executor
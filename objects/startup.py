@@ -0,0 +1,89 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import threading
+import time
+
+
+class StartupTimer:
+    """
+    Times the phases of the startup of the bot, so a slow restart can be traced to the phase that caused it.
+
+    Phases run in the main thread are timed one after the other with `mark` or `phase`. Phases
+    that overlap with them, like the login or the REST snapshot, are run in a background thread
+    with `background` and timed there. `report` lists every phase, the background ones marked,
+    and the wall time from the creation of the timer, which is less than the sum of the phases
+    when they overlap.
+
+    Args:
+    - clock: Callable returning the current time in seconds.
+    """
+
+    def __init__(self, clock=time.perf_counter) -> None:
+        self.clock = clock
+        self.phases = []
+        self._started = self._last = clock()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def mark(self, name: str) -> float:
+        """
+        Close a phase of the main thread that started at the previous mark, returns its seconds.
+        """
+        now = self.clock()
+        seconds, self._last = now - self._last, now
+        self._add(name, seconds, False)
+        return seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time the block as a phase of the main thread.
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self._last = self.clock()
+            self._add(name, self._last - start, False)
+
+    def background(self, name: str, function, *args, **kwargs) -> Future:
+        """
+        Run `function` in a background thread as a phase, returns the Future of its result.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup")
+
+        def timed():
+            start = self.clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._add(name, self.clock() - start, True)
+        return self._executor.submit(timed)
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Seconds since the timer was created.
+        """
+        return self.clock() - self._started
+
+    def report(self) -> str:
+        """
+        Returns the phases in the order they ended, with their milliseconds, and the wall time of the startup.
+        """
+        with self._lock:
+            phases = list(self.phases)
+        width = max([len(name) for name, _, _ in phases] + [len("total")])
+        lines = [f"{name:<{width}} {seconds * 1000:9.1f} ms{' (background)' if background else ''}" for name, seconds, background in phases]
+        lines.append(f"{'total':<{width}} {self.elapsed * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _add(self, name: str, seconds: float, background: bool) -> None:
+        with self._lock:
+            self.phases.append((name, seconds, background))
@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
-import pandas as pd 
+import functools
+import numpy as np
 import pyRofex
+from quote_book import QuoteBook, DepthBook
+from fixed_point import TNA_SCALE, to_ticks, from_ticks, cost_multipliers, apply_costs, tna_bps, tna_bps_batch
+from event_log import log
 
 class BaseStrategy(ABC):
     """
@@ -17,7 +21,9 @@ class BaseStrategy(ABC):
         Abstract method for running the trading strategy.
 
         This method should be implemented by subclasses to define the logic
-        for running the trading strategy based on new data.
+        for running the trading strategy based on new data. Strategies register the
+        instruments they watch with `carrier.subscribe_market_data`, the carrier opens
+        the websocket and subscribes once for all of its strategies.
 
         """
         pass
@@ -43,47 +49,56 @@ class StrategyArbitrationOfClearing(BaseStrategy):
     - carrier: The carrier object associated with the strategy.
     - tna_expected: The expected TNA value. Defaults to 110.
     - ticket_to_subscription: Tickets to subscribe to watch in the web socket.
+    - depth: Levels of the book subscribed, the orders are sized walking them.
+    - fixed_point: Evaluate the prices in integer ticks and the TNA in integer basis points, see `fixed_point`.
 
     """
-    def __init__(self, carrier : object, ticket_to_subscription: list = None, tna_expected: int = 110):
+    def __init__(self, carrier : object, ticket_to_subscription: list = None, tna_expected: int = 110, depth: int = 2, fixed_point: bool = False):
         super().__init__()
         self.tna_expected = tna_expected
         self.carrier = carrier
         self.not_value = 0.0
         self.costs = carrier.broker.costs
-        self.main_df = self.create_df()
+        self.iva = 21
+        self.fixed_point = fixed_point
+        # The costs and their IVA are applied to a price with a single multiply
+        if fixed_point:
+            self.buy_multiplier, self.sell_multiplier = cost_multipliers(self.costs, self.iva)
+        else:
+            self.buy_multiplier = 1 + self.costs * (100 + self.iva) / 100 / 100
+            self.sell_multiplier = 1 - self.costs * (100 + self.iva) / 100 / 100
+        self.quote_book = QuoteBook(not_value=self.not_value, buy_multiplier=self.buy_multiplier, sell_multiplier=self.sell_multiplier,
+                                    fixed_point=fixed_point)
+        self.depth = depth
+        self.depth_book = DepthBook()
         self.ticket_to_subscription = ticket_to_subscription
 
+    @property
+    def main_df(self) -> "pd.DataFrame":
+        """
+        Read only DataFrame with the last quotes of the book, built each time it is requested.
+        """
+        return self.create_df()
+
 
 
-    def create_df(self)-> pd.DataFrame:
+    def create_df(self)-> "pd.DataFrame":
         """
-        Create a DataFrame with predefined columns.
+        Create a DataFrame from the quote book.
 
-        This method creates a DataFrame with predefined columns for storing trading data.
+        The quotes live in the quote book so the incoming messages never touch pandas,
+        this method is meant for inspecting them (for example from the CLI).
 
         Returns:
-        - A pandas DataFrame with predefined columns.
+        - A pandas DataFrame with the Symbol, Clearing, Bid, Offer, Size and Price_with_costs columns.
 
         """
-        column_symbol= 'Symbol'
-        column_clearing= 'Clearing'
-        column_bid= 'Bid'
-        column_offer = 'Offer'
-        column_size= "Size"
-        column_price_with_costs = "Price_with_costs"
-        columns=[column_symbol, column_clearing, column_bid, column_offer, column_size, column_price_with_costs]
-        return pd.DataFrame(columns=columns)
+        return self.quote_book.to_df()
 
 
     def format_tickets(self):
-        tickets_24 = self.carrier.format_instruments(self.ticket_to_subscription, liq="24hs")
-        tickets_ci = self.carrier.format_instruments(self.ticket_to_subscription, liq="CI")
-
-        instruments_to_subscription= []
-        instruments_to_subscription = tickets_24
-        instruments_to_subscription.extend(tickets_ci)
-        return instruments_to_subscription
+        # Registering the tickets formats their symbols once, the rest of the session only looks them up
+        return self.carrier.instruments.register_tickers(self.ticket_to_subscription, ["24hs", "CI"])
 
 
 
@@ -94,52 +109,147 @@ class StrategyArbitrationOfClearing(BaseStrategy):
         In this case the main importance is in handle incoming messages which has all the logic for this strategy.
         """
         instruments_to_subscription = self.format_tickets()
-        self.carrier.conect_wb()
         entries = [
             pyRofex.MarketDataEntry.BIDS,
             pyRofex.MarketDataEntry.OFFERS,
         ]
-        self.carrier.market_data_subscription(instruments_to_subscription, entries=entries, handler=self.handle_incoming_messages, depth=1)
+        # The carrier subscribes once for every strategy it runs, and seeds the book with the snapshot it fetches while the websocket connects
+        self.carrier.subscribe_market_data(instruments_to_subscription, entries=entries, handler=self.handle_batch_of_messages, depth=self.depth, conflate=True,
+                                           seed=functools.partial(self.seed_book, instruments_to_subscription, entries))
+
+
+    def seed_book(self, instruments: list, entries: list, snapshot: dict | None = None) -> list:
+        """
+        Fill the quote book with a REST snapshot of the instruments, so the strategy has quotes
+        before the websocket delivers their first update.
+
+        The responses are handled as market data messages, so an arbitrage already open in the
+        snapshot is evaluated like one received through the websocket.
+
+        Args:
+        - instruments: pyRofex symbols of the instruments.
+        - entries: The types of market data of the snapshot.
+        - snapshot: Optional market data responses keyed by symbol, already fetched by the carrier. They are fetched if it's not given.
+
+        Returns:
+        - list: The symbols for which orders were prepared.
+        """
+        if snapshot is None:
+            snapshot = self.carrier.get_market_data_snapshot(instruments, entries, depth=self.depth)
+        messages = [
+            {"type": "Md", "instrumentId": {"marketId": "ROFX", "symbol": symbol}, "marketData": response.get("marketData")}
+            for symbol, response in snapshot.items() if response.get("status") == "OK"
+        ]
+        if not messages:
+            return []
+        sequencer = self.carrier.sequencer
+        if sequencer is not None:
+            return sequencer.call(lambda: self.handle_batch_of_messages(messages))
+        return self.handle_batch_of_messages(messages)
 
 
     def handle_incoming_messages(self, new_data:dict):
-        print(new_data)
+        log.debug("%s", new_data)
+        latency = self.carrier.latency
+        stage_start = latency.start(new_data)
         data_manipulated = self.manipulate_data(new_data)
+        self.update_depth(new_data)
+        stage_start = latency.record("decode", stage_start)
         symbol = data_manipulated["Symbol"]
+        clearing = data_manipulated["Clearing"]
+
+        index = self.quote_book.slot(symbol, clearing)
+        if index is None:
+            self.quote_book.add(data_manipulated)
+            latency.record("book_update", stage_start)
+            # A new clearing of a ticket that was already quoted completes the pair
+            if len(self.quote_book.slots_of(symbol)) > 1:
+                self.start_rows_calculations(symbol)
 
+        # Means that the symbol and clearing already exist in the book,
+        # if the price didn't change only the size did, so there is nothing to do
+        elif self.quote_book.update(index, data_manipulated):
+            latency.record("book_update", stage_start)
+            self.start_rows_calculations(symbol)
 
-        is_new_symbol, index = self._is_new_symbol(data_manipulated)
-        if is_new_symbol:
-            self.add_data_to_df(data_manipulated, index)
 
-        else:
-            is_new_clearing = self.is_new_clearing(data_manipulated)
 
-            if is_new_clearing[0]:
-                self.place_data_bellow_existing_ticket(data_manipulated, index+1)
-                self.start_rows_calculations(symbol)
 
+    def handle_batch_of_messages(self, messages: list) -> list:
+        """
+        Handle a burst of market data messages in a single pass.
 
-            else:
-                # todo 
-                # self.Carrier.cancel_order(symbol)
-                # Means that the symbol and clearing already exist in the df
+        Every message updates the quote book, then the costed prices and the TNA of the
+        whole ticker universe are computed at once and only the symbols touched by the
+        batch that reach `tna_expected` go on to `prepare_orders`.
 
-                # has_same_price_as_before? bid o offer
-                # va a comparar la data con las rows_with_symbol, se va a fijar si la bid o la offer es distinta, si es distinta que agrega la data al df, sino que no haga nada ya que significa que solo se cambio el size
-                clearing = data_manipulated["Clearing"]
-                if clearing == "CI":
-                    price = data_manipulated["Offer"]
-                else:
-                    price = data_manipulated["Bid"]
-                index = is_new_clearing[1]
-                has_same_price = self._has_same_price_as_before(price, index)
-                if not has_same_price:
-                    self.add_data_to_df(data_manipulated, index)
-                    self.start_rows_calculations(symbol)
+        Args:
+        - messages (list): Market data messages as received from the Carrier.
 
+        Returns:
+        - list: The symbols for which orders were prepared.
+        """
+        book = self.quote_book
+        latency = self.carrier.latency
+        touched = np.zeros(book.ticker_count + len(messages), dtype=bool)
+
+        for new_data in messages:
+            log.debug("%s", new_data)
+            stage_start = latency.start(new_data)
+            data_manipulated = self.manipulate_data(new_data)
+            self.update_depth(new_data)
+            stage_start = latency.record("decode", stage_start)
+            index = book.slot(data_manipulated["Symbol"], data_manipulated["Clearing"])
+            if index is None:
+                index = book.add(data_manipulated)
+            elif not book.update(index, data_manipulated):
+                continue
+            latency.record("book_update", stage_start)
+            touched[book.slot_ticker[index]] = True
+
+        count = book.ticker_count
+        touched = touched[:count]
+        if not touched.any():
+            return []
+
+        stage_start = latency.now()
+        tna = self.calculate_tna_batch()
+        latency.record("tna", stage_start)
+        threshold = round(self.tna_expected * TNA_SCALE) if self.fixed_point else self.tna_expected
+        ready = np.flatnonzero(touched & (tna >= threshold))
+        metrics = self.carrier.metrics
+        metrics.inc("pybot_tna_evaluations_total", value=int(np.count_nonzero(touched)))
+        metrics.inc("pybot_opportunities_total", value=len(ready))
+
+        symbols = []
+        for ticker in ready:
+            symbol = book.tickers[ticker]
+            tna_of_ticker = int(tna[ticker]) / TNA_SCALE if self.fixed_point else float(tna[ticker])
+            rows_with_symbol = self.persist_tna_in_rows(self.get_legs(symbol), tna_of_ticker)
+            self.prepare_orders(rows_with_symbol)
+            symbols.append(symbol)
+        return symbols
+
+    def calculate_tna_batch(self) -> np.ndarray:
+        """
+        Calculate the TNA of every ticker of the quote book from the prices with costs cached in it.
 
+        Tickers without both a CI offer and a 48hs bid get a TNA of NaN, so they never reach `tna_expected`.
+        In fixed point mode the TNA are int64 basis points and those tickers get the minimum int64 instead.
 
+        Returns:
+        - np.ndarray: The TNA indexed by ticker id.
+        """
+        book = self.quote_book
+        count = book.ticker_count
+        offer_ci_with_costs = book.ci_offer_with_costs[:count]
+        valid = (book.ci_size[:count] > 0) & (book.size_48[:count] > 0) & (offer_ci_with_costs > 0)
+        if self.fixed_point:
+            return tna_bps_batch(book.bid_48_with_costs[:count], offer_ci_with_costs, valid)
+
+        tna = np.full(count, np.nan)
+        tna[valid] = np.round((book.bid_48_with_costs[:count][valid] / offer_ci_with_costs[valid] - 1) * self._tna_factor, 2)
+        return tna
 
     def manipulate_data(self, new_data:dict) -> dict:
         """
@@ -172,189 +282,78 @@ class StrategyArbitrationOfClearing(BaseStrategy):
         }
 
         Explanation:
-        This function extracts symbol and clearing information from the received market data
+        This function extracts symbol and clearing information from the received market data,
+        through the instrument registry of the carrier so the symbol is never split on each message,
         and manipulates it according to the strategy and dataframe requirements. It then
         returns a dictionary with the manipulated data, including the symbol, clearing,
-        bid, and offer values. If bid and offer values are not available, they are set to None.
+        bid, and offer values. If bid and offer values are not available, they are set to not_value.
         """
 
 
-        symbol_and_clearing = new_data["instrumentId"]["symbol"]
-        symbol_and_clearing = symbol_and_clearing.split(' - ')[-2:]
-        symbol = symbol_and_clearing[0]
-        clearing = symbol_and_clearing[1]
-
+        instrument, price, size = self.carrier.instruments.decode(new_data)
+        symbol = instrument.ticker
+        clearing = instrument.clearing
 
         offer = self.not_value
         bid = self.not_value
-        size = 0
-
-        if clearing == "CI":
-            try:
-                offer = new_data.get("marketData", {}).get("OF", [{}])[0].get("price")
-                size = new_data.get("marketData", {}).get("OF", [{}])[0].get("size")
-            except (IndexError, TypeError):
-                pass
-        elif clearing == "48hs":
-            try:
-                bid = new_data.get("marketData", {}).get("BI", [{}])[0].get("price")
-                size = new_data.get("marketData", {}).get("BI", [{}])[0].get("size")
-            except (IndexError, TypeError):
-                pass
-
-
-            # offer = new_data.get("marketData").get("OF", self.not_value)[0].get("price", self.not_value)
-            # size = new_data.get("marketData").get("OF", self.not_value)[0].get("size", self.not_value)
-
-
-
-        return {'Symbol':symbol, "Clearing":clearing, "Bid": bid, "Offer" : offer, "Size": size, "Price_with_costs": (0, False)}
-
-    def _is_new_symbol(self, data_manipulated: dict) -> tuple[bool, int]:
-        """
-        Checks if there is another equal ticket in some row of the DataFrame.
-
-        Args:
-        - data_manipulated (dict): The data to be checked, containing the symbol of the ticket.
-
-        Returns:
-        - Tuple[bool, int]: A tuple containing a boolean indicating whether the ticket is new or not, and the index of the existing ticket if it exists. If no existing ticket is found, it returns True and the last row index of the DataFrame.
-        """
-
-        ticket_symbol = data_manipulated.get("Symbol")
-        index = self.main_df.index[self.main_df["Symbol"] == ticket_symbol]
-
-        
-        if not index.empty:
-            # If the index is not empty, means the ticket exists
-            return False, index[0]
-        else:
-            # If the index is empty, means the ticket doesn't exist
-            last_row_index = len(self.main_df) 
-            return True, last_row_index
-
-
-    def place_data_bellow_existing_ticket(self, data_to_add: dict, index: int):
-        # If it's a new clearing, insert the data at the specified index and move other rows below
-        new_row = pd.DataFrame([data_to_add])
-        new_row = new_row.fillna(self.not_value)
-        self.main_df = pd.concat([self.main_df.iloc[:index], new_row, self.main_df.iloc[index:]]).reset_index(drop=True)
-
-    def add_data_to_df(self, data_to_add: dict, index: int):
-        """
-        Adds data to the DataFrame at the specified index.
 
-        Args:
-        - data_to_add (dict): The data to be added to the DataFrame.
-        - index (int): The index where the data should be added.
-        - is_new_clearing (bool, optional): Indicates whether it's a new clearing or not.
-        If True, the data is inserted at the specified index and moves the other rows below.
-        If False, the data is replaced at the specified index.
-
-        Returns:
-        - None
-        """
-
-        self.main_df.loc[index] = data_to_add
+        if price is not None:
+            if clearing == "CI":
+                offer = price
+            else:
+                bid = price
 
+        return {'Symbol':symbol, "Clearing":clearing, "Bid": bid, "Offer" : offer, "Size": size}
 
-    
-    def is_new_clearing(self, data_manipulated: dict) -> bool | tuple:
+    def update_depth(self, new_data: dict) -> None:
         """
-        Checks if the clearing of the given row is different from the new data.
-
-        Args:
-        - data_manipulated (dict): The new data to be checked.
-        - index (int): The index of the row in the DataFrame to be compared.
-
-        Returns:
-        - bool: True if the clearing of the specified row is different from the new data, False otherwise.
-        - tuple: A tuple containing the result (True or False) and the index of the row if found.
+        Replace the levels of the instrument of the message in the depth book.
         """
-        clearing = data_manipulated.get("Clearing")
-        symbol = data_manipulated.get("Symbol")
-
-        # Check if there exists at least one row with symbol name and same clearing
-        rows_with_clearing = self.main_df[(self.main_df['Symbol'] == symbol) & (self.main_df['Clearing'] == clearing)]
-        
-        if not rows_with_clearing.empty:
-            # If at least one row with the same symbol and clearing is found, return False and the index
-            return False, rows_with_clearing.index[0]
-        else:
-            # If no matching rows are found, return True
-            return True,
-    
-    def _has_same_price_as_before(self, price, index):
-
-        return price in self.main_df.iloc[index].tolist()
+        instrument, levels = self.carrier.instruments.decode_levels(new_data)
+        self.depth_book.update(instrument.ticker, instrument.clearing, levels)
 
 
     def start_rows_calculations(self, symbol):
-        rows_with_symbol_df = self.get_symbol_rows(symbol)
-        # if not (rows_with_symbol_df["Bid"] == self.main_df["Bid"])
-        if not (rows_with_symbol_df['Size'] == 0).any():
-            tna = self.calculate_tna(rows_with_symbol_df)
-            print("TNA: ", tna, symbol)
-            rows_with_symbol_df = self.get_symbol_rows(symbol)
-            rows_with_symbol_df = self.persist_tna_in_df(rows_with_symbol_df, tna)
+        rows_with_symbol = self.get_legs(symbol)
+        if rows_with_symbol and not any(row["Size"] == 0 for row in rows_with_symbol):
+            stage_start = self.carrier.latency.now()
+            tna = self.calculate_tna(symbol)
+            self.carrier.latency.record("tna", stage_start)
+            self.carrier.metrics.inc("pybot_tna_evaluations_total")
+            log.info("TNA: %s %s", tna, symbol)
+            rows_with_symbol = self.get_legs(symbol)
+            rows_with_symbol = self.persist_tna_in_rows(rows_with_symbol, tna)
             if tna >= self.tna_expected:
-                self.prepare_orders(rows_with_symbol_df)
+                self.carrier.metrics.inc("pybot_opportunities_total")
+                self.prepare_orders(rows_with_symbol)
             else:
                 return ("No se mando orden por no tener TNA requerida")   
 
 
-    def calculate_tna(self, rows_with_symbol_df) -> float:
+    def calculate_tna(self, symbol) -> float:
         """
-        Calculate TNA (Total Net Assets) for the given symbol.
+        Calculate TNA (Tasa Nominal Anual) for the given symbol.
+
+        The prices with costs are cached in the quote book, they are only computed when a quote changes.
 
         Args:
-        - symbol (str): The symbol for which TNA is to be calculated.
+        - symbol (str): The symbol for which TNA is to be calculated, it must have its CI and 48hs quotes in the book.
 
         Returns:
-        - Tuple[float, List[dict]]: A tuple containing the calculated TNA and a list of dictionaries representing the rows with the specified symbol.
+        - float: The calculated TNA.
         """
-
-        row_48 = rows_with_symbol_df.loc[rows_with_symbol_df['Clearing'] == '48hs']
-        row_ci = rows_with_symbol_df.loc[rows_with_symbol_df['Clearing'] == 'CI']
-
-        bid_48 = row_48["Bid"].values[0], row_48["Price_with_costs"].values[0]
-        offer_ci = row_ci["Offer"].values[0], row_ci["Price_with_costs"].values[0]
-
-
-        bid_48_value = bid_48[0]
-        offer_ci_value = offer_ci[0]
-
-
-        if False in bid_48[1]:
-            bid_48_value  = self.add_costs({"Sell": bid_48_value})
-            index_row_48 = row_48.index[0]
-
-            self.main_df.at[index_row_48, "Price_with_costs"] = (bid_48_value, True)
-        if False in offer_ci[1]:
-            offer_ci_value = self.add_costs({"Buy": offer_ci_value})
-            index_row_ci = row_ci.index[0]
-
-            
-            self.main_df.at[index_row_ci, "Price_with_costs"] = (offer_ci_value, True)
-
-
-        tna = round((((bid_48_value / offer_ci_value - 1) / 2) * 365) * 100, 2)
-
-        return tna    
+        book = self.quote_book
+        sell_with_costs, buy_with_costs = book.price_with_costs[book.slot(symbol, "48hs")], book.price_with_costs[book.slot(symbol, "CI")]
+        if self.fixed_point:
+            return tna_bps(sell_with_costs, buy_with_costs) / TNA_SCALE
+        return self._tna(sell_with_costs, buy_with_costs)
     
-    def persist_tna_in_df(self, rows_with_symbol_df, tna):
+    def persist_tna_in_rows(self, rows_with_symbol, tna):
         
-        # rows_with_symbol_df["TNA"] = tna
-        rows_with_symbol_df.loc[:, "TNA"] = tna
+        for row in rows_with_symbol:
+            row["TNA"] = tna
         
-        return rows_with_symbol_df
-
-    def _clean_rows_in_df(self, rows_with_symbol_df):
-        indexes = rows_with_symbol_df.index.to_list()
-        # this is not necessary
-        # self.main_df.loc[indexes, self.column_bid] = self.not_value
-        # self.main_df.loc[indexes, self.column_offer] = self.not_value
-        self.main_df.loc[indexes, "Size"] = self.not_value
+        return rows_with_symbol
 
     def _format_order(self, rows_with_symbol_dict):
 
@@ -369,22 +368,122 @@ class StrategyArbitrationOfClearing(BaseStrategy):
         return order_buy, order_sell
     
     def get_symbol_rows(self, symbol):
-        return self.main_df[self.main_df["Symbol"] == symbol].copy()
-
-    def transform_rows_into_dict(self, rows_with_symbol_df):
-        rows_with_symbol_dict = rows_with_symbol_df.to_dict(orient='records')
-        return rows_with_symbol_dict
-
-    def determine_size_order(self, rows_with_symbol_df):
-        min_size = rows_with_symbol_df['Size'].min()
-        rows_with_symbol_df['Size'] = min_size
-        return rows_with_symbol_df
-
-    def prepare_orders(self, rows_with_symbol_df):
-        rows_with_symbol_df = self.determine_size_order(rows_with_symbol_df)
-        rows_with_symbol_dict =  self.transform_rows_into_dict(rows_with_symbol_df)
-        # self._clean_rows_in_df(rows_with_symbol_df)
-        order_buy, order_sell = self._format_order(rows_with_symbol_dict)
+        return self.quote_book.symbol_rows(symbol)
+
+    def get_legs(self, symbol) -> list:
+        """
+        Returns the rows of the CI and 48hs quotes of the symbol, the legs of its arbitrage, or an empty
+        list if one of them wasn't quoted yet. Quotes of other clearings never become a leg.
+        """
+        book = self.quote_book
+        slots = (book.slot(symbol, "CI"), book.slot(symbol, "48hs"))
+        if None in slots:
+            return []
+        return [book.row(index) for index in slots]
+
+    def determine_size_order(self, rows_with_symbol):
+        """
+        Size the legs walking the depth book, or with the smallest size of the top of the book if there is no depth.
+
+        With depth the legs get the size, the limit prices (the last level taken of each book),
+        the volume weighted prices with costs and the volume weighted TNA found by `walk_depth`.
+        """
+        symbol = rows_with_symbol[0]["Symbol"]
+        walk = self.walk_depth(self.depth_book.levels(symbol, "CI"), self.depth_book.levels(symbol, "48hs"))
+        if walk is None:
+            min_size = min(row["Size"] for row in rows_with_symbol)
+            for row in rows_with_symbol:
+                row["Size"] = min_size
+            return rows_with_symbol
+
+        for row in rows_with_symbol:
+            row["Size"] = walk["Size"]
+            row["TNA"] = walk["TNA"]
+            if row["Clearing"] == "CI":
+                row["Offer"] = walk["Offer"]
+                row["Price_with_costs"] = walk["Buy_with_costs"]
+            elif row["Clearing"] == "48hs":
+                row["Bid"] = walk["Bid"]
+                row["Price_with_costs"] = walk["Sell_with_costs"]
+        return rows_with_symbol
+
+    def walk_depth(self, offers_ci: list, bids_48: list) -> dict | None:
+        """
+        Walk the CI offers and the 48hs bids level by level while the TNA of the next units still reaches `tna_expected`.
+
+        Both books get worse level after level, so once a pair of levels falls below the threshold the
+        rest do too, and every unit taken clears it: so does their volume weighted TNA.
+
+        Args:
+        - offers_ci: (price, size) levels of the CI offers, best first.
+        - bids_48: (price, size) levels of the 48hs bids, best first.
+
+        Returns:
+        - dict: The Size, the limit prices (Offer and Bid), the volume weighted prices with costs and their TNA.
+        The Size is 0 if not even the first levels reach the threshold. None if a book has no levels.
+        """
+        if not offers_ci or not bids_48:
+            return None
+
+        offer_index = bid_index = 0
+        offer_price, offer_left = offers_ci[0]
+        bid_price, bid_left = bids_48[0]
+        buy_with_costs = self.add_costs({"Buy": offer_price})
+        sell_with_costs = self.add_costs({"Sell": bid_price})
+        size, buy_total, sell_total = 0, 0.0, 0.0
+        walk = {"Size": 0}
+
+        while self.tna_of(sell_with_costs, buy_with_costs) >= self.tna_expected:
+            units = min(offer_left, bid_left)
+            size += units
+            buy_total += units * buy_with_costs
+            sell_total += units * sell_with_costs
+            walk["Offer"], walk["Bid"] = offer_price, bid_price
+            offer_left -= units
+            bid_left -= units
+
+            if offer_left == 0:
+                offer_index += 1
+                if offer_index == len(offers_ci):
+                    break
+                offer_price, offer_left = offers_ci[offer_index]
+                buy_with_costs = self.add_costs({"Buy": offer_price})
+            if bid_left == 0:
+                bid_index += 1
+                if bid_index == len(bids_48):
+                    break
+                bid_price, bid_left = bids_48[bid_index]
+                sell_with_costs = self.add_costs({"Sell": bid_price})
+
+        if size:
+            walk["Size"] = size
+            walk["Buy_with_costs"] = round(buy_total / size, 2)
+            walk["Sell_with_costs"] = round(sell_total / size, 2)
+            walk["TNA"] = self.tna_of(sell_total, buy_total)
+        return walk
+
+    # The TNA of a two days arbitrage, in percentage: (sell / buy - 1) / 2 * 365 * 100
+    _tna_factor = 365 / 2 * 100
+
+    @classmethod
+    def _tna(cls, sell_with_costs: float, buy_with_costs: float) -> float:
+        return round((sell_with_costs / buy_with_costs - 1) * cls._tna_factor, 2)
+
+    def tna_of(self, sell_with_costs: float, buy_with_costs: float) -> float:
+        """
+        TNA of the prices with costs in pesos, computed in basis points in fixed point mode.
+        """
+        if self.fixed_point:
+            return tna_bps(to_ticks(sell_with_costs), to_ticks(buy_with_costs)) / TNA_SCALE
+        return self._tna(sell_with_costs, buy_with_costs)
+
+    def prepare_orders(self, rows_with_symbol):
+        stage_start = self.carrier.latency.now()
+        rows_with_symbol = self.determine_size_order(rows_with_symbol)
+        if rows_with_symbol[0]["Size"] == 0:
+            return ("No se mando orden por no tener TNA requerida")
+        order_buy, order_sell = self._format_order(rows_with_symbol)
+        self.carrier.latency.record("order_legs", stage_start)
         self.carrier.send_orders_wb([order_buy, order_sell])
         return ("La TNA cumple con los requerimientos")
 
@@ -395,19 +494,12 @@ class StrategyArbitrationOfClearing(BaseStrategy):
 
         
         if "Sell" in dict_price:
-            value = dict_price["Sell"]
-
-            costs = value * self.costs / 100
-            iva = costs * 21 / 100
-            value = value-costs-iva
-            
-            return round(value, 2)
+            price, multiplier = dict_price["Sell"], self.sell_multiplier
         else:
-            value = dict_price["Buy"]
-            costs = value * self.costs / 100
-            iva = costs * 21 / 100
-            value = value+costs+iva
-            return round(value, 2)
+            price, multiplier = dict_price["Buy"], self.buy_multiplier
+        if self.fixed_point:
+            return from_ticks(apply_costs(to_ticks(price), multiplier))
+        return round(price * multiplier, 2)
 
 
             
@@ -423,6 +515,5 @@ class StrategyArbitrationOfClearing(BaseStrategy):
 
         # orders_df.drop(columns=['Bid', 'Offer'], inplace=True)
         del order['Bid'], order["Offer"]
-        order["Price_with_costs"] = order["Price_with_costs"][0]
         return order
 
@@ -0,0 +1,147 @@
+from async_carrier import AsyncCarrier
+from broker import Broker
+from unittest.mock import patch
+import threading
+import pyRofex
+import pytest
+
+
+class TestAsyncCarrier:
+
+    @pytest.fixture
+    def orders_list(self):
+        return [
+            {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': 1000, 'TNA': 14995.33, 'Side': 'buy'},
+            {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': 95440.66, 'TNA': 14995.33, 'Side': 'sell'},
+        ]
+
+    @pytest.fixture
+    def carrier(self):
+        broker = Broker(credentials=None, budget=9000)
+        carrier = AsyncCarrier(broker, report_timeout=0.2)
+        yield carrier
+        carrier.stop_loop()
+
+    @staticmethod
+    def reporting(carrier, statuses):
+        """
+        Returns a stub of the websocket send that answers each order with the order reports of its side.
+        """
+        def send(ticker, side, size, price, ws_client_order_id):
+            for status in statuses[side]:
+                carrier._order_report_handler({'orderReport': {'wsClOrdId': ws_client_order_id, 'clOrdId': f"cl-{ws_client_order_id}", 'status': status, 'text': ''}})
+        return send
+
+    @pytest.mark.parametrize(
+    "statuses, expected_filled, expected_cancels, expected_budget",
+        [
+            (
+                {pyRofex.Side.BUY: ["NEW", "FILLED"], pyRofex.Side.SELL: ["NEW", "FILLED"]},
+                ["buy", "sell"],
+                0,
+                764525.28
+            ),
+            (
+                {pyRofex.Side.BUY: ["NEW", "FILLED"], pyRofex.Side.SELL: ["NEW"]},
+                ["buy"],
+                1,
+                1000
+            ),
+            (
+                {pyRofex.Side.BUY: ["NEW"], pyRofex.Side.SELL: ["REJECTED"]},
+                [],
+                1,
+                1000
+            ),
+        ]
+    ,ids=["Test Case 1: Both legs filled", "Test Case 2: Sell leg is cancelled after the deadline", "Test Case 3: Rejected leg isn't cancelled"])
+    def test_send_orders(self, carrier, orders_list, statuses, expected_filled, expected_cancels, expected_budget):
+        with patch.object(carrier, '_send_order_via_websocket', side_effect=self.reporting(carrier, statuses)) as mock_send, \
+                patch.object(carrier, 'cancel_order') as mock_cancel_order, \
+                patch.object(carrier, '_save_order') as mock_save_order:
+            filled = carrier.send_orders_wb(orders_list).result(timeout=5)
+
+        assert [order['Side'] for order in filled] == expected_filled
+        assert mock_send.call_count == 2
+        assert {call_args[0][2] for call_args in mock_send.call_args_list} == {8}
+        assert mock_cancel_order.call_count == expected_cancels
+        assert mock_save_order.call_count == len(expected_filled)
+        assert carrier.broker.budget == expected_budget
+
+    def test_no_legs_sent_without_budget(self, carrier, orders_list):
+        carrier.broker.budget = 100
+
+        with patch.object(carrier, '_send_order_via_websocket') as mock_send:
+            filled = carrier.send_orders_wb(orders_list).result(timeout=5)
+
+        assert filled == []
+        assert mock_send.call_count == 0
+
+    def test_partial_fill_cancelled_is_saved_with_what_was_executed(self, carrier, orders_list):
+        def send(ticker, side, size, price, ws_client_order_id):
+            report = {'wsClOrdId': ws_client_order_id, 'clOrdId': f"cl-{ws_client_order_id}", 'text': ''}
+            if side == pyRofex.Side.BUY:
+                carrier._order_report_handler({'orderReport': dict(report, status='FILLED', cumQty=8)})
+            else:
+                carrier._order_report_handler({'orderReport': dict(report, status='PARTIALLY_FILLED', cumQty=3, avgPx=95700.0)})
+
+        def cancel(client_order_id):
+            carrier._order_report_handler({'orderReport': {'clOrdId': client_order_id, 'status': 'CANCELLED', 'text': '', 'cumQty': 3, 'avgPx': 95700.0}})
+
+        with patch.object(carrier, '_send_order_via_websocket', side_effect=send), \
+                patch.object(carrier, 'cancel_order', side_effect=cancel), \
+                patch.object(carrier, '_save_order') as mock_save_order:
+            filled = carrier.send_orders_wb(orders_list).result(timeout=5)
+
+        assert [order['Side'] for order in filled] == ["buy"]
+        saved = [call_args[0][0] for call_args in mock_save_order.call_args_list]
+        assert [(order['Side'], order['Size']) for order in saved] == [("buy", 8), ("sell", 3)]
+        assert (saved[1]['Bid'], saved[1]['Price_with_costs']) == (95700.0, 95520.51)
+
+    def test_failed_send_releases_the_reservation(self, carrier, orders_list):
+        with patch.object(carrier, '_send_order_via_websocket', side_effect=ConnectionError("websocket closed")) as mock_send:
+            assert carrier.send_orders_wb(orders_list).result(timeout=5) == []
+
+        assert mock_send.call_count == 2
+        stats = carrier.broker.ledger.stats()
+        assert (stats["available"], stats["reserved"], stats["open_orders"]) == (9000, 0, 0)
+        assert len(carrier.order_tracker) == 0
+
+    def test_disconnect_waits_for_the_legs_in_flight(self, carrier, orders_list):
+        def send(ticker, side, size, price, ws_client_order_id):
+            # The fills arrive after the disconnect was asked for
+            report = {'wsClOrdId': ws_client_order_id, 'clOrdId': f"cl-{ws_client_order_id}", 'status': 'FILLED', 'text': ''}
+            threading.Timer(0.05, carrier._order_report_handler, args=({'orderReport': report},)).start()
+
+        with patch.object(carrier, '_send_order_via_websocket', side_effect=send), \
+                patch.object(carrier.orders_table, 'save_row') as mock_save_row, \
+                patch('pyRofex.close_websocket_connection'):
+            future = carrier.send_orders_wb(orders_list)
+            carrier.wb_disconnect()
+
+        assert [order['Side'] for order in future.result(timeout=0)] == ["buy", "sell"]
+        assert mock_save_row.call_count == 2
+        assert not carrier.orders_writer.put(orders_list[0])
+
+    def test_settle_cancels_and_saves_the_legs_filled(self, carrier, orders_list):
+        def send(ticker, side, size, price, ws_client_order_id):
+            if side == pyRofex.Side.BUY:
+                carrier._order_report_handler({'orderReport': {'wsClOrdId': ws_client_order_id, 'clOrdId': f"cl-{ws_client_order_id}", 'status': 'FILLED', 'text': ''}})
+
+        carrier.report_timeout = 5
+        with patch.object(carrier, '_send_order_via_websocket', side_effect=send), \
+                patch.object(carrier, '_save_order') as mock_save_order:
+            future = carrier.send_orders_wb(orders_list)
+            assert carrier.settle(timeout=0.1) == 1
+
+        assert future.cancelled()
+        assert [call_args[0][0]['Side'] for call_args in mock_save_order.call_args_list] == ["buy"]
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
@@ -1,5 +1,6 @@
 from unittest.mock import Mock, patch, call, MagicMock
 from carrier import Carrier
+from broker import Broker
 from orders_table import OrdersTable
 import pytest
 
@@ -9,8 +10,7 @@ class TestCarrier:
 
     @pytest.fixture
     def mock_broker(self):
-        mock = Mock()
-        return mock
+        return Broker(credentials=None)
     
     @pytest.fixture
     def carrier(self, mock_broker):
@@ -25,15 +25,15 @@ class TestCarrier:
     "orders_list, budget, format_instruments_params, budget_substracting_costs, expected_order_size, order_status ",
         [
             (   
-                [{'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': (52392.08, True), 'TNA': 14995.33, 'Side': 'buy'}, {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': (95440.66, True), 'TNA': 14995.33, 'Side': 'sell'}],
+                [{'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': 52392.08, 'TNA': 14995.33, 'Side': 'buy'}, {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': 95440.66, 'TNA': 14995.33, 'Side': 'sell'}],
                 90000,
                 [call("ALUA", "CI"), call("ALUA", "48hs")],
-                37607.92,
+                133048.58,
                 1,
                 MagicMock(return_value={"order": {"text": "Operada "}})
             ),
             (   
-                [{'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': (52392.08, True), 'TNA': 14995.33, 'Side': 'buy'}, {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': (95440.66, True), 'TNA': 14995.33, 'Side': 'sell'}],
+                [{'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': 52392.08, 'TNA': 14995.33, 'Side': 'buy'}, {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': 95440.66, 'TNA': 14995.33, 'Side': 'sell'}],
                 100,
                 None,
                 None,
@@ -41,18 +41,18 @@ class TestCarrier:
                 None
             ),
             (   
-                    [{'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': (1000, True), 'TNA': 14995.33, 'Side': 'buy'}, {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': (95440.66, True), 'TNA': 14995.33, 'Side': 'sell'}],
+                    [{'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': 1000, 'TNA': 14995.33, 'Side': 'buy'}, {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': 95440.66, 'TNA': 14995.33, 'Side': 'sell'}],
                     9000,
                     [call("ALUA", "CI"), call("ALUA", "48hs")],
-                    1000,
+                    764525.28,
                     8,
                     MagicMock(return_value={"order": {"text": "Operada "}})
             ),
             (   
-                    [{'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': (1000, True), 'TNA': 14995.33, 'Side': 'buy'}, {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': (95440.66, True), 'TNA': 14995.33, 'Side': 'sell'}],
+                    [{'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 52294.0, 'Size': 8, 'Price_with_costs': 1000, 'TNA': 14995.33, 'Side': 'buy'}, {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 95620.0, 'Offer': 0.0, 'Size': 8, 'Price_with_costs': 95440.66, 'TNA': 14995.33, 'Side': 'sell'}],
                     9000,
                     [call("ALUA", "CI")],
-                    1000,
+                    9000,
                     8,
                     MagicMock(return_value={"order": {"text": "Not operada"}})
             ),
@@ -77,7 +77,7 @@ class TestCarrier:
 
             carrier.send_orders(orders_list)
 
-            if budget >= orders_list[0]["Price_with_costs"][0]:
+            if budget >= orders_list[0]["Price_with_costs"]:
                 if order_status.return_value["order"]["text"] == "Operada ":
                     assert format_instruments.call_args_list == format_instruments_params
                     assert mock_sended_order.call_count == 2
@@ -96,6 +96,67 @@ class TestCarrier:
                 assert format_instruments.call_count == 0
                 assert mock_save_row.call_count == 0
 
+    def test_send_orders_wb_saves_the_legs_filled_by_the_order_reports(self):
+        credentials = {"account": "account", "user": "user", "password": "password", "broker_name": "veta"}
+        broker = Broker(credentials=credentials, budget=90000, connect=False)
+        carrier = Carrier(broker)
+        orders_list = [
+            {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 500.0, 'Size': 1, 'Price_with_costs': 501.5, 'TNA': 150.0, 'Side': 'buy'},
+            {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 510.0, 'Offer': 0.0, 'Size': 1, 'Price_with_costs': 508.5, 'TNA': 150.0, 'Side': 'sell'},
+        ]
+
+        with patch('pyRofex.init_websocket_connection'), \
+                patch('pyRofex.order_report_subscription') as mock_subscription, \
+                patch('pyRofex.send_order_via_websocket'), \
+                patch.object(carrier, '_save_order') as mock_save_order:
+            carrier.conect_wb()
+            assert mock_subscription.call_args[0][0] == "account"
+            report_handler = mock_subscription.call_args[1]['handler']
+
+            sent = carrier.send_orders_wb(orders_list)
+            for tracked_order in sent:
+                report_handler({'orderReport': {'wsClOrdId': tracked_order.ws_client_order_id, 'clOrdId': f"cl-{tracked_order.ws_client_order_id}",
+                                                'status': 'FILLED', 'text': 'Operada', 'cumQty': 1, 'accountId': {'id': 'account'}}})
+
+        assert all(carrier.await_for_order_complete(tracked_order, timeout=1) for tracked_order in sent)
+        assert mock_save_order.call_args_list == [call(orders_list[0]), call(orders_list[1])]
+        stats = broker.ledger.stats()
+        assert (stats["reserved"], stats["open_orders"]) == (0, 0)
+
+    def test_partial_fill_cancelled_is_saved_with_what_was_executed(self):
+        broker = Broker(credentials=None, budget=90000)
+        carrier = Carrier(broker)
+        order_buy = {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 500.0, 'Size': 8, 'Price_with_costs': 501.5, 'TNA': 150.0, 'Side': 'buy'}
+
+        with patch('pyRofex.send_order_via_websocket'), \
+                patch('pyRofex.cancel_order_via_websocket') as mock_cancel, \
+                patch.object(carrier, '_save_order') as mock_save_order:
+            buy, = carrier.send_orders_wb([order_buy])
+            report = {'wsClOrdId': buy.ws_client_order_id, 'clOrdId': 'cl-1', 'text': '', 'originatingUsername': 'PBCP'}
+            carrier._order_report_handler({'orderReport': dict(report, status='PARTIALLY_FILLED', cumQty=4, avgPx=499.0)})
+            mock_cancel.assert_called_once_with(client_order_id='cl-1')
+            carrier._order_report_handler({'orderReport': dict(report, status='CANCELLED', cumQty=4, avgPx=499.0)})
+
+        saved = mock_save_order.call_args[0][0]
+        assert (saved['Size'], saved['Offer'], saved['Price_with_costs']) == (4, 499.0, 500.5)
+        assert broker.ledger.stats()["spent"] == 2006.0
+
+    def test_failed_send_releases_the_reservation(self):
+        broker = Broker(credentials=None, budget=90000)
+        carrier = Carrier(broker)
+        orders_list = [
+            {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 500.0, 'Size': 10, 'Price_with_costs': 501.5, 'TNA': 150.0, 'Side': 'buy'},
+            {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 510.0, 'Offer': 0.0, 'Size': 10, 'Price_with_costs': 508.5, 'TNA': 150.0, 'Side': 'sell'},
+        ]
+
+        with patch('pyRofex.send_order_via_websocket', side_effect=ConnectionError("websocket closed")) as mock_send:
+            assert carrier.send_orders_wb(orders_list) == []
+
+        assert mock_send.call_count == 1
+        stats = broker.ledger.stats()
+        assert (stats["available"], stats["reserved"], stats["open_orders"]) == (90000, 0, 0)
+        assert len(carrier.order_tracker) == 0
+
 
 if __name__ == '__main__':
     # [-s] es para ver los prints
@@ -0,0 +1,53 @@
+from conflation import ConflatingInbox, InboxDrainer
+import threading
+import pytest
+
+
+class TestConflatingInbox:
+
+    @staticmethod
+    def message(symbol, price):
+        return {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': symbol}, 'marketData': {'BI': [], 'OF': [{'price': price, 'size': 1}]}}
+
+    @pytest.fixture
+    def inbox(self):
+        return ConflatingInbox()
+
+    def test_keeps_only_latest_message_per_instrument(self, inbox):
+        inbox.put(self.message('MERV - XMEV - ALUA - CI', 10))
+        inbox.put(self.message('MERV - XMEV - ALUA - 48hs', 11))
+        inbox.put(self.message('MERV - XMEV - ALUA - CI', 12))
+
+        messages = inbox.drain()
+
+        assert [message['marketData']['OF'][0]['price'] for message in messages] == [12, 11]
+        assert inbox.stats() == {"received": 3, "conflated": 1, "max_depth": 2, "depth": 0}
+
+    def test_drain_on_empty_inbox(self, inbox):
+        assert inbox.drain() == []
+        assert not inbox.wait(0)
+
+    def test_drainer_hands_batches_to_handler(self, inbox):
+        handled = []
+        done = threading.Event()
+
+        def handler(messages):
+            handled.extend(messages)
+            done.set()
+
+        drainer = InboxDrainer(inbox, handler, poll_interval=0.01)
+        drainer.start()
+        inbox.put(self.message('MERV - XMEV - ALUA - CI', 10))
+        assert done.wait(1)
+        drainer.stop()
+
+        assert len(handled) == 1
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
@@ -0,0 +1,83 @@
+from event_log import EventLog, DEBUG, INFO, ERROR
+import threading
+import pytest
+
+
+class CountsFormatting:
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "formatted"
+
+
+class TestEventLog:
+
+    @pytest.fixture
+    def event_log(self):
+        event_log = EventLog(capacity=8, level=INFO)
+        yield event_log
+        event_log.close()
+
+    def test_events_below_the_level_are_not_kept(self, event_log):
+        event_log.debug("%s", {"type": "Md"})
+        event_log.info("TNA: %s %s", 56.77, "ALUA")
+
+        lines = event_log.tail(10)
+        assert len(lines) == 1
+        assert lines[0].endswith("INFO TNA: 56.77 ALUA")
+
+    def test_messages_are_formatted_only_when_read(self, event_log):
+        argument = CountsFormatting()
+        event_log.info("%s", argument)
+        assert argument.calls == 0
+
+        assert event_log.tail(1)[0].endswith("formatted")
+        assert argument.calls == 1
+
+    def test_tail_returns_the_last_events_oldest_first(self, event_log):
+        for number in range(20):
+            event_log.info("event %s", number)
+
+        assert [line.split(" ", 2)[2] for line in event_log.tail(3)] == ["event 17", "event 18", "event 19"]
+        assert len(event_log.tail(100)) == 8
+
+    def test_flush_writes_the_events_and_counts_the_overwritten(self, event_log, tmp_path):
+        path = tmp_path / "events.log"
+        event_log.open(str(path), flush_interval=60)
+        for number in range(12):
+            event_log.info("event %s", number)
+        event_log.error("Mensaje de error: %s", "boom")
+        event_log.close()
+
+        lines = path.read_text().splitlines()
+        assert lines[-1].endswith("ERROR Mensaje de error: boom")
+        assert [line.split(" ", 2)[2] for line in lines[:-1]] == [f"event {number}" for number in range(5, 12)]
+        assert event_log.stats() == {"level": "INFO", "flushed": 13, "dropped": 5}
+
+    def test_threads_log_without_losing_events(self):
+        event_log = EventLog(capacity=4000, level=DEBUG)
+
+        def log_events(thread):
+            for number in range(1000):
+                event_log.log(DEBUG if number % 2 else ERROR, "thread %s event %s", thread, number)
+
+        threads = [threading.Thread(target=log_events, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert event_log.flush() == 4000
+        assert event_log.dropped == 0
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
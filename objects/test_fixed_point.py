@@ -0,0 +1,66 @@
+from fixed_point import RATE_SCALE, to_ticks, from_ticks, cost_multipliers, apply_costs, tna_bps, tna_bps_batch
+import numpy as np
+import pytest
+
+
+class TestFixedPoint:
+
+    @pytest.mark.parametrize(
+    "price, expected_ticks",
+        [
+            (2027.5, 202750),
+            (0.29, 29),
+            (0.0, 0),
+            (None, 0),
+        ]
+    ,ids=["Test Case 1: Price with decimals", "Test Case 2: Price that isn't exact as a float", "Test Case 3: Not value", "Test Case 4: Missing price"])
+    def test_to_ticks(self, price, expected_ticks):
+        assert to_ticks(price) == expected_ticks
+
+    def test_cost_multipliers_are_exact(self):
+        # 0.23% of costs plus 21% of IVA on them are 27.83 basis points
+        assert cost_multipliers(0.23, 21) == (RATE_SCALE + 2783, RATE_SCALE - 2783)
+
+    @pytest.mark.parametrize(
+    "price, side, expected_price_with_costs",
+        [
+            (73220.00, "Buy", 73423.77),
+            (1260.5, "Sell", 1256.99),
+            (1260.5, "Buy", 1264.01),
+        ]
+    ,ids=["Test Case 1: Buy", "Test Case 2: Sell", "Test Case 3: Buy of the same price"])
+    def test_apply_costs(self, price, side, expected_price_with_costs):
+        buy_multiplier, sell_multiplier = cost_multipliers(0.23, 21)
+        multiplier = buy_multiplier if side == "Buy" else sell_multiplier
+
+        assert from_ticks(apply_costs(to_ticks(price), multiplier)) == expected_price_with_costs
+
+    @pytest.mark.parametrize(
+    "sell_ticks, buy_ticks, expected_bps",
+        [
+            (1496, 1003, 897034),
+            (202186, 201559, 5677),
+            (201559, 202186, -5660),
+            (1000, 1000, 0),
+        ]
+    ,ids=["Test Case 1: High TNA", "Test Case 2: Low TNA", "Test Case 3: Negative TNA", "Test Case 4: Same prices"])
+    def test_tna_bps(self, sell_ticks, buy_ticks, expected_bps):
+        assert tna_bps(sell_ticks, buy_ticks) == expected_bps
+
+    def test_tna_bps_batch(self):
+        sell_ticks = np.array([1496, 202186, 0], dtype=np.int64)
+        buy_ticks = np.array([1003, 201559, 0], dtype=np.int64)
+
+        tna = tna_bps_batch(sell_ticks, buy_ticks, buy_ticks > 0)
+
+        assert tna.dtype == np.int64
+        assert tna.tolist() == [897034, 5677, np.iinfo(np.int64).min]
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
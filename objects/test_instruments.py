@@ -0,0 +1,61 @@
+from instruments import InstrumentRegistry
+import pytest
+
+
+class TestInstrumentRegistry:
+
+    @pytest.fixture
+    def registry(self):
+        return InstrumentRegistry()
+
+    def test_register_tickers(self, registry):
+        symbols = registry.register_tickers(["ALUA", "BYMA"], ["24hs", "CI"])
+
+        assert symbols == ['MERV - XMEV - ALUA - 24hs', 'MERV - XMEV - BYMA - 24hs', 'MERV - XMEV - ALUA - CI', 'MERV - XMEV - BYMA - CI']
+        assert [instrument.id for instrument in registry.instruments] == [0, 1, 2, 3]
+        assert registry.get('MERV - XMEV - BYMA - CI') is registry.register("BYMA", "CI")
+        assert registry.order_ticker("ALUA", "CI") is symbols[2]
+
+    @pytest.mark.parametrize(
+        "message, expected_result",
+        [
+            (
+                {'type': 'Md', 'timestamp': 1710873570879, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [{'price': 84000.0, 'size': 3}], 'OF': [{'price': 84990.0, 'size': 46}]}},
+                ('ALUA', 'CI', 84990.0, 46)
+            ),
+            (
+                {'type': 'Md', 'timestamp': 1710873570879, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'BI': [{'price': 84000.0, 'size': 3}], 'OF': [{'price': 84990.0, 'size': 46}]}},
+                ('ALUA', '48hs', 84000.0, 3)
+            ),
+            (
+                {'type': 'Md', 'timestamp': 1710873570879, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'BI': [], 'OF': []}},
+                ('ALUA', '48hs', None, 0)
+            ),
+            (
+                {'type': 'Md', 'timestamp': 1710873570879, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 24hs'}, 'marketData': {'BI': [{'price': 84000.0, 'size': 3}]}},
+                ('ALUA', '24hs', None, 0)
+            ),
+        ],
+        ids=["Test Case 1: CI reads the offers", "Test Case 2: 48hs reads the bids", "Test Case 3: Empty book", "Test Case 4: Clearing without entry"],
+    )
+    def test_decode(self, registry, message, expected_result):
+        instrument, price, size = registry.decode(message)
+
+        assert (instrument.ticker, instrument.clearing, price, size) == expected_result
+
+
+    def test_decode_levels(self, registry):
+        message = {'type': 'Md', 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [{'price': 83000.0, 'size': 1}], 'OF': [{'price': 84990.0, 'size': 46}, {'price': 85000.0, 'size': 0}, {'price': 85010.0, 'size': 7}]}}
+
+        instrument, levels = registry.decode_levels(message)
+
+        assert (instrument.ticker, instrument.clearing) == ('ALUA', 'CI')
+        assert levels == [(84990.0, 46), (85010.0, 7)]
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
@@ -0,0 +1,72 @@
+from latency import LatencyHistogram, LatencyTracker
+import pytest
+import threading
+
+
+class TestLatencyHistogram:
+
+    @pytest.fixture
+    def histogram(self):
+        return LatencyHistogram()
+
+    def test_small_values_are_exact(self, histogram):
+        for value in range(1, 11):
+            histogram.record(value)
+
+        assert histogram.percentile(50) == 5
+        assert histogram.percentile(100) == 10
+        assert histogram.count == 10
+
+    @pytest.mark.parametrize("percentile", [50, 90, 99, 99.9])
+    def test_percentiles_relative_error(self, histogram, percentile):
+        values = [value * 1000 for value in range(1, 10001)]
+        for value in values:
+            histogram.record(value)
+
+        expected = values[int(len(values) * percentile / 100) - 1]
+        assert abs(histogram.percentile(percentile) - expected) / expected < 2 ** -5
+
+    def test_negative_values_are_clamped(self, histogram):
+        histogram.record(-5)
+
+        assert histogram.min == 0
+        assert histogram.percentile(99) == 0
+
+    def test_concurrent_records_are_not_lost(self, histogram):
+        threads = [threading.Thread(target=lambda: [histogram.record(value) for value in range(1, 20001)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = histogram.snapshot()
+        assert snapshot.count == sum(snapshot.counts) == 80000
+        assert snapshot.total == 4 * 20000 * 20001 // 2
+
+
+class TestLatencyTracker:
+
+    def test_stages_are_chained(self):
+        tracker = LatencyTracker()
+        message = {"timestamp": None}
+        tracker.stamp(message)
+
+        stage_start = tracker.start(message)
+        stage_start = tracker.record("decode", stage_start)
+        tracker.record("book_update", stage_start)
+
+        summary = tracker.summary()
+        assert summary["queue"]["count"] == 1
+        assert summary["decode"]["count"] == 1
+        assert summary["book_update"]["count"] == 1
+        assert summary["exchange"]["count"] == 0
+        assert "book_update" in tracker.report()
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
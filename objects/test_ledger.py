@@ -0,0 +1,52 @@
+from ledger import BudgetLedger
+import threading
+import pytest
+
+
+class TestBudgetLedger:
+
+    @pytest.fixture
+    def ledger(self):
+        return BudgetLedger(9000)
+
+    def test_reserve_limits_the_size_to_the_budget(self, ledger):
+        assert ledger.reserve("buy-1", 1000, 12) == 9
+        assert ledger.reserve("buy-2", 1000, 1) == 0
+        assert (ledger.available, ledger.reserved) == (0, 9000)
+
+    def test_fills_commit_and_the_rest_is_released(self, ledger):
+        ledger.reserve("buy-1", 1000, 8)
+
+        ledger.reconcile("buy-1", 3, final=False)
+        ledger.reconcile("buy-1", 5, final=True)
+
+        assert ledger.stats() == {"available": 4000, "reserved": 0, "spent": 5000, "credited": 0, "open_orders": 0}
+
+    def test_sell_fills_are_credited(self, ledger):
+        ledger.reserve("sell-1", 1005.5, 8, side="sell")
+
+        ledger.reconcile("sell-1", 8, final=True)
+        ledger.reconcile("sell-1", 8, final=True)
+
+        assert ledger.available == 17044
+        assert ledger.stats()["credited"] == 8044
+
+    def test_concurrent_reservations_never_over_commit(self, ledger):
+        sizes = []
+        threads = [threading.Thread(target=lambda number=number: sizes.append(ledger.reserve(f"buy-{number}", 7.5, 100))) for number in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(sizes) == 1200
+        assert ledger.available == 0
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
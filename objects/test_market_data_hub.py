@@ -0,0 +1,76 @@
+from market_data_hub import MarketDataHub
+from instruments import InstrumentRegistry
+from carrier import Carrier
+from broker import Broker
+from strategy_arbitration_clearing import StrategyArbitrationOfClearing
+from unittest.mock import Mock, patch
+import pyRofex
+import pytest
+
+
+def message(symbol, price):
+    return {'type': 'Md', 'instrumentId': {'marketId': 'ROFX', 'symbol': symbol}, 'marketData': {'BI': [{'price': price, 'size': 1}], 'OF': [{'price': price, 'size': 1}]}}
+
+
+class TestMarketDataHub:
+
+    @pytest.fixture
+    def hub(self):
+        return MarketDataHub(InstrumentRegistry())
+
+    def test_messages_reach_only_the_subscribers_of_their_instrument(self, hub):
+        first, second, single = Mock(), Mock(), Mock()
+        hub.register(["MERV - XMEV - ALUA - CI", "MERV - XMEV - GGAL - CI"], [pyRofex.MarketDataEntry.OFFERS], first, conflate=True)
+        hub.register(["MERV - XMEV - GGAL - CI"], [pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS], second, depth=3, conflate=True)
+        hub.register(["MERV - XMEV - ALUA - CI"], [], single)
+        alua, ggal, byma = message("MERV - XMEV - ALUA - CI", 10), message("MERV - XMEV - GGAL - CI", 20), message("MERV - XMEV - BYMA - CI", 30)
+
+        hub.handle_batch([alua, ggal, byma])
+
+        first.assert_called_once_with([alua, ggal])
+        second.assert_called_once_with([ggal])
+        single.assert_called_once_with(alua)
+        assert hub.symbols() == ["MERV - XMEV - ALUA - CI", "MERV - XMEV - GGAL - CI"]
+        assert hub.entries == [pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.BIDS]
+        assert (hub.depth, hub.conflate) == (3, False)
+
+    def test_each_message_is_decoded_once(self, hub):
+        strategies = [Mock(), Mock(), Mock()]
+        for handler in strategies:
+            hub.register(["MERV - XMEV - ALUA - CI"], [], handler)
+        alua = message("MERV - XMEV - ALUA - CI", 10)
+
+        with patch.object(hub.instruments, 'decode', wraps=hub.instruments.decode) as mock_decode:
+            hub.handle(alua)
+            for _ in strategies:
+                assert hub.instruments.decode(alua)[1:] == (10, 1)
+
+        assert mock_decode.call_count == 1 + len(strategies)
+        assert hub.instruments.decode_levels(alua)[1] == [(10, 1)]
+        assert alua["_decoded"][0][0].symbol == "MERV - XMEV - ALUA - CI"
+
+    def test_carrier_subscribes_once_for_every_strategy(self):
+        carrier = Carrier(Broker(credentials=None, budget=999999))
+        carrier.strategy = StrategyArbitrationOfClearing(carrier, ticket_to_subscription=["ALUA", "GGAL"])
+        carrier.add_strategy(StrategyArbitrationOfClearing(carrier, ticket_to_subscription=["GGAL", "BYMA"], depth=5))
+
+        with patch.object(carrier, 'get_market_data_snapshot', return_value={}), \
+                patch.object(carrier, 'conect_wb') as mock_conect_wb, \
+                patch.object(carrier, 'market_data_subscription') as mock_subscription:
+            carrier.run_strategy()
+
+        mock_conect_wb.assert_called_once_with()
+        mock_subscription.assert_called_once()
+        symbols = mock_subscription.call_args.args[0]
+        assert sorted(symbols) == sorted(f"MERV - XMEV - {ticker} - {clearing}" for ticker in ("ALUA", "GGAL", "BYMA") for clearing in ("24hs", "CI"))
+        assert mock_subscription.call_args.kwargs["handler"] == carrier.hub.handle_batch
+        assert (mock_subscription.call_args.kwargs["depth"], mock_subscription.call_args.kwargs["conflate"]) == (5, True)
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
@@ -0,0 +1,107 @@
+from metrics import Metrics, MetricsServer
+from carrier import Carrier
+from broker import Broker
+from unittest.mock import patch
+from urllib.request import urlopen
+from urllib.error import HTTPError
+import threading
+import pytest
+
+
+class TestMetrics:
+
+    @pytest.fixture
+    def metrics(self):
+        metrics = Metrics()
+        metrics.counter("pybot_orders_sent_total", "Orders sent to the market.", ("side",))
+        metrics.counter("pybot_websocket_reconnects_total", "Websocket connections opened after the first one.")
+        metrics.gauge("pybot_budget_available", "Budget available to trade.", lambda: 1000.5)
+        return metrics
+
+    def test_render(self, metrics):
+        metrics.inc("pybot_orders_sent_total", ("sell",))
+        metrics.inc("pybot_orders_sent_total", ("buy",), 2)
+        metrics.summary("pybot_stage_latency_seconds", "Latency of every stage.", lambda: {("tna",): ({0.5: 0.001}, 3, 0.004)}, ("stage",))
+
+        assert metrics.render().splitlines() == [
+            "# HELP pybot_orders_sent_total Orders sent to the market.",
+            "# TYPE pybot_orders_sent_total counter",
+            'pybot_orders_sent_total{side="buy"} 2',
+            'pybot_orders_sent_total{side="sell"} 1',
+            "# HELP pybot_websocket_reconnects_total Websocket connections opened after the first one.",
+            "# TYPE pybot_websocket_reconnects_total counter",
+            "# HELP pybot_budget_available Budget available to trade.",
+            "# TYPE pybot_budget_available gauge",
+            "pybot_budget_available 1000.5",
+            "# HELP pybot_stage_latency_seconds Latency of every stage.",
+            "# TYPE pybot_stage_latency_seconds summary",
+            'pybot_stage_latency_seconds{stage="tna",quantile="0.5"} 0.001',
+            'pybot_stage_latency_seconds_count{stage="tna"} 3',
+            'pybot_stage_latency_seconds_sum{stage="tna"} 0.004',
+        ]
+
+    def test_concurrent_increments_are_not_lost(self, metrics):
+        def send_orders():
+            for _ in range(20000):
+                metrics.inc("pybot_orders_sent_total", ("buy",))
+
+        threads = [threading.Thread(target=send_orders) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert metrics.value("pybot_orders_sent_total", ("buy",)) == 80000
+
+    def test_gauges_that_fail_are_left_out(self, metrics):
+        metrics.gauge("pybot_inbox_depth", "Instruments waiting in the market data inbox.", lambda: 1 / 0)
+
+        lines = metrics.render().splitlines()
+        assert lines[-1] == "# TYPE pybot_inbox_depth gauge"
+        assert "pybot_budget_available 1000.5" in lines
+
+    def test_server_answers_the_scrapes(self, metrics):
+        server = MetricsServer(metrics, port=0)
+        server.start()
+        try:
+            with urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+                assert response.status == 200
+                assert "pybot_budget_available 1000.5" in response.read().decode()
+            with pytest.raises(HTTPError):
+                urlopen(f"http://127.0.0.1:{server.port}/other", timeout=5)
+        finally:
+            server.stop()
+
+    def test_carrier_counts_the_orders_and_the_messages(self):
+        carrier = Carrier(Broker(credentials=None, budget=9000))
+        orders = [
+            {'Symbol': 'ALUA', 'Clearing': 'CI', 'Offer': 990.0, 'Bid': 0.0, 'Size': 8, 'Price_with_costs': 1000, 'Side': 'buy'},
+            {'Symbol': 'ALUA', 'Clearing': '48hs', 'Offer': 0.0, 'Bid': 1010.0, 'Size': 8, 'Price_with_costs': 1005, 'Side': 'sell'},
+        ]
+        handler = carrier._counting_market_data(lambda message: None)
+
+        with patch.object(carrier, '_send_order_via_websocket'), patch.object(carrier, '_save_order'):
+            buy, sell = carrier.send_orders_wb(orders)
+            carrier._order_report_handler({'orderReport': {'wsClOrdId': buy.ws_client_order_id, 'clOrdId': 'cl-1', 'status': 'FILLED', 'text': 'Operada ', 'originatingUsername': 'PBCP'}})
+            carrier._order_report_handler({'orderReport': {'wsClOrdId': buy.ws_client_order_id, 'clOrdId': 'cl-1', 'status': 'FILLED', 'text': 'Operada ', 'originatingUsername': 'PBCP'}})
+            carrier._order_report_handler({'orderReport': {'wsClOrdId': sell.ws_client_order_id, 'clOrdId': 'cl-2', 'status': 'CANCELLED', 'text': 'Cancelada', 'originatingUsername': 'PBCP'}})
+        for _ in range(3):
+            handler({'instrumentId': {'symbol': 'MERV - XMEV - ALUA - CI'}})
+
+        metrics = carrier.metrics
+        assert (metrics.value("pybot_orders_sent_total", ("buy",)), metrics.value("pybot_orders_sent_total", ("sell",))) == (1, 1)
+        assert metrics.value("pybot_orders_finished_total", ("filled",)) == 1
+        assert metrics.value("pybot_orders_finished_total", ("cancelled",)) == 1
+        assert metrics.value("pybot_market_data_messages_total", ("MERV - XMEV - ALUA - CI",)) == 3
+        rendered = metrics.render()
+        assert "pybot_budget_available 1000.0" in rendered
+        assert 'pybot_stage_latency_seconds_count{stage="tna"} 0' in rendered
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
@@ -0,0 +1,83 @@
+from order_tracker import OrderTracker
+from carrier import Carrier
+from broker import Broker
+from unittest.mock import patch
+import pyRofex
+import pytest
+
+
+class TestOrderTracker:
+
+    @pytest.fixture
+    def tracker(self):
+        return OrderTracker(history_size=3)
+
+    def test_report_resolves_the_order(self, tracker):
+        order = tracker.track('ws-1', 'MERV - XMEV - ALUA - CI', pyRofex.Side.BUY, 8, 1000.0)
+
+        tracker.on_report({'wsClOrdId': 'ws-1', 'clOrdId': 'cl-1', 'status': 'NEW'})
+        assert not order.future.done()
+
+        tracker.on_report({'clOrdId': 'cl-1', 'status': 'FILLED', 'cumQty': 8, 'avgPx': 999.5})
+
+        assert order.future.result(timeout=0) is order
+        assert order.is_filled
+        assert (order.filled_size, order.average_price) == (8, 999.5)
+        assert tracker.get('ws-1') is tracker.get('cl-1') is order
+        assert len(tracker) == 0
+
+    def test_reports_of_untracked_orders_are_ignored(self, tracker):
+        assert tracker.on_report({'wsClOrdId': 'other', 'clOrdId': 'cl-9', 'status': 'FILLED'}) is None
+
+    def test_history_is_bounded(self, tracker):
+        for number in range(5):
+            tracker.track(f'ws-{number}')
+            tracker.on_report({'wsClOrdId': f'ws-{number}', 'status': 'CANCELLED'})
+
+        assert tracker.get('ws-0') is None
+        assert tracker.get('ws-4').status == 'CANCELLED'
+
+    def test_orders_are_counted_once(self, tracker):
+        for number in range(2):
+            tracker.track(f'ws-{number}')
+            tracker.on_report({'wsClOrdId': f'ws-{number}', 'clOrdId': f'cl-{number}', 'status': 'NEW'})
+        assert len(tracker) == 2
+
+        for number in range(2):
+            tracker.on_report({'clOrdId': f'cl-{number}', 'status': 'FILLED'})
+        tracker.track('ws-2')
+        tracker.on_report({'wsClOrdId': 'ws-2', 'clOrdId': 'cl-2', 'status': 'FILLED'})
+
+        assert len(tracker) == 0
+        # The history of 3 keeps the 3 orders, not 3 ids
+        assert [tracker.get(f'cl-{number}').ws_client_order_id for number in range(3)] == ['ws-0', 'ws-1', 'ws-2']
+
+    def test_carrier_saves_the_legs_filled(self):
+        carrier = Carrier(Broker(credentials=None, budget=9000))
+        orders = [
+            {'Symbol': 'ALUA', 'Clearing': 'CI', 'Offer': 990.0, 'Bid': 0.0, 'Size': 8, 'Price_with_costs': 1000, 'Side': 'buy'},
+            {'Symbol': 'ALUA', 'Clearing': '48hs', 'Offer': 0.0, 'Bid': 1010.0, 'Size': 8, 'Price_with_costs': 1005, 'Side': 'sell'},
+        ]
+
+        with patch.object(carrier, '_send_order_via_websocket'), \
+                patch.object(carrier, '_save_order') as mock_save_order, \
+                patch('pyRofex.cancel_order_via_websocket') as mock_cancel:
+            buy, sell = carrier.send_orders_wb(orders)
+            carrier._order_report_handler({'orderReport': {'wsClOrdId': buy.ws_client_order_id, 'clOrdId': 'cl-1', 'status': 'FILLED', 'text': 'Operada ', 'originatingUsername': 'PBCP'}})
+            carrier._order_report_handler({'orderReport': {'wsClOrdId': sell.ws_client_order_id, 'clOrdId': 'cl-2', 'status': 'NEW', 'text': '', 'originatingUsername': 'PBCP'}})
+
+        assert carrier.await_for_order_complete(buy, timeout=0)
+        assert not carrier.await_for_order_complete(sell, timeout=0)
+        mock_save_order.assert_called_once_with(orders[0])
+        mock_cancel.assert_called_once_with(client_order_id='cl-2')
+        assert (buy.size, sell.size) == (8, 8)
+        assert carrier.broker.ledger.stats() == {"available": 1000, "reserved": 0, "spent": 8000, "credited": 0, "open_orders": 1}
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
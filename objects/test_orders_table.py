@@ -0,0 +1,152 @@
+from orders_table import OrdersTable, ColumnarBuffer, OrdersWriter
+from unittest.mock import patch
+import threading
+from journal import OrderJournal
+import pandas as pd
+import numpy as np
+import pytest
+
+
+class TestOrdersTable:
+
+    @pytest.fixture
+    def orders_table(self):
+        return OrdersTable()
+
+    def test_orders_df_keeps_rows_in_order(self, orders_table):
+        orders_table.save_row({'Symbol': 'ALUA', 'Clearing': 'CI', 'Size': 8, 'Price_with_costs': 52392.08, 'Side': 'buy'})
+        orders_table.save_row({'Symbol': 'ALUA', 'Clearing': '48hs', 'Size': 8, 'Price_with_costs': 95440.66, 'Side': 'sell'})
+
+        expected_df = pd.DataFrame({
+            'Symbol': ['ALUA', 'ALUA'],
+            'Clearing': ['CI', '48hs'],
+            'Size': [8, 8],
+            'Price_with_costs': [52392.08, 95440.66],
+            'Side': ['buy', 'sell'],
+        })
+        pd.testing.assert_frame_equal(orders_table.orders_df, expected_df)
+
+    def test_orders_df_is_cached_until_next_row(self, orders_table):
+        orders_table.save_row({'Symbol': 'ALUA', 'Size': 8})
+        first_df = orders_table.orders_df
+
+        assert orders_table.orders_df is first_df
+        orders_table.save_row({'Symbol': 'BYMA', 'Size': 2})
+        assert orders_table.orders_df is not first_df
+        assert orders_table.orders_df['Symbol'].tolist() == ['ALUA', 'BYMA']
+
+    def test_empty_orders_df(self, orders_table):
+        assert orders_table.orders_df.empty
+
+
+class TestOrderJournal:
+
+    def test_orders_are_recovered_from_the_journal(self, tmp_path):
+        path = str(tmp_path / "orders.jsonl")
+        orders_table = OrdersTable(journal=OrderJournal(path))
+        orders_table.save_row({'Symbol': 'ALUA', 'Clearing': 'CI', 'Size': 8, 'Price_with_costs': np.float64(52392.08)})
+        orders_table.save_row({'Symbol': 'ALUA', 'Clearing': '48hs', 'Size': 8, 'Price_with_costs': 95440.66})
+        orders_table.close()
+
+        recovered = OrdersTable(journal=OrderJournal(path))
+        pd.testing.assert_frame_equal(recovered.orders_df, orders_table.orders_df)
+        recovered.close()
+
+    def test_cut_line_is_skipped(self, tmp_path):
+        path = tmp_path / "orders.jsonl"
+        path.write_text('{"Symbol":"ALUA","Size":8}\n{"Symbol":"BY')
+
+        journal = OrderJournal(str(path))
+        assert list(journal.rows()) == [{"Symbol": "ALUA", "Size": 8}]
+        journal.append({"Symbol": "COME", "Size": 1})
+        journal.close()
+        assert list(journal.rows()) == [{"Symbol": "ALUA", "Size": 8}, {"Symbol": "COME", "Size": 1}]
+
+    def test_group_commit(self, tmp_path):
+        journal = OrderJournal(str(tmp_path / "orders.jsonl"), commit_interval=60)
+        for size in range(10):
+            journal.append({'Size': size})
+        journal.commit()
+        journal.commit()
+
+        assert journal.commits == 1
+        journal.close()
+
+    def test_append_does_not_wait_for_the_fsync(self, tmp_path):
+        journal = OrderJournal(str(tmp_path / "orders.jsonl"), commit_interval=60)
+        journal.append({'Size': 1})
+        in_fsync, release = threading.Event(), threading.Event()
+
+        def slow_fsync(fileno):
+            in_fsync.set()
+            release.wait(5)
+        with patch("journal.os.fsync", slow_fsync):
+            committer = threading.Thread(target=journal.commit)
+            committer.start()
+            assert in_fsync.wait(5)
+            appender = threading.Thread(target=journal.append, args=({'Size': 2},))
+            appender.start()
+            appender.join(1)
+            assert not appender.is_alive()
+            release.set()
+            committer.join()
+        journal.close()
+
+        assert list(journal.rows()) == [{'Size': 1}, {'Size': 2}]
+        assert journal.commits == 2
+
+
+class TestOrdersWriter:
+
+    def test_fills_are_saved_in_order_and_flushed_on_close(self):
+        orders_table = OrdersTable()
+        writer = OrdersWriter(orders_table, maxsize=4)
+        for size in range(50):
+            writer.put({'Symbol': 'ALUA', 'Size': size})
+        writer.close()
+
+        assert orders_table.orders_df['Size'].tolist() == list(range(50))
+        assert writer.stats()["saved"] == 50
+        assert writer.stats()["dropped"] == 0
+
+    def test_full_queue_counts_overflows_and_drops(self):
+        orders_table = OrdersTable()
+        release = threading.Event()
+        writer = OrdersWriter(orders_table, maxsize=1, put_timeout=0.01)
+
+        with patch.object(orders_table, 'save_row', side_effect=lambda row: release.wait()):
+            writer.put({'Size': 1})
+            # Wait until the worker takes the first fill and blocks saving it
+            while writer.stats()["waiting"]:
+                pass
+            writer.put({'Size': 2})
+            assert not writer.put({'Size': 3})
+            release.set()
+            writer.close()
+
+        assert writer.overflows == 1
+        assert writer.dropped == 1
+
+
+class TestColumnarBuffer:
+
+    def test_grows_and_widens_columns(self):
+        buffer = ColumnarBuffer(capacity=2)
+        buffer.append({'Size': 1, 'TNA': 10})
+        buffer.append({'Size': 2, 'TNA': 10.5})
+        buffer.append({'Size': 'all', 'Extra': True})
+
+        df = buffer.to_df()
+        assert len(buffer) == 3
+        assert df['Size'].tolist() == [1, 2, 'all']
+        assert df['TNA'].tolist()[:2] == [10.0, 10.5] and np.isnan(df['TNA'][2])
+        assert df['Extra'].tolist() == [None, None, True]
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
@@ -0,0 +1,139 @@
+from profiler import Profiler
+from carrier import Carrier
+from broker import Broker
+from sequencer import EventSequencer, EventType
+from strategy_arbitration_clearing import StrategyArbitrationOfClearing
+from unittest.mock import patch
+import pstats
+import threading
+import time
+import pytest
+
+
+class Busy:
+
+    def __init__(self):
+        self.stop = threading.Event()
+
+    def work(self):
+        while not self.stop.is_set():
+            self.spin()
+
+    def spin(self):
+        sum(range(1000))
+
+
+class TestProfiler:
+
+    @pytest.fixture
+    def carrier(self):
+        sequencer = EventSequencer()
+        carrier = Carrier(Broker(credentials=None, budget=999999), sequencer=sequencer)
+        carrier.strategy = StrategyArbitrationOfClearing(carrier, tna_expected=50)
+        sequencer.register(EventType.MARKET_DATA, carrier.strategy.handle_batch_of_messages)
+        return carrier
+
+    messages = [
+        {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 2027.5, 'size': 4}]}},
+        {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 2010.0, 'size': 2}]}},
+    ]
+
+    def test_cprofile_profiles_the_handlers_registered(self, carrier, tmp_path):
+        profiler = Profiler.for_carrier(carrier)
+        path = str(tmp_path / "strategy.prof")
+
+        profiler.enable("cprofile")
+        with patch.object(carrier, '_send_order_via_websocket'):
+            carrier.sequencer.apply(EventType.MARKET_DATA, self.messages)
+        assert profiler.disable(path) == path
+
+        functions = {function for _, _, function in pstats.Stats(path).stats}
+        assert {"handle_batch_of_messages", "calculate_tna_batch", "send_orders_wb", "walk_depth"} <= functions
+
+    def test_concurrent_calls_run_while_one_thread_owns_the_profile(self):
+        class Handler:
+            def __init__(self):
+                self.inside = threading.Barrier(2, timeout=5)
+
+            def handle(self, value):
+                # Both threads are inside a profiled call at the same time
+                self.inside.wait()
+                return value * 2
+
+        handler = Handler()
+        profiler = Profiler([(handler, ("handle",))])
+        results, errors = [], []
+
+        def call(value):
+            try:
+                results.append(handler.handle(value))
+            except Exception as e:
+                errors.append(e)
+
+        profiler.enable("cprofile")
+        threads = [threading.Thread(target=call, args=(value,)) for value in (1, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = profiler.stats()
+        profiler.disable()
+
+        assert errors == []
+        assert sorted(results) == [2, 4]
+        assert "handle" in {function for _, _, function in stats.stats}
+
+    def test_calls_run_unprofiled_when_another_profiler_is_active(self):
+        busy = Busy()
+        profiler = Profiler([(busy, ("spin",))])
+
+        profiler.enable("cprofile")
+        with patch('cProfile.Profile.enable', side_effect=ValueError("Another profiling tool is already active")):
+            busy.spin()
+        assert profiler.stats() is None
+        profiler.disable()
+
+    def test_nothing_is_left_installed_once_disabled(self, carrier):
+        handler = carrier.strategy.handle_batch_of_messages
+        profiler = Profiler.for_carrier(carrier)
+
+        profiler.enable("cprofile")
+        assert carrier.sequencer._handlers[EventType.MARKET_DATA] is not handler
+        profiler.disable()
+
+        assert "handle_batch_of_messages" not in vars(carrier.strategy)
+        assert "send_orders_wb" not in vars(carrier)
+        assert carrier.sequencer._handlers[EventType.MARKET_DATA] == handler
+        assert profiler.disable() is None
+
+    def test_sampling_collapses_the_stacks_of_the_targets(self, tmp_path):
+        busy = Busy()
+        thread = threading.Thread(target=busy.work)
+        profiler = Profiler([(busy, ("work",))])
+        path = str(tmp_path / "busy.collapsed")
+
+        profiler.enable("sampling", interval=0.001)
+        thread.start()
+        time.sleep(0.2)
+        busy.stop.set()
+        thread.join()
+        profiler.disable(path)
+
+        with open(path) as file:
+            lines = file.read().splitlines()
+        assert lines
+        assert all(line.startswith("test_profiler.py:work") for line in lines)
+        assert any(line.startswith("test_profiler.py:work;test_profiler.py:spin ") for line in lines)
+
+    def test_unknown_mode(self, carrier):
+        with pytest.raises(ValueError):
+            Profiler.for_carrier(carrier).enable("tracing")
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
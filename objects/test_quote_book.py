@@ -0,0 +1,97 @@
+from quote_book import QuoteBook
+import pandas as pd
+import pytest
+
+
+class TestQuoteBook:
+
+    not_value = 0.0
+
+    @pytest.fixture
+    def quote_book(self):
+        return QuoteBook(capacity=2, not_value=self.not_value)
+
+    @pytest.mark.parametrize(
+    "rows, symbol, clearing, expected_slot",
+        [
+            (
+                [],
+                "ALUA",
+                "CI",
+                None
+            ),
+            (
+                [{"Symbol": "ALUA", "Clearing": "48hs", "Bid": 10, "Offer": not_value, "Size": 1}],
+                "ALUA",
+                "CI",
+                None
+            ),
+            (
+                [
+                    {"Symbol": "COME", "Clearing": "48hs", "Bid": 10, "Offer": not_value, "Size": 1},
+                    {"Symbol": "EDN", "Clearing": "CI", "Bid": not_value, "Offer": 10, "Size": 1},
+                    {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 10, "Offer": not_value, "Size": 1},
+                ],
+                "ALUA",
+                "48hs",
+                2
+            ),
+        ],
+        ids=["Test Case 1: Empty book", "Test Case 2: Symbol exists with another clearing", "Test Case 3: Slot found after the book grows"]
+    )
+    def test_slot(self, quote_book, rows, symbol, clearing, expected_slot):
+        for row in rows:
+            quote_book.add(row)
+
+        assert quote_book.slot(symbol, clearing) == expected_slot
+
+    def test_update_replaces_the_quote(self, quote_book):
+        index = quote_book.add({"Symbol": "ALUA", "Clearing": "CI", "Bid": self.not_value, "Offer": 30, "Size": 14})
+        replaced = quote_book.update(index, {"Symbol": "ALUA", "Clearing": "CI", "Bid": self.not_value, "Offer": 20, "Size": 3})
+
+        assert replaced
+        assert quote_book.row(index) == {"Symbol": "ALUA", "Clearing": "CI", "Bid": self.not_value, "Offer": 20, "Size": 3, "Price_with_costs": 20.0}
+        assert len(quote_book) == 1
+
+    def test_update_keeps_the_quote_if_the_price_is_the_same(self, quote_book):
+        index = quote_book.add({"Symbol": "ALUA", "Clearing": "48hs", "Bid": 30, "Offer": self.not_value, "Size": 14})
+        replaced = quote_book.update(index, {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 30, "Offer": self.not_value, "Size": 3})
+
+        assert not replaced
+        assert quote_book.row(index)["Size"] == 14
+
+    def test_prices_with_costs_are_cached_per_slot_and_ticker(self):
+        quote_book = QuoteBook(capacity=2, not_value=self.not_value, buy_multiplier=1.01, sell_multiplier=0.99)
+        quote_book.add({"Symbol": "ALUA", "Clearing": "48hs", "Bid": 2000, "Offer": self.not_value, "Size": 1})
+        index = quote_book.add({"Symbol": "ALUA", "Clearing": "CI", "Bid": self.not_value, "Offer": 1000, "Size": 1})
+
+        assert quote_book.price_with_costs[:2] == [1980.0, 1010.0]
+        assert (quote_book.ci_offer_with_costs[0], quote_book.bid_48_with_costs[0]) == (1010.0, 1980.0)
+
+        quote_book.update(index, {"Symbol": "ALUA", "Clearing": "CI", "Bid": self.not_value, "Offer": 1100, "Size": 1})
+        assert (quote_book.price_with_costs[index], quote_book.ci_offer_with_costs[0]) == (1111.0, 1111.0)
+
+    def test_to_df_groups_clearings_below_their_ticket(self, quote_book):
+        quote_book.add({"Symbol": "ALUA", "Clearing": "48hs", "Bid": 10, "Offer": self.not_value, "Size": 14})
+        quote_book.add({"Symbol": "COME", "Clearing": "CI", "Bid": self.not_value, "Offer": 10, "Size": 10})
+        quote_book.add({"Symbol": "ALUA", "Clearing": "CI", "Bid": self.not_value, "Offer": 15, "Size": 14})
+
+        expected_df = pd.DataFrame({
+            "Symbol": ["ALUA", "ALUA", "COME"],
+            "Clearing": ["48hs", "CI", "CI"],
+            "Bid": [10, self.not_value, self.not_value],
+            "Offer": [self.not_value, 15, 10],
+            "Size": [14, 14, 10],
+            "Price_with_costs": [10.0, 15.0, 10.0],
+        })
+
+        pd.testing.assert_frame_equal(quote_book.to_df(), expected_df)
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
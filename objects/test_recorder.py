@@ -0,0 +1,55 @@
+from recorder import SessionRecorder, SessionReplayer, ReplayCarrier
+from strategy_arbitration_clearing import StrategyArbitrationOfClearing
+from broker import Broker
+import pytest
+
+
+class TestSessionReplay:
+
+    messages = [
+        {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 2027.5, 'size': 4}]}},
+        {'type': 'Md', 'timestamp': 1713216949168, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 2010.0, 'size': 2}]}},
+    ]
+
+    @pytest.fixture
+    def session_log(self, tmp_path):
+        path = tmp_path / "session.jsonl"
+        recorder = SessionRecorder(str(path))
+        handled = []
+        handler = recorder.wrap("md", handled.append)
+        for message in self.messages:
+            handler(message)
+        recorder.close()
+
+        assert handled == self.messages
+        return str(path)
+
+    @pytest.fixture
+    def strategy_instance(self):
+        broker = Broker(credentials=None, budget=999999)
+        carrier = ReplayCarrier(broker)
+        strategy = StrategyArbitrationOfClearing(carrier, tna_expected=50)
+        carrier.strategy = strategy
+        return strategy
+
+    def test_recorded_messages_are_read_back(self, session_log):
+        entries = list(SessionReplayer(session_log).entries())
+
+        assert [message for _, _, message in entries] == self.messages
+        assert [kind for _, kind, _ in entries] == ["md", "md"]
+
+    def test_replay_sends_orders_through_the_stub(self, session_log, strategy_instance):
+        result = SessionReplayer(session_log).replay(strategy_instance)
+
+        assert result["messages"] == 2
+        assert [order["ticker"] for order in strategy_instance.carrier.sent_orders] == ['MERV - XMEV - ALUA - CI', 'MERV - XMEV - ALUA - 48hs']
+        assert [order["size"] for order in strategy_instance.carrier.sent_orders] == [2, 2]
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
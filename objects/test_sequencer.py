@@ -0,0 +1,79 @@
+from sequencer import EventSequencer, EventType
+from carrier import Carrier
+from unittest.mock import Mock
+import threading
+import pytest
+
+
+class TestEventSequencer:
+
+    @pytest.fixture
+    def sequencer(self):
+        sequencer = EventSequencer(record=True)
+        yield sequencer
+        sequencer.stop()
+
+    def test_events_are_applied_in_order_in_one_thread(self, sequencer):
+        applied = []
+        threads = set()
+
+        def handler(payload):
+            applied.append(payload)
+            threads.add(threading.current_thread().name)
+
+        sequencer.register(EventType.MARKET_DATA, handler)
+        sequencer.start()
+        for number in range(100):
+            sequencer.publish(EventType.MARKET_DATA, number)
+        sequencer.stop()
+
+        assert applied == list(range(100))
+        assert threads == {"event-sequencer"}
+
+    def test_call_returns_the_result_from_the_sequencer_thread(self, sequencer):
+        sequencer.start()
+
+        assert sequencer.call(lambda: threading.current_thread().name) == "event-sequencer"
+
+    def test_call_raises_the_exception_of_the_function(self, sequencer):
+        sequencer.start()
+
+        with pytest.raises(ZeroDivisionError):
+            sequencer.call(lambda: 1 / 0)
+
+    def test_replay_gives_the_same_state(self, sequencer):
+        state = []
+        sequencer.register(EventType.MARKET_DATA, state.append)
+        sequencer.register(EventType.ORDER_REPORT, lambda payload: state.append(-payload))
+        for number in range(1, 4):
+            sequencer.apply(EventType.MARKET_DATA, number)
+            sequencer.apply(EventType.ORDER_REPORT, number)
+
+        replayed = []
+        other = EventSequencer()
+        other.register(EventType.MARKET_DATA, replayed.append)
+        other.register(EventType.ORDER_REPORT, lambda payload: replayed.append(-payload))
+        other.replay(sequencer.history)
+
+        assert replayed == state == [1, -1, 2, -2, 3, -3]
+
+    def test_carrier_applies_order_reports_through_the_sequencer(self, sequencer):
+        carrier = Carrier(Mock(), sequencer=sequencer)
+        tracked_order = carrier.order_tracker.track('ws-1')
+        report = {'orderReport': {'originatingUsername': 'PBCP', 'text': 'Operada ', 'clOrdId': '1', 'wsClOrdId': 'ws-1'}}
+
+        sequencer.start()
+        sequencer.publish(EventType.ORDER_REPORT, report)
+        sequencer.stop()
+
+        assert carrier.await_for_order_complete(tracked_order, timeout=0)
+        assert sequencer.history == [(1, EventType.ORDER_REPORT, report)]
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
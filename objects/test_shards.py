@@ -0,0 +1,85 @@
+from shards import ShardSupervisor, FillsForwarder
+import queue
+import time
+import pytest
+
+
+def trading_shard(shard_id, tickers, config, ledger, fills, stop):
+    order_id = f"{shard_id}-buy"
+    size = ledger.reserve(order_id, 1000, 8)
+    ledger.reconcile(order_id, size, final=True)
+    FillsForwarder(fills, shard_id).put({"Symbol": tickers[0], "Size": size})
+    stop.wait()
+
+
+def dying_shard(shard_id, tickers, config, ledger, fills, stop):
+    if shard_id == 1:
+        # Dies with a buy in flight
+        ledger.reserve(f"{shard_id}-buy", 100, 6)
+        return
+    stop.wait()
+
+
+class OrdersTableStub:
+
+    def __init__(self):
+        self.rows = []
+
+    def save_row(self, row):
+        self.rows.append(row)
+
+
+class TestShardSupervisor:
+
+    def test_shards_share_the_budget_and_send_their_fills_back(self):
+        orders_table = OrdersTableStub()
+        supervisor = ShardSupervisor(["ALUA", "BMA", "GGAL", "YPFD", "PAMP", "COME"], 3, {}, orders_table, 20000, target=trading_shard)
+
+        assert supervisor.tickers == [["ALUA", "YPFD"], ["BMA", "PAMP"], ["GGAL", "COME"]]
+
+        supervisor.start()
+        deadline = time.monotonic() + 30
+        while supervisor.saved < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        supervisor.stop()
+
+        assert sorted(row["Symbol"] for row in orders_table.rows) == ["ALUA", "BMA", "GGAL"]
+        assert sorted(row["Size"] for row in orders_table.rows) == [4, 8, 8]
+        assert supervisor.ledger.stats()["spent"] == 20000
+        assert supervisor.ledger.available == 0
+        assert [shard["exitcode"] for shard in supervisor.status()] == [0, 0, 0]
+
+    def test_dead_shards_are_started_again(self):
+        supervisor = ShardSupervisor(["ALUA", "BMA"], 2, {}, OrdersTableStub(), 1000, target=dying_shard, monitor_interval=60, max_restarts=1)
+        supervisor.start()
+        supervisor.processes[1].join(30)
+
+        assert supervisor.check() == [1]
+        supervisor.processes[1].join(30)
+        assert supervisor.check() == []
+        supervisor.stop()
+
+        assert [shard["restarts"] for shard in supervisor.status()] == [0, 1]
+        # The buys left in flight by the dead processes are credited back
+        assert (supervisor.ledger.available, supervisor.ledger.reserved) == (1000, 0)
+
+
+class TestFillsForwarder:
+
+    def test_put_sends_the_order_with_its_shard(self):
+        fills = queue.Queue()
+        forwarder = FillsForwarder(fills, 2)
+
+        forwarder.put({"Symbol": "ALUA"})
+
+        assert fills.get_nowait() == (2, {"Symbol": "ALUA"})
+        assert forwarder.stats() == {"forwarded": 1}
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
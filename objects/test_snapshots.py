@@ -0,0 +1,159 @@
+from snapshots import SnapshotCache, SnapshotFetcher
+from carrier import Carrier
+from unittest.mock import Mock, patch
+import threading
+import time
+import pyRofex
+import requests
+import pytest
+
+
+class TestSnapshotFetcher:
+
+    entries = [pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS]
+
+    @staticmethod
+    def response(status_code=200, payload=None):
+        response = Mock()
+        response.status_code = status_code
+        response.json.return_value = payload
+        return response
+
+    @pytest.fixture
+    def session(self):
+        return Mock()
+
+    @pytest.fixture
+    def fetcher(self, session):
+        fetcher = SnapshotFetcher(environment=pyRofex.Environment.REMARKET, max_workers=4, timeout=0.5, session=session)
+        yield fetcher
+        fetcher.close()
+
+    def test_fetch_many_returns_the_responses_keyed_by_instrument(self, fetcher, session):
+        session.get.side_effect = lambda url, **kwargs: self.response(payload={"status": "OK", "url": url})
+
+        snapshot = fetcher.fetch_many(["MERV - XMEV - ALUA - CI", "MERV - XMEV - GGAL - CI"], self.entries)
+
+        assert list(snapshot) == ["MERV - XMEV - ALUA - CI", "MERV - XMEV - GGAL - CI"]
+        assert "symbol=MERV - XMEV - GGAL - CI&entries=BI,OF&depth=1" in snapshot["MERV - XMEV - GGAL - CI"]["url"]
+        assert {call_args.kwargs["timeout"] for call_args in session.get.call_args_list} == {0.5}
+
+    def test_requests_run_concurrently_in_a_bounded_pool(self, fetcher, session):
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def get(url, **kwargs):
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.remove(url)
+            return self.response(payload={"status": "OK"})
+
+        session.get.side_effect = get
+        fetcher.fetch_many([f"MERV - XMEV - T{number} - CI" for number in range(12)], self.entries)
+
+        assert 1 < max(peak) <= 4
+
+    def test_failed_request_gives_an_error_response(self, fetcher, session):
+        session.get.side_effect = requests.Timeout("read timed out")
+
+        snapshot = fetcher.fetch_many(["MERV - XMEV - ALUA - CI"], self.entries)
+
+        assert snapshot["MERV - XMEV - ALUA - CI"] == {"status": "ERROR", "description": "read timed out"}
+
+    def test_error_responses_are_not_cached(self, session):
+        fetcher = SnapshotFetcher(environment=pyRofex.Environment.REMARKET, session=session, cache=SnapshotCache())
+        session.get.side_effect = [self.response(payload={"status": "ERROR", "description": "Unknown symbol"}), self.response(payload={"status": "OK"})]
+
+        assert fetcher.fetch("MERV - XMEV - ALUA - CI", self.entries) == {"status": "ERROR", "description": "Unknown symbol"}
+        assert fetcher.fetch("MERV - XMEV - ALUA - CI", self.entries) == {"status": "OK"}
+        assert fetcher.fetch("MERV - XMEV - ALUA - CI", self.entries) == {"status": "OK"}
+        assert session.get.call_count == 2
+
+
+class TestSnapshotCache:
+
+    @pytest.fixture
+    def clock(self):
+        clock = Mock()
+        clock.return_value = 100.0
+        return clock
+
+    @pytest.fixture
+    def cache(self, clock):
+        return SnapshotCache({"market_data": 1.0, "account_report": 5.0}, clock=clock)
+
+    def test_entries_live_the_ttl_of_their_endpoint(self, cache, clock):
+        fetch = Mock(side_effect=[1, 2, 3])
+
+        assert cache.get("market_data", "ALUA", fetch) == 1
+        clock.return_value = 100.5
+        assert cache.get("market_data", "ALUA", fetch) == 1
+        clock.return_value = 101.5
+        assert cache.get("market_data", "ALUA", fetch) == 2
+        assert cache.get("detailed_position", "REM123", fetch) == 3
+        assert cache.stats() == {"hits": 1, "misses": 2, "shared": 0, "invalidations": 0}
+
+    def test_concurrent_callers_share_one_request(self, cache):
+        release = threading.Event()
+        fetch = Mock(side_effect=lambda: release.wait() and "report")
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("account_report", "REM123", fetch))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while cache.misses + cache.shared < 5:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["report"] * 5
+        assert fetch.call_count == 1
+
+    def test_invalidate_drops_the_entries_of_the_owner(self, cache):
+        fetch = Mock(side_effect=[1, 2, 3])
+        cache.get("market_data", "ALUA", fetch, variant="depth=1")
+        cache.get("market_data", "ALUA", fetch, variant="depth=2")
+
+        cache.invalidate("market_data", "ALUA")
+
+        assert cache.get("market_data", "ALUA", fetch, variant="depth=1") == 3
+
+    def test_response_invalidated_in_flight_isnt_cached(self, cache):
+        def fetch():
+            cache.invalidate("market_data", "ALUA")
+            return "stale"
+
+        assert cache.get("market_data", "ALUA", fetch) == "stale"
+        assert cache.get("market_data", "ALUA", lambda: "fresh") == "fresh"
+
+    def test_carrier_invalidates_with_the_websocket_events(self):
+        broker = Mock()
+        broker.account = "REM123"
+        carrier = Carrier(broker)
+        carrier.cache.get("market_data", "MERV - XMEV - ALUA - CI", lambda: "snapshot")
+        carrier.cache.get("account_report", "REM123", lambda: "report")
+
+        with patch("pyRofex.get_account_report", return_value="new report") as mock_account_report, \
+                patch("pyRofex.market_data_subscription") as mock_subscription:
+            assert carrier.get_account_report() == "report"
+            carrier._order_report_handler({"orderReport": {"accountId": {"id": "REM123"}, "clOrdId": "1", "status": "NEW", "text": ""}})
+            assert carrier.get_account_report() == "new report"
+
+            carrier.market_data_subscription(["MERV - XMEV - ALUA - CI"], entries=[], handler=Mock())
+            mock_subscription.call_args.kwargs["handler"]({"type": "Md", "instrumentId": {"symbol": "MERV - XMEV - ALUA - CI"}, "marketData": {}})
+
+        mock_account_report.assert_called_once_with(account="REM123")
+        assert carrier.cache.get("market_data", "MERV - XMEV - ALUA - CI", lambda: "new snapshot") == "new snapshot"
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
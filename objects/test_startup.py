@@ -0,0 +1,96 @@
+from startup import StartupTimer
+from broker import Broker
+from carrier import Carrier
+from strategy_arbitration_clearing import StrategyArbitrationOfClearing
+from unittest.mock import Mock, patch
+import os
+import subprocess
+import sys
+import threading
+import pytest
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestStartupTimer:
+
+    def test_phases_and_report(self):
+        clock = FakeClock()
+        timer = StartupTimer(clock=clock)
+        clock.now = 0.25
+        timer.mark("imports")
+        with timer.phase("carrier"):
+            clock.now = 0.5
+        clock.now = 0.75
+        timer.mark("login")
+
+        assert timer.phases == [("imports", 0.25, False), ("carrier", 0.25, False), ("login", 0.25, False)]
+        lines = timer.report().splitlines()
+        assert lines[0].split() == ["imports", "250.0", "ms"]
+        assert lines[-1].split() == ["total", "750.0", "ms"]
+
+    def test_background_phases_overlap_the_main_thread(self):
+        timer = StartupTimer()
+        release = threading.Event()
+        login = timer.background("login", lambda: release.wait(5) and "token")
+        timer.mark("carrier")
+        release.set()
+
+        assert login.result(timeout=5) == "token"
+        timer.shutdown()
+        assert [name for name, _, _ in timer.phases] == ["carrier", "login"]
+        assert "(background)" in timer.report().splitlines()[1]
+
+
+class TestStartupPipeline:
+
+    def test_broker_logs_in_only_when_asked(self):
+        credentials = {"user": "user", "password": "password", "account": "account", "broker_name": "veta"}
+        with patch('pyRofex.initialize') as mock_initialize:
+            broker = Broker(credentials=credentials, budget=100, connect=False)
+            mock_initialize.assert_not_called()
+            broker.connect()
+        mock_initialize.assert_called_once_with(user="user", password="password", account="account", environment=broker.environment, active_token=None)
+
+    def test_snapshot_is_fetched_while_the_websocket_connects(self):
+        carrier = Carrier(Broker(credentials=None, budget=999999))
+        carrier.strategy = StrategyArbitrationOfClearing(carrier, ticket_to_subscription=["ALUA"])
+        connecting = threading.Event()
+        calls = []
+
+        def snapshot(instruments, entries, depth):
+            # Only answers once the websocket started connecting, so a serial startup would time out here
+            assert connecting.wait(5)
+            calls.append("snapshot")
+            return {"MERV - XMEV - ALUA - CI": {"status": "OK", "marketData": {"OF": [{"price": 10, "size": 1}], "BI": []}}}
+
+        timer = StartupTimer()
+        with patch.object(carrier, 'get_market_data_snapshot', side_effect=snapshot), \
+                patch.object(carrier, 'conect_wb', side_effect=lambda: calls.append("websocket") or connecting.set()), \
+                patch.object(carrier, 'market_data_subscription', side_effect=lambda *args, **kwargs: calls.append("subscription")):
+            carrier.run_strategy(timer)
+        timer.shutdown()
+
+        assert calls == ["websocket", "snapshot", "subscription"]
+        assert carrier.strategy.quote_book.slot("ALUA", "CI") is not None
+        assert {"strategies", "snapshot", "websocket", "seed", "subscription"} <= {name for name, _, _ in timer.phases}
+
+    def test_pandas_is_not_imported_by_the_hot_path(self):
+        code = "import sys, carrier, async_carrier, strategy_arbitration_clearing, shards; print('pandas' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        assert result.stdout.strip() == "False", result.stderr
+
+
+if __name__ == '__main__':
+    # [-s] es para ver los prints
+    # [-v] es para obtener información mas detallada de los errores
+    # [-x ]stop after first failure
+    # [-tb=short]  shorter traceback format
+    # [-p no:doctest] es para que no te salgan los parametros que tiene cada test fallido
+    pytest.main(["-s", "-vv", "-x", "--tb=short", "-p no:doctest"])
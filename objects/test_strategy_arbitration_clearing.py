@@ -4,6 +4,7 @@ from strategy_arbitration_clearing import StrategyArbitrationOfClearing
 from broker import Broker
 import pytest
 import numpy as np
+from unittest.mock import patch
 
 
 
@@ -24,19 +25,19 @@ class TestStrategyArbitrationOfClearing:
         [
             (   
                 {'type': 'Md', 'timestamp': 1710873570879, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'LA': {'price': 23049.0, 'size': 69, 'date': 1710872944016}, 'OF': [{'price': 84990.0, 'size': 46}]}},
-                {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 84990.0, 'Size': 46, 'Price_with_costs': (0, False)}
+                {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 84990.0, 'Size': 46}
             ),
             (   
                 {'type': 'Md', 'timestamp': 1710873570879, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'LA': {'price': 23049.0, 'size': 69, 'date': 1710872944016}, 'OF': []}},
-                {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 0.0, 'Size': 0, 'Price_with_costs': (0, False)}
+                {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 0.0, 'Size': 0}
             ),
             (   
                 {'type': 'Md', 'timestamp': 1710873570879, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'BI': [{'price': 84990.0, 'size': 46}], 'LA': {'price': 23049.0, 'size': 69, 'date': 1710872944016}, 'OF': []}},
-                {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 84990.0, 'Offer': 0.0, 'Size': 46, 'Price_with_costs': (0, False)}
+                {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 84990.0, 'Offer': 0.0, 'Size': 46}
             ),
             (   
                 {'type': 'Md', 'timestamp': 1710873570879, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'BI': [], 'LA': {'price': 23049.0, 'size': 69, 'date': 1710872944016}, 'OF': []}},
-                {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 0.0, 'Offer': 0.0, 'Size': 0, 'Price_with_costs': (0, False)} 
+                {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 0.0, 'Offer': 0.0, 'Size': 0} 
             ),
         ],
         ids=["Test Case 1: CI with Offer", "Test Case 2: CI without Offer", "Test Case 3: 48hs with Bid", "Test Case 4: 48hs without Bid"],
@@ -50,126 +51,44 @@ class TestStrategyArbitrationOfClearing:
         assert result == expected_result
 
     @pytest.mark.parametrize(
-    "data_manipulated, expected_result, data_for_df",
+    "messages, expected_df",
     [
-        (   
-            {"Symbol": "ALUA", "Clearing": "48hs", "Bid": None, "Offer": None},
-            (True, 0),
-            None
+        (
+            [
+                {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 19654.0, 'size': 1}]}},
+            ],
+            pd.DataFrame({"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [19654.0], "Offer": [not_value], "Size": [1], "Price_with_costs": [19599.3]}),
         ),
-        (   
-            {"Symbol": "ALUA", "Clearing": "48hs", "Bid": not_value, "Offer": not_value},
-            (False, 0),
-            {"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [not_value], "Offer": [not_value]},
+        (
+            [
+                {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 19654.0, 'size': 1}]}},
+                {'type': 'Md', 'timestamp': 1713216949168, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - BYMA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 108222.0, 'size': 21}]}},
+                {'type': 'Md', 'timestamp': 1713216949169, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 30000.0, 'size': 5}]}},
+            ],
+            pd.DataFrame({"Symbol": ["ALUA", "ALUA", "BYMA"], "Clearing": ["48hs", "CI", "CI"], "Bid": [19654.0, not_value, not_value], "Offer": [not_value, 30000.0, 108222.0], "Size": [1, 5, 21], "Price_with_costs": [19599.3, 30083.49, 108523.18]}),
         ),
-        (   
-            {"Symbol": "ALUA", "Clearing": "48hs", "Bid": not_value, "Offer": not_value},
-            (False, 2),
-            {"Symbol": ["COME", "EDENOR", "ALUA"], "Clearing": ["48hs", "CI", "48hs"], "Bid": [not_value, not_value, not_value], "Offer": [not_value, not_value, not_value]}
-        )
-    ], ids=["Test Case 1: Symbol does not exist in df without data", "Test Case 2: Symbol exists in row 0 of a df with data", "Test Case 3: Symbol exists in row 3 of a df with data",]
-)
-    def test__is_new_symbol(self, strategy_instance, data_manipulated, expected_result, data_for_df):
-            
-            if data_for_df:  # If true populate the dataframe
-                strategy_instance.main_df = pd.DataFrame(data_for_df)
-
-            result =  strategy_instance._is_new_symbol(data_manipulated)
-
-
-            assert result == expected_result
-
-
-    @pytest.mark.parametrize(
-    "data_to_add, index, expected_result, data_for_df",
-    [ 
-        (   
-            {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 10, "Offer": not_value, "Size": 10, "Price_with_costs" :(0, False)},
-            0,
-            pd.DataFrame({"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [10], "Offer": [not_value], "Size":[10], "Price_with_costs": [(0, False)]}),
-            None 
-        ),
-        (   
-            {"Symbol": "COME", "Clearing": "CI", "Bid": 20, "Offer": not_value, "Size": 14},
-            1,
-            pd.DataFrame({"Symbol": ["ALUA", "COME"], "Clearing": ["48hs", "CI"], "Bid": [10, 20], "Offer": [not_value, not_value], "Size": [14, 14]}),
-            {"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [10], "Offer": [not_value], "Size": 14},
+        (
+            [
+                {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 19654.0, 'size': 1}]}},
+                {'type': 'Md', 'timestamp': 1713216949168, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 19660.0, 'size': 3}]}},
+                {'type': 'Md', 'timestamp': 1713216949169, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 19660.0, 'size': 7}]}},
+            ],
+            pd.DataFrame({"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [19660.0], "Offer": [not_value], "Size": [3], "Price_with_costs": [19605.29]}),
         ),
-        (   
-            {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 15, "Offer": not_value},
-            0,
-            pd.DataFrame({"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [15], "Offer": [not_value]}),
-            {"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [10], "Offer": [not_value]},
-            ),
-        (   
-        {"Symbol": "ALUA", "Clearing": "CI", "Bid": not_value, "Offer": 20},
-        1,
-        pd.DataFrame({"Symbol": ["ALUA", "ALUA"], "Clearing": ["48hs","CI"], "Bid": [not_value, not_value], "Offer": [not_value, 20]}),
-        {"Symbol": ["ALUA", "ALUA"], "Clearing": ["48hs", "CI"], "Bid": [not_value, not_value], "Offer": [not_value, 30]},
-        ),       
     ],
-    ids=["Test Case 1: add data in a df without data", "Test Case 2: add data in a df with data","Test Case 3: Replacing data in row 0","Test Case 4: Replacing data in row 1"]
-)
-    def test_add_data_to_dataframe(self, strategy_instance, data_to_add, index, expected_result, data_for_df):
-            """
-            add new data into the dataframe
-            """
-
-            if data_for_df:
-                strategy_instance.main_df = pd.DataFrame(data_for_df)
-            strategy_instance.add_data_to_df(data_to_add, index)
-            
-            result =  strategy_instance.main_df
-
-
-
-            pd.testing.assert_frame_equal(result, expected_result)
-
-
-    @pytest.mark.parametrize(
-    "data_manipulated, data_for_df, expected_result",
-    [
-
-        (   
-            {"Symbol": "ALUA", "Clearing": "CI", "Bid": not_value, "Offer": not_value},
-            pd.DataFrame({"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [10], "Offer": [not_value]}),
-            (True, )
-
-        ),
-
-        (   
-            {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 5, "Offer": not_value},
-            pd.DataFrame({"Symbol": ["ALUA"], "Clearing": ["48hs"], "Bid": [10], "Offer": [not_value]}),
-            (False, 0)
-        ),
-
-    ],
-    ids=["Test Case 1: Clearing does not exist in ticket row", "Test Case 2: Clearing exists in df"]
+    ids=["Test Case 1: first quote of a symbol", "Test Case 2: new clearing is placed below its ticket", "Test Case 3: only price changes replace the quote"]
     )
-    def test_is_new_clearing(self, strategy_instance, data_manipulated, data_for_df, expected_result):
-
-        strategy_instance.main_df = data_for_df
-        result =  strategy_instance.is_new_clearing(data_manipulated)
-        assert result == expected_result
+    def test_handle_incoming_messages(self, strategy_instance, messages, expected_df):
+        with patch.object(strategy_instance, 'prepare_orders') as mock_prepare_orders:
+            for message in messages:
+                strategy_instance.handle_incoming_messages(message)
 
-    @pytest.mark.parametrize(
-    "data_to_add, index, expected_result, initial_df",
-    [      
-        (   
-            {"Symbol": "ALUA", "Clearing": "CI", "Bid": not_value, "Offer": 15, "Size": 14},
-            1,
-            pd.DataFrame({"Symbol": ["ALUA", "ALUA","COME", "COME"], "Clearing": ["48hs", "CI", "CI", "48hs"], "Bid": [10, not_value, np.nan, 15], "Offer": [not_value, 15, 10, not_value], "TNA":[np.nan, np.nan, np.nan, np.nan], "Size": [14, 14, 10, 5], "ClientId": [np.nan,np.nan, np.nan, np.nan]}),
-            pd.DataFrame({"Symbol": ["ALUA","COME", "COME"], "Clearing": ["48hs", "CI", "48hs"], "Bid": [10, np.nan, 15], "Offer": [not_value, 10, not_value], "TNA":[np.nan, np.nan, np.nan], "Size": [14, 10, 5], "ClientId": [np.nan, np.nan, np.nan]}),
-        ),
-
-    ],
-    ids=["Test Case 1: add data in a df with data in index 1"]
-)
-    def test_place_data_bellow_existing_ticket(self, strategy_instance, data_to_add, index, expected_result, initial_df):
-        strategy_instance.main_df = initial_df
-        strategy_instance.place_data_bellow_existing_ticket(data_to_add, index)
+        pd.testing.assert_frame_equal(strategy_instance.main_df, expected_df)
+        assert mock_prepare_orders.call_count == 0
 
-        pd.testing.assert_frame_equal(strategy_instance.main_df, expected_result)
+    def test_main_df_is_read_only(self, strategy_instance):
+        with pytest.raises(AttributeError):
+            strategy_instance.main_df = pd.DataFrame()
 
     @pytest.mark.parametrize(
     "dict_price, expected_result",
@@ -195,99 +114,195 @@ class TestStrategyArbitrationOfClearing:
         assert result == expected_result
 
     @pytest.mark.parametrize(
-    "rows_with_symbol_df, expected_result_tna, expected_df",
+    "rows_with_symbol, expected_result_tna, expected_price_with_costs",
         [
             (   
-                pd.DataFrame(
-                    {"Symbol": ["ALUA", "ALUA"], 
-                    "Clearing": ["48hs", "CI"], 
-                    "Bid": [15, not_value], 
-                    "Offer": [not_value, 10],
-                    "Price_with_costs": [(0,False), (0,False)]
-                    }),
+                [
+                    {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 15, "Offer": not_value, "Size": 1},
+                    {"Symbol": "ALUA", "Clearing": "CI", "Bid": not_value, "Offer": 10, "Size": 1},
+                ],
                 8970.34,
-                pd.DataFrame(
-                    {"Symbol": [np.nan, np.nan], 
-                    "Clearing": ["48hs", "CI"], 
-                    "Bid": [14.940105, np.nan], 
-                    "Offer": [np.nan, 10.03993],
-                    "Size": [np.nan,np.nan],
-                    "Price_with_costs": [(8970.34, True), (8970.34, True)]
-                    }),
-
+                [14.96, 10.03],
             ),
             (   
-                pd.DataFrame({
-                            "Symbol": ["ALUA", "ALUA"], 
-                            "Clearing": ["48hs", "CI"], 
-                            "Bid": [2027.50, not_value], 
-                            "Offer": [not_value, 2010],
-                            "Price_with_costs": [(0,False), (0,False)]
-                            }),
+                [
+                    {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 2027.50, "Offer": not_value, "Size": 1},
+                    {"Symbol": "ALUA", "Clearing": "CI", "Bid": not_value, "Offer": 2010, "Size": 1},
+                ],
                 56.77,
-                pd.DataFrame({
-                            "Symbol": ["ALUA", "ALUA"], 
-                            "Clearing": ["48hs", "CI"], 
-                            "Bid": [2027.50, not_value], 
-                            "Offer": [not_value, 2010],
-                            "Price_with_costs": [(56.77, True), (56.77, True)]
-                            }),
+                [2021.86, 2015.59],
             ),
             (   
-                pd.DataFrame({
-                            "Symbol": ["ALUA", "ALUA"], 
-                            "Clearing": ["48hs", "CI"], 
-                            "Bid": [2027.50, not_value], 
-                            "Offer": [not_value, 2010],
-                            "Price_with_costs": [(0,False), (0,False)]
-                            }),
+                [
+                    {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 2027.50, "Offer": not_value, "Size": 1},
+                    {"Symbol": "ALUA", "Clearing": "CI", "Bid": not_value, "Offer": 2010, "Size": 1},
+                    {"Symbol": "ALUA", "Clearing": "48hs", "Bid": 2027.50, "Offer": not_value, "Size": 3},
+                ],
                 56.77,
-                pd.DataFrame({
-                            "Symbol": ["ALUA", "ALUA"], 
-                            "Clearing": ["48hs", "CI"], 
-                            "Bid": [2027.50, not_value], 
-                            "Offer": [not_value, 2010],
-                            "Price_with_costs": [(56.77, True), (56.77, True)]
-                            }),
+                [2021.86, 2015.59],
             ),
 
         ]
-    ,ids=["Test Case 1: Calculate TNA of rows 0 and 1", "Test Case 2: Calculate TNA of rows 0 and 1 with different values", "Test Case 3: Calculate TNA of rows 0 and 1 where row 0 has already calculated costs"])
-    def test_calculate_tna(self, strategy_instance, rows_with_symbol_df, expected_result_tna, expected_df):
-        
+    ,ids=["Test Case 1: Calculate TNA of rows 0 and 1", "Test Case 2: Calculate TNA of rows 0 and 1 with different values", "Test Case 3: Calculate TNA of rows 0 and 1 where row 0 is quoted again at the same price"])
+    def test_calculate_tna(self, strategy_instance, rows_with_symbol, expected_result_tna, expected_price_with_costs):
+        for row in rows_with_symbol:
+            strategy_instance.quote_book.add(row)
         
-        result_tna = strategy_instance.calculate_tna(rows_with_symbol_df)
+        result_tna = strategy_instance.calculate_tna("ALUA")
         assert result_tna == expected_result_tna
-        # pd.testing.assert_frame_equal(strategy_instance.df, expected_df)
+        assert strategy_instance.quote_book.price_with_costs[:2] == expected_price_with_costs
     
     @pytest.mark.parametrize(
-    "rows_with_symbol_df, expected_result",
+    "messages, tna_expected, expected_symbols",
         [
-            (   
-                pd.DataFrame(
-                    {"Symbol": ["ALUA", "ALUA"], 
-                    "Clearing": ["48hs", "CI"], 
-                    "Bid": [15, not_value], 
-                    "Offer": [not_value, 10]
-                    }),
-                [{'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 15.0, 'Offer': not_value}, {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': not_value, 'Offer': 10.0}],
+            (
+                [
+                    {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 2027.5, 'size': 4}]}},
+                    {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 2010.0, 'size': 2}]}},
+                    {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - BYMA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 300.0, 'size': 4}]}},
+                    {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - BYMA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 300.0, 'size': 2}]}},
+                    {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - COME - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 10.0, 'size': 2}]}},
+                ],
+                50,
+                ["ALUA"]
             ),
-            (   
-                pd.DataFrame({
-                            "Symbol": ["ALUA", "ALUA"], 
-                            "Clearing": ["48hs", "CI"], 
-                            "Bid": [2027.50, not_value], 
-                            "Offer": [not_value, 2010]
-                            }),
-                [{'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 2027.5, 'Offer': not_value}, {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': not_value, 'Offer': 2010.0}],
+            (
+                [
+                    {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 2027.5, 'size': 4}]}},
+                    {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 2010.0, 'size': 2}]}},
+                ],
+                60,
+                []
             ),
+        ]
+    ,ids=["Test Case 1: Only the symbol over the expected TNA prepares orders", "Test Case 2: No symbol reaches the expected TNA"])
+    def test_handle_batch_of_messages(self, strategy_instance, messages, tna_expected, expected_symbols):
+        strategy_instance.tna_expected = tna_expected
+
+        with patch.object(strategy_instance, 'prepare_orders') as mock_prepare_orders:
+            result = strategy_instance.handle_batch_of_messages(messages)
+
+        assert result == expected_symbols
+        assert mock_prepare_orders.call_count == len(expected_symbols)
+        for call_args, symbol in zip(mock_prepare_orders.call_args_list, expected_symbols):
+            rows_with_symbol = call_args[0][0]
+            assert {row["Symbol"] for row in rows_with_symbol} == {symbol}
+            assert {row["TNA"] for row in rows_with_symbol} == {strategy_instance.calculate_tna(symbol)}
+
+    def test_legs_ignore_the_other_clearings(self, strategy_instance):
+        messages = [
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - GGAL - 24hs'}, 'marketData': {'BI': [{'price': 105.0, 'size': 4}], 'OF': []}},
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - GGAL - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 100.0, 'size': 2}]}},
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - GGAL - 48hs'}, 'marketData': {'BI': [{'price': 110.0, 'size': 4}], 'OF': []}},
+        ]
+        strategy_instance.tna_expected = 50
+
+        with patch.object(strategy_instance.carrier, 'send_orders_wb') as mock_send_orders_wb:
+            assert strategy_instance.handle_batch_of_messages(messages) == ["GGAL"]
 
+        order_buy, order_sell = mock_send_orders_wb.call_args[0][0]
+        assert (order_buy["Clearing"], order_buy["Side"], order_buy["Offer"]) == ("CI", "buy", 100.0)
+        assert (order_sell["Clearing"], order_sell["Side"], order_sell["Bid"]) == ("48hs", "sell", 110.0)
+
+    @pytest.mark.parametrize(
+    "offers_ci, bids_48, expected_walk",
+        [
+            (
+                [(1000, 5), (1002, 10)],
+                [(1020, 3), (1015, 4), (1010, 20)],
+                {'Size': 7, 'Offer': 1002, 'Bid': 1015, 'Buy_with_costs': 1003.35, 'Sell_with_costs': 1014.31, 'TNA': 199.35},
+            ),
+            (
+                [(1000, 5)],
+                [(1020, 30)],
+                {'Size': 5, 'Offer': 1000, 'Bid': 1020, 'Buy_with_costs': 1002.78, 'Sell_with_costs': 1017.16, 'TNA': 261.71},
+            ),
+            (
+                [(1010, 5)],
+                [(1010, 30)],
+                {'Size': 0},
+            ),
+            (
+                [],
+                [(1020, 30)],
+                None,
+            ),
         ]
-    ,ids=["Test Case 1: Transform df with two tickets into dictionary", "Test Case 2: Transform df with two tickets into dictionary with different values",])
-    def test_transform_rows_into_dict(self, strategy_instance, rows_with_symbol_df, expected_result):
+    ,ids=["Test Case 1: Walks until a pair of levels is below the TNA", "Test Case 2: Walks until a book runs out", "Test Case 3: The first levels don't reach the TNA", "Test Case 4: Book without levels"])
+    def test_walk_depth(self, strategy_instance, offers_ci, bids_48, expected_walk):
+        strategy_instance.tna_expected = 100
+
+        assert strategy_instance.walk_depth(offers_ci, bids_48) == expected_walk
+
+    def test_orders_are_sized_walking_the_depth(self, strategy_instance):
+        strategy_instance.tna_expected = 100
+        messages = [
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 1020, 'size': 3}, {'price': 1015, 'size': 4}]}},
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 1000, 'size': 5}, {'price': 1002, 'size': 10}]}},
+        ]
+
+        with patch.object(strategy_instance.carrier, 'send_orders_wb') as mock_send_orders_wb:
+            assert strategy_instance.handle_batch_of_messages(messages) == ['ALUA']
+
+        order_buy, order_sell = mock_send_orders_wb.call_args[0][0]
+        assert (order_buy["Size"], order_buy["Offer"], order_buy["Price_with_costs"]) == (7, 1002, 1003.35)
+        assert (order_sell["Size"], order_sell["Bid"], order_sell["Price_with_costs"]) == (7, 1015, 1014.31)
+        assert order_buy["TNA"] == order_sell["TNA"] == 199.35
+
+    def test_walk_only_prices_the_ci_and_48hs_rows(self, strategy_instance):
+        strategy_instance.tna_expected = 100
+        strategy_instance.depth_book.update("ALUA", "CI", [(1000, 5)])
+        strategy_instance.depth_book.update("ALUA", "48hs", [(1020, 3)])
+        row_24 = {'Symbol': 'ALUA', 'Clearing': '24hs', 'Bid': 1005.0, 'Offer': 0.0, 'Size': 4, 'Price_with_costs': 1002.2}
+        rows = [
+            {'Symbol': 'ALUA', 'Clearing': 'CI', 'Bid': 0.0, 'Offer': 1000.0, 'Size': 5, 'Price_with_costs': 1002.78},
+            dict(row_24),
+            {'Symbol': 'ALUA', 'Clearing': '48hs', 'Bid': 1020.0, 'Offer': 0.0, 'Size': 3, 'Price_with_costs': 1017.16},
+        ]
+
+        _, sized_24, sized_48 = strategy_instance.determine_size_order(rows)
+
+        assert (sized_24["Bid"], sized_24["Price_with_costs"]) == (row_24["Bid"], row_24["Price_with_costs"])
+        assert (sized_48["Bid"], sized_48["Size"]) == (1020, 3)
+
+    def test_fixed_point_matches_the_float_prices(self):
+        broker = Broker(credentials=None, budget=999999)
+        floats = StrategyArbitrationOfClearing(Carrier(broker), tna_expected=50)
+        fixed = StrategyArbitrationOfClearing(Carrier(broker), tna_expected=50, fixed_point=True)
+        messages = [
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 2027.5, 'size': 4}]}},
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - ALUA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 2010.0, 'size': 2}]}},
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - BYMA - 48hs'}, 'marketData': {'OF': [], 'BI': [{'price': 300.0, 'size': 4}]}},
+            {'type': 'Md', 'timestamp': 1713216949167, 'instrumentId': {'marketId': 'ROFX', 'symbol': 'MERV - XMEV - BYMA - CI'}, 'marketData': {'BI': [], 'OF': [{'price': 300.0, 'size': 2}]}},
+        ]
+
+        with patch.object(floats.carrier, 'send_orders_wb') as float_orders, patch.object(fixed.carrier, 'send_orders_wb') as fixed_orders:
+            assert fixed.handle_batch_of_messages(messages) == floats.handle_batch_of_messages(messages) == ['ALUA']
+
+        assert fixed.quote_book.ci_offer_with_costs.dtype == np.int64
+        assert fixed.calculate_tna("ALUA") == floats.calculate_tna("ALUA") == 56.77
+        pd.testing.assert_frame_equal(fixed.main_df, floats.main_df)
+        assert fixed_orders.call_args[0][0] == float_orders.call_args[0][0]
+
+        # Only the size changes, the price in ticks is the same
+        assert not fixed.quote_book.update(fixed.quote_book.slot("ALUA", "CI"), {"Symbol": "ALUA", "Clearing": "CI", "Bid": 0.0, "Offer": 2010.0, "Size": 9})
+
+    def test_seed_book(self, strategy_instance):
+        snapshot = {
+            'MERV - XMEV - ALUA - 48hs': {'status': 'OK', 'marketData': {'OF': [], 'BI': [{'price': 2027.5, 'size': 4}]}, 'depth': 1, 'aggregated': True},
+            'MERV - XMEV - ALUA - CI': {'status': 'OK', 'marketData': {'BI': [], 'OF': [{'price': 2010.0, 'size': 2}]}, 'depth': 1, 'aggregated': True},
+            'MERV - XMEV - GGAL - CI': {'status': 'ERROR', 'description': 'read timed out'},
+        }
+        strategy_instance.tna_expected = 60
+
+        with patch.object(strategy_instance.carrier, 'get_market_data_snapshot', return_value=snapshot) as mock_snapshot:
+            result = strategy_instance.seed_book(list(snapshot), ['entries'])
+
+        mock_snapshot.assert_called_once_with(list(snapshot), ['entries'], depth=2)
+        assert result == []
+        book = strategy_instance.main_df
+        assert book[["Symbol", "Clearing", "Bid", "Offer", "Size"]].values.tolist() == [['ALUA', '48hs', 2027.5, 0.0, 4], ['ALUA', 'CI', 0.0, 2010.0, 2]]
 
-        result = strategy_instance.transform_rows_into_dict(rows_with_symbol_df)
-        assert result == expected_result
 
 
     # @pytest.mark.parametrize(